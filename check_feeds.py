@@ -1,14 +1,39 @@
-import urllib.request
-import urllib.error
-import ssl
+#!/usr/bin/env python3
+"""
+Quick XML feed prober for a single agency
 
-# Ignore SSL certificate errors
-ctx = ssl.create_default_context()
-ctx.check_hostname = False
-ctx.verify_mode = ssl.CERT_NONE
+Probes every base URL × path combination for a publicly reachable XML feed.
+Probes run in parallel over keep-alive connections (one pooled session per
+worker thread), and bodies are only touched for candidates that look like
+XML:
 
-base_urls = ["https://altia.com.cy", "https://www.altia.com.cy", "https://marketplace.altia.com.cy"]
-paths = [
+1. HEAD - a non-200 status rejects the URL outright
+2. GET with "Range: bytes=0-1023" - the first KB is sniffed for an XML
+   document (also used when the server does not answer HEAD). The
+   Content-Type is not trusted: PHP and WordPress exports are often
+   served as text/html
+
+Usage:
+    python3 check_feeds.py https://altia.com.cy https://www.altia.com.cy
+    python3 check_feeds.py https://example.com --paths /feed.xml,/export.xml
+    python3 check_feeds.py https://example.com --paths-file paths.txt --concurrency 16
+"""
+
+import argparse
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+import urllib3
+
+from discover_cyprus_feeds import USER_AGENT, looks_like_xml
+
+DEFAULT_PATHS = [
     "/feed.xml", "/feed", "/rss.xml", "/rss",
     "/xml", "/xml-feed", "/xmlfeed", "/xml/export", "/xml/properties",
     "/properties.xml", "/propertyfeed.xml", "/property-feed.xml",
@@ -19,45 +44,174 @@ paths = [
     "/api/xml", "/api/feed/xml", "/api/properties.xml",
     "/sitemap.xml", "/sitemap_index.xml", "/sitemap-properties.xml", "/sitemap-listings.xml"
 ]
+DEFAULT_CONCURRENCY = 8  # probes in flight overall
+DEFAULT_PER_HOST = 4  # probes in flight against one host
+PROBE_TIMEOUT = 5
+SNIFF_BYTES = 1024  # prefix requested with Range and inspected for XML
+
+
+@dataclass
+class ProbeResult:
+    """Outcome of probing one URL"""
+    url: str
+    status: Optional[int] = None
+    content_type: str = ""
+    final_url: Optional[str] = None  # set when the probe was redirected
+    size: Optional[int] = None  # full body size, when the server reported it
+    is_xml: bool = False
+    method: str = "HEAD"  # request that decided the result
+    bytes_read: int = 0
+    error: Optional[str] = None
+
+
+class FeedProber:
+    """Parallel HEAD/Range-first prober over pooled keep-alive sessions"""
+
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, per_host: int = DEFAULT_PER_HOST,
+                 timeout: float = PROBE_TIMEOUT, verify: bool = False):
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.verify = verify
+        self._host_slots: Dict[str, threading.Semaphore] = defaultdict(
+            lambda: threading.Semaphore(max(1, per_host))
+        )
+        self._host_lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        """requests.Session is not thread-safe, so each worker keeps its own connection pool"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update({"User-Agent": USER_AGENT})
+            session.verify = self.verify
+            self._local.session = session
+        return session
+
+    def _slot(self, url: str) -> threading.Semaphore:
+        with self._host_lock:
+            return self._host_slots[urlparse(url).netloc]
+
+    def probe(self, url: str) -> ProbeResult:
+        result = ProbeResult(url=url)
+        with self._slot(url):
+            try:
+                if self._head(result):
+                    self._sniff(result)
+            except requests.RequestException as e:
+                result.error = type(e).__name__
+        return result
+
+    def _head(self, result: ProbeResult) -> bool:
+        """HEAD the URL; return True when the body still has to be sniffed"""
+        response = self.session.head(result.url, timeout=self.timeout, allow_redirects=True)
+        if response.status_code in (405, 501) or response.status_code >= 500:
+            return True  # HEAD not supported (or unreliable); let the ranged GET decide
+        self._record(result, response)
+        return response.status_code == 200  # whatever the Content-Type says, the body decides
+
+    def _sniff(self, result: ProbeResult) -> None:
+        """Fetch only the first SNIFF_BYTES and check that they start an XML document"""
+        headers = {"Range": f"bytes=0-{SNIFF_BYTES - 1}", "Accept-Encoding": "identity"}
+        with self.session.get(result.url, headers=headers, timeout=self.timeout,
+                              allow_redirects=True, stream=True) as response:
+            result.method = "GET"
+            self._record(result, response)
+            if response.status_code not in (200, 206):
+                return
+            prefix = next(response.iter_content(SNIFF_BYTES), b"")[:SNIFF_BYTES]
+            result.bytes_read = len(prefix)
+            result.is_xml = looks_like_xml(prefix)
+            if response.status_code == 206:
+                total = response.headers.get("Content-Range", "").rpartition("/")[2]
+                result.size = int(total) if total.isdigit() else None
+
+    @staticmethod
+    def _record(result: ProbeResult, response: requests.Response) -> None:
+        result.status = response.status_code
+        result.content_type = response.headers.get("Content-Type", "").lower()
+        length = response.headers.get("Content-Length")
+        result.size = int(length) if length and length.isdigit() else None
+        if response.url != result.url:
+            result.final_url = response.url
+
+    def probe_all(self, urls: List[str]) -> List[ProbeResult]:
+        """Probe URLs in parallel; results come back in input order"""
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return list(executor.map(self.probe, urls))
+
+
+def build_urls(base_urls: List[str], paths: List[str]) -> List[str]:
+    # Interleave hosts so the per-host limit does not leave workers idle
+    return [base.rstrip("/") + path for path in paths for base in base_urls]
+
+
+def read_paths(args: argparse.Namespace) -> List[str]:
+    paths = list(DEFAULT_PATHS)
+    if args.paths_file:
+        with open(args.paths_file, encoding="utf-8") as f:
+            paths = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    if args.paths:
+        paths = [p.strip() for p in args.paths.split(",") if p.strip()]
+    return ["/" + p.lstrip("/") for p in paths]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Probe an agency's sites for XML property feeds")
+    parser.add_argument("base_urls", nargs="+", help="site roots to probe, e.g. https://altia.com.cy")
+    parser.add_argument("--paths", help="comma-separated paths to try (default: built-in feed path list)")
+    parser.add_argument("--paths-file", help="file with one path per line")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"probes in flight (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST,
+                        help=f"probes in flight per host (default: {DEFAULT_PER_HOST})")
+    parser.add_argument("--timeout", type=float, default=PROBE_TIMEOUT,
+                        help=f"seconds per request (default: {PROBE_TIMEOUT})")
+    parser.add_argument("--verify-tls", action="store_true",
+                        help="verify TLS certificates (off by default; many agency sites have broken chains)")
+    parser.add_argument("--verbose", action="store_true", help="print every probe, not just XML hits")
+    return parser.parse_args(argv)
+
+
+def main() -> int:
+    args = parse_args()
+    if not args.verify_tls:
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    base_urls = [u if "://" in u else f"https://{u}" for u in args.base_urls]
+    all_urls = build_urls(base_urls, read_paths(args))
+
+    print(f"Checking {len(all_urls)} URLs ({args.concurrency} in parallel)...")
+    prober = FeedProber(args.concurrency, args.per_host, args.timeout, verify=args.verify_tls)
+    started = time.perf_counter()
+    results = prober.probe_all(all_urls)
+    elapsed = time.perf_counter() - started
+
+    found = []
+    seen = set()
+    for result in results:
+        if result.is_xml:
+            redirect = f" -> {result.final_url}" if result.final_url else ""
+            print(f"[FOUND XML] {result.url}{redirect} - {result.content_type}")
+            if (result.final_url or result.url) not in seen:  # www. and bare hosts often redirect to one feed
+                seen.add(result.final_url or result.url)
+                found.append(result)
+        elif args.verbose:
+            outcome = result.error or f"{result.status} {result.content_type}"
+            print(f"[{result.method}] {result.url} - {outcome}")
+
+    sniffed = sum(1 for r in results if r.method == "GET")
+    body_bytes = sum(r.bytes_read for r in results)
+    print(f"\nProbed {len(results)} URLs in {elapsed:.1f}s "
+          f"({sniffed} ranged GETs, {body_bytes / 1024:.1f} KB of body read)")
+
+    print("\n--- Summary of Potential XML Feeds ---")
+    for f in found:
+        size = f", {f.size / 1024:.0f} KB" if f.size else ""
+        print(f"FOUND: {f.final_url or f.url} ({f.content_type}{size})")
+    return 0 if found else 1
+
 
-all_urls = []
-for base in base_urls:
-    for path in paths:
-        all_urls.append(base + path)
-
-print(f"Checking {len(all_urls)} URLs...")
-
-found = []
-
-for url in all_urls:
-    try:
-        # Switch to GET to inspect content
-        req = urllib.request.Request(url, method='GET')
-        req.add_header('User-Agent', 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36')
-        
-        with urllib.request.urlopen(req, timeout=5, context=ctx) as response:
-            code = response.getcode()
-            ctype = response.headers.get('Content-Type', '').lower()
-            content = response.read(500).decode('utf-8', errors='ignore')
-            
-            is_xml_content = '<?xml' in content or '<rss' in content or '<feed' in content or '<urlset' in content
-            
-            if code == 200:
-                if is_xml_content:
-                     print(f"[FOUND XML] {url} - {ctype}")
-                     found.append((url, ctype))
-                else:
-                     # It is likely a soft 404 html page
-                     pass
-            elif code == 301 or code == 302:
-                 print(f"[{code}] {url} -> {response.headers.get('Location')}")
-    except urllib.error.HTTPError as e:
-        # print(f"[{e.code}] {url}")
-        pass
-    except Exception as e:
-        # print(f"[ERR] {url} - {e}")
-        pass
-
-print("\n--- Summary of Potential XML Feeds ---")
-for f in found:
-    print(f"FOUND: {f[0]} ({f[1]})")
+if __name__ == "__main__":
+    exit(main())
@@ -6,28 +6,105 @@ This script systematically discovers and validates publicly accessible XML prope
 from Cyprus real estate agencies and developers.
 
 Tracks:
-1. Seed target list (predefined Cyprus agencies)
+1. Seed target list (predefined Cyprus agencies, or --domains-file with --shard / --checkpoint)
 2. Endpoint pattern probing (common feed paths)
 3. Sitemap pivot (discover feeds via sitemaps)
 4. Validation (verify feeds contain property listings)
 """
 
+import argparse
+import hashlib
+import heapq
+import itertools
+import multiprocessing
+import os
+import random
+import re
+import socket
+import sqlite3
+import ssl
+import sys
+import tempfile
+import textwrap
+import zlib
 import requests
+import urllib3
 import xml.etree.ElementTree as ET
-from urllib.parse import urljoin, urlparse
-from typing import List, Dict, Optional, Tuple
+from urllib.parse import unquote, urljoin, urlparse
+from typing import Callable, Iterable, Iterator, List, Dict, Optional, Set, Tuple
 import time
-from dataclasses import dataclass, field
+import threading
+import uuid
+from collections import deque
+from dataclasses import asdict, dataclass, field
 import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
 
 # Configuration
 USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
 REQUEST_TIMEOUT = 10
 RATE_LIMIT_DELAY = 0.5  # seconds between requests to same domain
-MAX_WORKERS = 5
+MAX_WORKERS = 5  # domains scanned concurrently
+BASE_URL_TEMPLATE = "https://{domain}"  # where a domain's patterns are probed
 
-# Cyprus real estate domains (from initial research)
+# Fetch policy (adaptive timeouts, retries, hedging)
+FETCH_RETRIES = 2  # extra attempts per request for transient failures
+DOMAIN_RETRY_BUDGET = 10  # retries + hedged requests allowed per domain
+RETRY_BACKOFF = 0.5  # seconds; retry n (from 1) sleeps uniform(0, RETRY_BACKOFF * 2**(n - 1))
+RETRYABLE_STATUS = {502, 503, 504}
+LATENCY_WINDOW = 50  # recent response times kept per host
+LATENCY_MIN_SAMPLES = 5  # below this a host gets REQUEST_TIMEOUT and no hedging
+TIMEOUT_P95_MULTIPLIER = 4.0  # timeout = p95 response time x this, within floor / ceiling
+TIMEOUT_FLOOR = 3.0
+TIMEOUT_CEILING = 30.0
+HEDGE_MIN_DELAY = 0.05  # seconds; hedges fire after max(this, host p90)
+
+# Streaming validation (--stream)
+STREAM_CHUNK_SIZE = 16 * 1024
+SNIFF_BYTES = 2048  # prefix inspected before committing to an XML parse
+MAX_PROBE_BYTES = 2 * 1024 * 1024  # hard cap on body bytes read per candidate
+DECISION_CHECK_INTERVAL = 256  # elements parsed between "is the score settled?" checks
+PARSE_POOL_MIN_BYTES = 256 * 1024  # smaller bodies parse faster in-thread than they pickle
+SOFT_404_PREFIX_CHARS = 1024  # normalized prefix length compared against the soft-404 fingerprint
+
+# Persistent response cache (conditional revalidation between runs)
+CACHE_DIR = ".feed_discovery_cache"
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+CACHE_MAX_AGE = 14 * 24 * 3600  # seconds since the entry was last validated
+CACHE_MAX_ENTRY_BYTES = 8 * 1024 * 1024  # bodies larger than this are not kept
+NEGATIVE_TTL = 7 * 24 * 3600  # seconds a failed (domain, path) probe is trusted
+# Errors that say nothing about whether the path exists (timeouts, dropped connections,
+# failures that survived fetch_url's retries); these are never remembered as dead
+TRANSIENT_ERROR_MARKERS = (
+    "timed out", "Connection aborted", "Connection reset", "Connection broken",
+    "RemoteDisconnected", "IncompleteRead", " attempts)",
+)
+
+# Pre-flight (DNS + connect + canonical redirect before a domain is probed)
+PREFLIGHT_WORKERS = 32  # domains checked concurrently, ahead of the probing workers
+PREFLIGHT_TIMEOUT = 5  # seconds for the TCP/TLS connect and the canonical redirect request
+DNS_TTL = 3600  # seconds a successful lookup is reused
+DNS_NEGATIVE_TTL = 600  # seconds a failed lookup is reused
+
+# Adaptive pattern ordering (learned per-pattern / per-platform hit rates)
+ALL_PLATFORMS = "*"  # stats row aggregated over every platform
+UNKNOWN_PLATFORM = "unknown"
+PATTERN_PRIOR_WEIGHT = 5.0  # probes' worth of weight the all-platform rate carries in a platform's estimate
+PLATFORM_SNIFF_BYTES = 16 * 1024  # body prefix of the first response searched for platform markers
+
+# Domain lists (--domains-file / --shard / --checkpoint)
+DOMAIN_QUEUE_FACTOR = 2  # domains queued per worker while streaming a domain list
+
+# Result export (JSON lines written as candidates are validated, sorted after the run)
+RESULTS_JSONL = "cyprus_feeds_results.jsonl"
+RESULTS_JSON = "cyprus_feeds_results.json"  # derived from the JSONL file once the run ends
+RESULTS_FLUSH_EVERY = 20  # records buffered before the JSONL file is flushed
+RESULTS_FLUSH_INTERVAL = 5.0  # seconds a written record may sit in the buffer
+SORT_RUN_RECORDS = 50_000  # records sorted in memory per run of the external merge sort
+
+# Cyprus real estate domains (from initial research, used when no --domains-file is given)
 CYPRUS_DOMAINS = [
     "pafilia.com",
     "imperioproperties.com",
@@ -73,6 +150,19 @@ FEED_PATTERNS = [
     "/?output=xml",
 ]
 
+# Sitemap roots crawled by the sitemap pivot (recursively for sitemap indexes)
+SITEMAP_PATTERNS = [
+    "/sitemap.xml",
+    "/sitemap_index.xml",
+]
+SITEMAP_MAX_DEPTH = 2  # levels of nested <sitemapindex> followed below a root
+SITEMAP_MAX_FILES = 25  # sitemap documents fetched per domain
+SITEMAP_MAX_FEED_URLS = 100  # feed-like <loc> URLs collected per domain
+SITEMAP_MAX_BYTES = 64 * 1024 * 1024  # sitemaps may be up to 50 MB uncompressed
+
+# <loc> URLs worth validating as feeds
+FEED_URL_HINTS = ['feed', 'export', 'api', 'xml', 'properties', 'listings']
+
 # XML tags that indicate property listings
 LISTING_TAGS = [
     "property", "listing", "item", "offer", "unit", 
@@ -87,6 +177,19 @@ PROPERTY_FIELDS = [
     "longitude", "coordinates", "address", "title", "type"
 ]
 
+# Site platforms recognised from the first response (headers, then body markers)
+PLATFORM_SIGNATURES = {
+    "wordpress": (r"api\.w\.org|wordpress|wp-json", rb"/wp-content/|/wp-includes/|wp-json"),
+    "drupal": (r"drupal", rb"drupal-settings-json|/sites/default/files/|drupal\.js"),
+    "joomla": (r"joomla", rb"/media/jui/|joomla!|/components/com_"),
+    "wix": (r"wix", rb"static\.wixstatic\.com|wix-warmup-data"),
+    "squarespace": (r"squarespace", rb"static1\.squarespace\.com"),
+}
+PLATFORM_HEADERS = ("Link", "X-Powered-By", "X-Generator", "Server", "Set-Cookie")
+
+LISTING_TAG_SET = frozenset(LISTING_TAGS)
+MAX_TAG_DEPTH = 5  # depth limit used when collecting the tag vocabulary
+
 
 @dataclass
 class FeedCandidate:
@@ -102,26 +205,1546 @@ class FeedCandidate:
     sample_fields: List[str] = field(default_factory=list)
     error: Optional[str] = None
     confidence_score: int = 0  # 0-100
+    bytes_read: int = 0  # body bytes consumed while validating
+    timings: Dict[str, float] = field(default_factory=dict)  # seconds: "parse", "classify" (+ fetch phases with metrics on)
+    fetch: Dict[str, float] = field(default_factory=dict)  # "attempts", "retries", "hedged", "hedge_won", "timeout"
+
+
+@dataclass
+class SoftNotFoundFingerprint:
+    """What a domain answers with HTTP 200 for a path that cannot exist"""
+    content_type: str
+    size: Optional[int]  # Content-Length, when the server sent one
+    prefix_hash: str
+
+    @staticmethod
+    def _media_type(content_type: Optional[str]) -> str:
+        return (content_type or "").split(";")[0].strip().lower()
+
+    @classmethod
+    def from_response(cls, response: requests.Response, prefix: bytes, url: str) -> "SoftNotFoundFingerprint":
+        length = response.headers.get("Content-Length")
+        return cls(
+            content_type=cls._media_type(response.headers.get("Content-Type")),
+            size=int(length) if length and length.isdigit() else None,
+            prefix_hash=normalized_prefix_hash(prefix, url),
+        )
+
+    def matches(self, response: requests.Response, prefix: bytes, url: str) -> bool:
+        """True if a 200 response looks like the same catch-all page"""
+        if self._media_type(response.headers.get("Content-Type")) != self.content_type:
+            return False
+        length = response.headers.get("Content-Length")
+        if self.size is not None and length and length.isdigit():
+            # Pages that echo the path differ slightly in size
+            if abs(int(length) - self.size) > max(256, self.size // 10):
+                return False
+        return normalized_prefix_hash(prefix, url) == self.prefix_hash
+
+
+@dataclass
+class XMLAnalysis:
+    """Tag set, listing count and property fields gathered from one pass over a document"""
+    root_tag: str = ""
+    tags: set = field(default_factory=set)
+    listing_count: int = 0
+    field_tags: set = field(default_factory=set)
+
+    def sample_fields(self, limit: int = 10) -> List[str]:
+        """Property-like tag names, same selection as FeedDiscovery.extract_sample_fields"""
+        return sorted(self.field_tags)[:limit]
+
+
+class XMLAnalyzer:
+    """
+    Single-pass replacement for extract_all_tags/count_listing_nodes/extract_sample_fields.
+
+    Elements are fed one at a time with their depth (root = 0), so the same
+    analyzer works on a parsed tree or on iterparse events.
+    """
+
+    def __init__(self, max_depth: int = MAX_TAG_DEPTH):
+        self.max_depth = max_depth
+        self.result = XMLAnalysis()
+        # raw tag -> (lowercase local name, listing weight)
+        self._tag_info: Dict[str, Tuple[str, int]] = {}
+
+    def _describe(self, tag: str) -> Tuple[str, int]:
+        info = self._tag_info.get(tag)
+        if info is None:
+            namespaced = '}' in tag
+            local = tag.split('}')[-1] if namespaced else tag
+            # count_listing_nodes matches ".//tag" and ".//{*}tag"; a tag without
+            # a namespace satisfies both patterns and is therefore counted twice
+            weight = 0
+            if local in LISTING_TAG_SET:
+                weight = 1 if namespaced else 2
+            info = (local.lower(), weight)
+            self._tag_info[tag] = info
+        return info
+
+    def _add_tag(self, local: str) -> None:
+        result = self.result
+        if local not in result.tags:
+            result.tags.add(local)
+            if any(field in local for field in PROPERTY_FIELDS):
+                result.field_tags.add(local)
+
+    def add(self, tag: str, depth: int) -> None:
+        """Record one element"""
+        if not isinstance(tag, str):
+            return  # comments / processing instructions
+        local, weight = self._describe(tag)
+        if depth == 0:
+            self.result.root_tag = tag.split('}')[-1] if '}' in tag else tag
+        else:
+            self.result.listing_count += weight
+        if depth <= self.max_depth:
+            self._add_tag(local)
+
+    def feed_tree(self, root: ET.Element) -> XMLAnalysis:
+        """Walk a parsed tree once"""
+        self.add(root.tag, 0)
+        max_depth = self.max_depth
+        listing_count = 0
+        stack = [(iter(root), 1)]
+        while stack:
+            children, depth = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                continue
+            if isinstance(child.tag, str):
+                local, weight = self._describe(child.tag)
+                listing_count += weight
+                if depth <= max_depth:
+                    self._add_tag(local)
+            if len(child):
+                stack.append((iter(child), depth + 1))
+        self.result.listing_count += listing_count
+        return self.result
+
+
+class BoundedBodyReader:
+    """
+    File-like view over a streamed response body for ET.iterparse.
+
+    Reads at most `max_bytes` of (decoded) body and supports peeking at the
+    prefix so non-XML responses can be rejected before any parsing.
+    """
+
+    def __init__(self, chunks: Iterator[bytes], max_bytes: int = MAX_PROBE_BYTES, capture: bool = False):
+        self._chunks = chunks
+        self._buffer = b""
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self.wait_time = 0.0  # seconds spent waiting on the network for chunks
+        self.truncated = False
+        self._exhausted = False
+        # Optionally keep everything read so a complete body can be cached
+        self.captured: Optional[List[bytes]] = [] if capture else None
+
+    @property
+    def complete(self) -> bool:
+        """The whole body was read without hitting the byte cap"""
+        return self._exhausted and not self.truncated
+
+    def _fill(self, size: int) -> None:
+        while len(self._buffer) < size and not self._exhausted:
+            started = time.perf_counter()
+            chunk = next(self._chunks, None)
+            self.wait_time += time.perf_counter() - started
+            if chunk is None:
+                self._exhausted = True
+                break
+            remaining = self.max_bytes - self.bytes_read
+            # A body of exactly max_bytes is complete; it is only truncated if more arrives
+            if len(chunk) > remaining:
+                chunk = chunk[:remaining]
+                self.truncated = True
+                self._exhausted = True
+            self.bytes_read += len(chunk)
+            self._buffer += chunk
+            if self.captured is not None:
+                if self.bytes_read > CACHE_MAX_ENTRY_BYTES:
+                    self.captured = None  # too big to cache, stop holding it
+                else:
+                    self.captured.append(chunk)
+
+    def peek(self, size: int) -> bytes:
+        """Return up to `size` bytes without consuming them"""
+        self._fill(size)
+        return self._buffer[:size]
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self.max_bytes
+        self._fill(size)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def gunzip_if_needed(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """Transparently decompress gzip bodies (e.g. sitemap.xml.gz served as a file)"""
+    first = next(chunks, b"")
+    if not first.startswith(b"\x1f\x8b"):
+        if first:
+            yield first
+        yield from chunks
+        return
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    yield decompressor.decompress(first)
+    for chunk in chunks:
+        yield decompressor.decompress(chunk)
+    yield decompressor.flush()
+
+
+_VOLATILE_TOKEN_RE = re.compile(r"[0-9a-f]{16,}|\d+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalized_prefix_hash(prefix: bytes, url: str) -> str:
+    """
+    Hash of a body prefix with the request path, numbers, long hex tokens
+    (nonces, cache busters) and whitespace runs normalized away, so that
+    catch-all pages echoing the requested URL still hash the same.
+    """
+    text = prefix[:SNIFF_BYTES].decode("latin-1").lower()
+    parsed = urlparse(url)
+    path = unquote(parsed.path).lower()
+    query = unquote(parsed.query).lower()
+    for echo in (f"{path}?{query}" if query else "", query, path, path.rstrip("/").rsplit("/", 1)[-1]):
+        if len(echo) > 1:
+            text = text.replace(echo, "")
+    text = _VOLATILE_TOKEN_RE.sub("0", text)
+    text = _WHITESPACE_RE.sub(" ", text)[:SOFT_404_PREFIX_CHARS]
+    return hashlib.sha1(text.encode("latin-1", "replace")).hexdigest()
+
+
+def is_feed_like_url(url: str) -> bool:
+    """Sitemap <loc> entries that are worth validating as feeds"""
+    if not any(hint in url.lower() for hint in FEED_URL_HINTS):
+        return False
+    return url.endswith('.xml') or '/feed' in url or '/api' in url
+
+
+_FIRST_ELEMENT_RE = re.compile(rb"<([A-Za-z_][\w:.-]*)")
+
+
+def looks_like_xml(prefix: bytes) -> bool:
+    """Cheap check on the first bytes of a body: XML document, not an HTML page"""
+    if prefix.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return True  # UTF-16 BOM, leave it to the parser
+    head = prefix.lstrip(b"\xef\xbb\xbf").lstrip().lower()
+    if not head.startswith(b"<"):
+        return False
+    if head.startswith(b"<!doctype html"):
+        return False
+    # Skip the declaration, comments and doctype to find the document element
+    stripped = re.sub(rb"<\?.*?\?>|<!--.*?-->|<!doctype[^>]*>", b"", head, flags=re.DOTALL)
+    match = _FIRST_ELEMENT_RE.search(stripped)
+    return not (match and match.group(1) == b"html")
+
+
+class HostRateLimiter:
+    """
+    Per-host token bucket shared by all worker threads.
+
+    Each host gets `rate` requests per second with a burst of `burst`, so running
+    several domains concurrently never makes a single site see more traffic than
+    the sequential crawler did.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # host -> (tokens, last refill)
+        self._lock = threading.Lock()
+
+    def acquire(self, host: str) -> float:
+        """Take one token for host, sleeping until it is available. Returns the wait time."""
+        if self.rate <= 0:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            tokens, last = self._buckets.get(host, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+            # Reserve the token even if we have to wait for it, so concurrent
+            # callers for the same host queue up behind each other
+            tokens -= 1.0
+            self._buckets[host] = (tokens, now)
+            wait = -tokens / self.rate if tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class HostLatency:
+    """
+    Recent response times (time to headers) per host, shared by all workers.
+
+    Timeouts follow the host's p95 instead of one fixed value, so fast hosts
+    fail fast and slow-but-alive ones get room; each retry doubles it. The
+    p90 is the delay after which a request is hedged.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, host: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(host)
+            if samples is None:
+                samples = self._samples[host] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, host: str, pct: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(host, ()))
+        if len(samples) < LATENCY_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))]
+
+    def timeout(self, host: str, attempt: int = 0) -> float:
+        p95 = self.percentile(host, 95)
+        base = REQUEST_TIMEOUT if p95 is None else min(TIMEOUT_CEILING, max(TIMEOUT_FLOOR, p95 * TIMEOUT_P95_MULTIPLIER))
+        return min(TIMEOUT_CEILING, base * 2 ** attempt)
+
+    def hedge_delay(self, host: str) -> Optional[float]:
+        p90 = self.percentile(host, 90)
+        return None if p90 is None else max(HEDGE_MIN_DELAY, p90)
+
+
+def is_transient_error(error: requests.exceptions.RequestException) -> bool:
+    """Worth retrying: timeouts and dropped connections, not DNS, TLS or refused connections"""
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ChunkedEncodingError)):
+        return True
+    if isinstance(error, requests.exceptions.SSLError):
+        return False
+    if isinstance(error, requests.exceptions.ConnectionError):
+        message = str(error)
+        return not any(marker in message for marker in (
+            "Failed to resolve", "Name or service not known", "nodename nor servname", "Connection refused",
+        ))
+    return False
+
+
+def _close_response(future) -> None:
+    """Done-callback for the losing request of a hedged pair"""
+    if not future.cancelled() and future.exception() is None:
+        response, _ = future.result()
+        response.close()
+
+
+class ResponseCache:
+    """
+    On-disk HTTP response cache (SQLite) with conditional revalidation.
+
+    Only 200 responses carrying an ETag or Last-Modified header are stored.
+    Entries are dropped once they have not been revalidated for `max_age`
+    seconds, and least recently used entries are evicted to stay under
+    `max_bytes`. Bodies over `max_entry_bytes` are never stored, so one large
+    feed cannot evict the rest of the cache.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES,
+                 max_age: float = CACHE_MAX_AGE, max_entry_bytes: int = CACHE_MAX_ENTRY_BYTES):
+        os.makedirs(directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, "responses.sqlite"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                final_url TEXT,
+                status INTEGER,
+                headers TEXT,
+                body BLOB,
+                size INTEGER,
+                validated_at REAL,
+                accessed_at REAL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self.expire()
+
+    def get(self, url: str) -> Optional[dict]:
+        """Return the stored entry for url, or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT final_url, status, headers, body, validated_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None or time.time() - row[4] > self.max_age:
+            return None
+        return {"final_url": row[0], "status": row[1], "headers": json.loads(row[2]), "body": row[3]}
+
+    def conditional_headers(self, entry: dict) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for revalidating entry"""
+        headers = {}
+        stored = {k.lower(): v for k, v in entry["headers"].items()}
+        if stored.get("etag"):
+            headers["If-None-Match"] = stored["etag"]
+        if stored.get("last-modified"):
+            headers["If-Modified-Since"] = stored["last-modified"]
+        return headers
+
+    def is_cacheable(self, response: requests.Response) -> bool:
+        return response.status_code == 200 and bool(
+            response.headers.get("ETag") or response.headers.get("Last-Modified")
+        )
+
+    def store(self, url: str, response: requests.Response, body: bytes) -> None:
+        """Store a 200 response body together with its validators"""
+        if len(body) > self.max_entry_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, response.url or url, response.status_code, json.dumps(dict(response.headers)),
+                 sqlite3.Binary(body), len(body), now, now),
+            )
+            self._db.commit()
+        self.evict()
+
+    def touch(self, url: str) -> None:
+        """Mark an entry as revalidated (304) and recently used"""
+        now = time.time()
+        with self._lock:
+            self._db.execute("UPDATE responses SET validated_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+            self._db.commit()
+
+    def to_response(self, entry: dict, url: str) -> requests.Response:
+        """Rebuild a requests.Response from a stored entry"""
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.headers = requests.structures.CaseInsensitiveDict(entry["headers"])
+        response.url = entry["final_url"] or url
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response._content = bytes(entry["body"])
+        response._content_consumed = True  # lets iter_content() replay the stored body
+        response.from_cache = True
+        return response
+
+    def expire(self) -> None:
+        """Drop entries that have not been revalidated within max_age"""
+        with self._lock:
+            self._db.execute("DELETE FROM responses WHERE validated_at < ?", (time.time() - self.max_age,))
+            self._db.commit()
+
+    def evict(self) -> None:
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        with self._lock:
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            for url, size in self._db.execute("SELECT url, size FROM responses ORDER BY accessed_at").fetchall():
+                self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+                total -= size
+                if total <= self.max_bytes:
+                    break
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class NegativeCache:
+    """
+    Persisted per-(domain, path) probe failures with a TTL.
+
+    Fresh entries let discovery skip patterns that were dead on a recent run
+    (404s, HTML soft pages, DNS / refused connections); stale ones are probed
+    again. Rate limiting, server errors (429 / 5xx), timeouts and dropped
+    connections are never recorded.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, ttl: float = NEGATIVE_TTL):
+        os.makedirs(directory, exist_ok=True)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, "negative.sqlite"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS failures (
+                domain TEXT,
+                path TEXT,
+                error TEXT,
+                recorded_at REAL,
+                PRIMARY KEY (domain, path)
+            )"""
+        )
+        self._db.execute("DELETE FROM failures WHERE recorded_at < ?", (time.time() - ttl,))
+        self._db.commit()
+
+    @staticmethod
+    def path_key(url: str) -> str:
+        """Path plus query string, matching how FEED_PATTERNS are written"""
+        parsed = urlparse(url)
+        return (parsed.path or "/") + (f"?{parsed.query}" if parsed.query else "")
+
+    @staticmethod
+    def is_cacheable_error(error: str) -> bool:
+        if error.startswith("HTTP "):
+            code = error[5:]
+            return not (code == "429" or code.startswith("5"))
+        return not any(marker in error for marker in TRANSIENT_ERROR_MARKERS)
+
+    def lookup(self, domain: str, url: str) -> Optional[str]:
+        """Return the recorded error if (domain, path) failed within the TTL"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT error, recorded_at FROM failures WHERE domain = ? AND path = ?",
+                (domain, self.path_key(url)),
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return row[0]
+
+    def record(self, domain: str, url: str, error: Optional[str]) -> None:
+        """Remember a failure, or forget the entry when the probe succeeded"""
+        with self._lock:
+            if error and self.is_cacheable_error(error):
+                self._db.execute(
+                    "INSERT OR REPLACE INTO failures VALUES (?, ?, ?, ?)",
+                    (domain, self.path_key(url), error, time.time()),
+                )
+            else:
+                self._db.execute(
+                    "DELETE FROM failures WHERE domain = ? AND path = ?", (domain, self.path_key(url))
+                )
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def detect_platform(response: requests.Response, prefix: bytes) -> str:
+    """Name the CMS behind a site from one response's headers and body prefix"""
+    headers = " ".join(response.headers.get(name, "") for name in PLATFORM_HEADERS).lower()
+    body = prefix.lower()
+    for platform, (header_re, body_re) in PLATFORM_SIGNATURES.items():
+        if re.search(header_re, headers) or re.search(body_re, body):
+            return platform
+    return UNKNOWN_PLATFORM
+
+
+class PatternStats:
+    """
+    Persisted probe / hit counts per (platform, FEED_PATTERN).
+
+    A hit is a pattern that turned out to be a listings feed. Patterns are
+    ordered by their smoothed hit rate on the domain's platform, falling back
+    towards the all-platform rate while a platform has few samples. With no
+    data every rate is equal and FEED_PATTERNS keeps its written order.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, "pattern_stats.sqlite"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS pattern_hits (
+                platform TEXT,
+                pattern TEXT,
+                probes INTEGER,
+                hits INTEGER,
+                PRIMARY KEY (platform, pattern)
+            )"""
+        )
+        self._db.commit()
+        self._counts: Dict[Tuple[str, str], List[int]] = {
+            (platform, pattern): [probes, hits]
+            for platform, pattern, probes, hits in self._db.execute("SELECT * FROM pattern_hits")
+        }
+        self._pending: Dict[Tuple[str, str], List[int]] = {}  # increments not yet written
+
+    def record(self, platform: str, pattern: str, hit: bool) -> None:
+        with self._lock:
+            for key in ((platform, pattern), (ALL_PLATFORMS, pattern)):
+                for counts in (self._counts, self._pending):
+                    entry = counts.setdefault(key, [0, 0])
+                    entry[0] += 1
+                    entry[1] += int(hit)
+
+    def expected_yield(self, platform: str, pattern: str) -> float:
+        probes, hits = self._counts.get((ALL_PLATFORMS, pattern), (0, 0))
+        overall = (hits + 1) / (probes + 2)
+        probes, hits = self._counts.get((platform, pattern), (0, 0))
+        return (hits + PATTERN_PRIOR_WEIGHT * overall) / (probes + PATTERN_PRIOR_WEIGHT)
+
+    def order(self, platform: str, patterns: List[str]) -> List[str]:
+        """Patterns by expected yield, highest first (stable, so ties keep their given order)"""
+        with self._lock:
+            return sorted(patterns, key=lambda pattern: -self.expected_yield(platform, pattern))
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            self._db.executemany(
+                """INSERT INTO pattern_hits VALUES (?, ?, ?, ?)
+                   ON CONFLICT (platform, pattern)
+                   DO UPDATE SET probes = probes + excluded.probes, hits = hits + excluded.hits""",
+                [(platform, pattern, probes, hits) for (platform, pattern), (probes, hits) in self._pending.items()],
+            )
+            self._db.commit()
+            self._pending.clear()
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            self._db.close()
+
+
+class DNSCache:
+    """Persisted getaddrinfo results; failures are kept for a shorter TTL than answers"""
+
+    def __init__(self, directory: str = CACHE_DIR, ttl: float = DNS_TTL, negative_ttl: float = DNS_NEGATIVE_TTL):
+        os.makedirs(directory, exist_ok=True)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, "dns.sqlite"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS lookups (
+                host TEXT PRIMARY KEY,
+                addresses TEXT,
+                error TEXT,
+                resolved_at REAL
+            )"""
+        )
+        self._db.commit()
+
+    def resolve(self, host: str) -> Tuple[List[str], Optional[str]]:
+        """Return (addresses, error) for a host, from the cache while fresh"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT addresses, error, resolved_at FROM lookups WHERE host = ?", (host,)
+            ).fetchone()
+        if row is not None:
+            addresses, error, resolved_at = json.loads(row[0]), row[1], row[2]
+            if time.time() - resolved_at < (self.negative_ttl if error else self.ttl):
+                return addresses, error
+        
+        addresses: List[str] = []
+        error = None
+        try:
+            for *_, sockaddr in socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP):
+                if sockaddr[0] not in addresses:
+                    addresses.append(sockaddr[0])
+        except (socket.gaierror, UnicodeError) as e:
+            error = f"DNS: {e}"
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO lookups VALUES (?, ?, ?, ?)",
+                (host, json.dumps(addresses), error, time.time()),
+            )
+            self._db.commit()
+        return addresses, error
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+@dataclass
+class PreflightResult:
+    """Whether a domain is worth probing, and the base URL to probe it at"""
+    domain: str
+    live: bool = False
+    base_url: Optional[str] = None  # canonical scheme://host after redirects
+    host: Optional[str] = None  # the host variant that accepted a connection
+    addresses: List[str] = field(default_factory=list)
+    platform: str = UNKNOWN_PLATFORM  # detected on the homepage when the preflight sniffs it
+    requests: int = 0  # HTTP requests made to the site, counted towards its request budget
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+
+class HostPreflight:
+    """
+    Concurrent DNS / TCP+TLS / redirect check run ahead of test_domain.
+
+    Each domain is resolved (through DNSCache) and connected to, falling back
+    to the www. variant when the bare host is dead. One GET on the live host
+    records where it redirects, and that canonical base URL is what the
+    patterns are probed against. Dead domains never reach test_domain.
+    With sniff_platform the start of the homepage is read as well, to detect
+    the site's platform before any pattern is ordered. The GET waits for the
+    host's rate limiter and is recorded in the metrics like any other request;
+    FeedDiscovery hands over its own limiter and metrics.
+    """
+
+    def __init__(self, dns: DNSCache, base_url_template: str = BASE_URL_TEMPLATE,
+                 workers: int = PREFLIGHT_WORKERS, timeout: float = PREFLIGHT_TIMEOUT,
+                 sniff_platform: bool = False, rate_limiter: Optional[HostRateLimiter] = None,
+                 metrics: Optional["DiscoveryMetrics"] = None):
+        self.dns = dns
+        self.base_url_template = base_url_template
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.sniff_platform = sniff_platform
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+        self._tls = ssl.create_default_context()
+
+    def _connect(self, host: str, port: int, secure: bool, addresses: List[str]) -> Optional[str]:
+        """Open (and close) one connection to the host; return the error if no address accepted it"""
+        error = None
+        for address in addresses[:2]:
+            try:
+                with socket.create_connection((address, port), timeout=self.timeout) as sock:
+                    if secure:
+                        with self._tls.wrap_socket(sock, server_hostname=host):
+                            pass
+                return None
+            except ssl.SSLError as e:
+                return f"TLS: {e.reason or e}"  # same certificate on every address
+            except OSError as e:
+                error = f"Connect: {e.strerror or e}"
+        return error
+
+    def check(self, domain: str) -> PreflightResult:
+        started = time.perf_counter()
+        result = PreflightResult(domain=domain)
+        hosts = [domain] if domain.startswith("www.") else [domain, f"www.{domain}"]
+        for host in hosts:
+            parsed = urlparse(self.base_url_template.format(domain=host))
+            secure = parsed.scheme == "https"
+            addresses, error = self.dns.resolve(parsed.hostname)
+            if not error:
+                error = self._connect(parsed.hostname, parsed.port or (443 if secure else 80), secure, addresses)
+            if error:
+                result.error = result.error or error  # report why the listed host itself is dead
+                continue
+            result.live = True
+            result.host = host
+            result.addresses = addresses
+            result.base_url = f"{parsed.scheme}://{parsed.netloc}"
+            result.error = None
+            break
+        
+        if result.live:
+            self._fetch_homepage(result)
+        result.seconds = time.perf_counter() - started
+        return result
+
+    def _fetch_homepage(self, result: PreflightResult) -> None:
+        """GET the live host's homepage to follow its redirects (and sniff its platform)"""
+        url = result.base_url + "/"
+        rate_wait = self.rate_limiter.acquire(urlparse(url).netloc.lower()) if self.rate_limiter else 0.0
+        result.requests += 1
+        _connect_clock.seconds = 0.0
+        status, error, prefix = None, None, b""
+        sent = time.perf_counter()
+        headers_at = None
+        try:
+            with requests.Session() as session:
+                session.headers.update({"User-Agent": USER_AGENT})
+                if self.metrics:
+                    adapter = TimedHTTPAdapter()
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                with session.get(url, stream=True, timeout=self.timeout, allow_redirects=True) as response:
+                    headers_at = time.perf_counter()
+                    status = response.status_code
+                    final = urlparse(response.url)
+                    result.base_url = f"{final.scheme}://{final.netloc}"
+                    if self.sniff_platform and response.status_code == 200:
+                        reader = BoundedBodyReader(response.iter_content(STREAM_CHUNK_SIZE), PLATFORM_SNIFF_BYTES)
+                        prefix = reader.peek(PLATFORM_SNIFF_BYTES)
+                        result.platform = detect_platform(response, prefix)
+        except requests.exceptions.RequestException as e:
+            error = str(e)  # the host accepts connections; keep probing it at the address we reached
+        if self.metrics:
+            finished = time.perf_counter()
+            ttfb = (headers_at or finished) - sent
+            self.metrics.record(RequestRecord(
+                url=url, domain=result.domain, phase="preflight", status=status, error=error,
+                bytes=len(prefix), rate_wait=rate_wait, connect=_connect_clock.seconds, ttfb=ttfb,
+                download=finished - sent - ttfb, total=finished - sent, parse=0.0, classify=0.0,
+                from_cache=False,
+            ))
+
+    def run(self, domains: Iterable[str], skip: Callable[[str], bool] = lambda domain: False
+            ) -> Iterator[Tuple[str, Optional[PreflightResult]]]:
+        """
+        Check domains concurrently, yielding (domain, result) in input order.
+        At most `workers` * DOMAIN_QUEUE_FACTOR domains are read ahead; skipped
+        domains (e.g. already in the checkpoint) are passed through with None.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            window: deque = deque()
+            for domain in domains:
+                window.append((domain, None if skip(domain) else executor.submit(self.check, domain)))
+                if len(window) >= self.workers * DOMAIN_QUEUE_FACTOR:
+                    domain, future = window.popleft()
+                    yield domain, future.result() if future else None
+            while window:
+                domain, future = window.popleft()
+                yield domain, future.result() if future else None
+
+
+def iter_domains(source: str) -> Iterator[str]:
+    """Yield domains from a file ("-" for stdin), one per line, without loading the whole list"""
+    stream = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    seen: Set[str] = set()
+    try:
+        for line in stream:
+            domain = line.split("#", 1)[0].strip().lower()
+            if "://" in domain:
+                domain = urlparse(domain).netloc
+            domain = domain.rstrip("/")
+            if domain and domain not in seen:
+                seen.add(domain)
+                yield domain
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse "i/n" (0 <= i < n) for argparse"""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/n, got {value!r}")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must satisfy 0 <= i < n, got {value!r}")
+    return index, count
+
+
+def shard_of(domain: str, count: int) -> int:
+    """Stable shard for a domain; identical on every machine and Python process"""
+    digest = hashlib.sha1(domain.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+def shard_domains(domains: Iterable[str], index: int, count: int) -> Iterator[str]:
+    return (domain for domain in domains if shard_of(domain, count) == index)
+
+
+class DiscoveryCheckpoint:
+    """
+    Completed domains and their results, committed as each domain finishes.
+
+    A restarted run skips domains already recorded here and reports their
+    stored results, so a crash only loses the domains that were in flight.
+    Domains that raised are not recorded and are retried on the next run.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS domains (
+                domain TEXT PRIMARY KEY,
+                results TEXT,
+                finished_at REAL
+            )"""
+        )
+        self._db.commit()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM domains").fetchone()[0]
+
+    def results(self, domain: str) -> Optional[List[FeedCandidate]]:
+        """Stored results for a completed domain, or None if it still has to be tested"""
+        row = self._db.execute("SELECT results FROM domains WHERE domain = ?", (domain,)).fetchone()
+        if row is None:
+            return None
+        return [FeedCandidate(**data) for data in json.loads(row[0])]
+
+    def record(self, domain: str, results: List[FeedCandidate]) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO domains VALUES (?, ?, ?)",
+            (domain, json.dumps([asdict(r) for r in results]), time.time()),
+        )
+        self._db.commit()
+
+    def clear(self) -> None:
+        self._db.execute("DELETE FROM domains")
+        self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def result_record(result: FeedCandidate) -> dict:
+    """The exported form of a candidate (one JSONL line / one entry of the JSON report)"""
+    return {
+        "url": result.url,
+        "domain": result.domain,
+        "feed_type": result.feed_type,
+        "confidence_score": result.confidence_score,
+        "status_code": result.status_code,
+        "root_tag": result.root_tag,
+        "listing_count": result.listing_count,
+        "sample_fields": result.sample_fields,
+        "error": result.error,
+        "bytes_read": result.bytes_read,
+        "timings": {k: round(v, 4) for k, v in result.timings.items()},
+        "fetch": result.fetch,
+    }
+
+
+class JsonlResultWriter:
+    """
+    Appends each validated candidate to a JSON lines file as it is found.
+
+    The file is flushed every `flush_every` records or `flush_interval`
+    seconds, whichever comes first, so progress is visible (and survives a
+    crash) while the run is going. Safe to call from the worker threads.
+    Lines land in completion order, so each carries an "order" key (input
+    domain index, position within the domain) for sort_results_jsonl.
+    """
+
+    def __init__(self, path: str, flush_every: int = RESULTS_FLUSH_EVERY,
+                 flush_interval: float = RESULTS_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval
+        self.count = 0
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, result: FeedCandidate, order: Tuple[int, int] = (0, 0)) -> None:
+        record = result_record(result)
+        record["order"] = list(order)
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self.count += 1
+            self._pending += 1
+            self._maybe_flush()
+
+    def maybe_flush(self) -> None:
+        """Flush if the interval has passed (called between records, e.g. when a domain finishes)"""
+        with self._lock:
+            self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        if self._pending and (self._pending >= self.flush_every
+                              or time.monotonic() - self._last_flush >= self.flush_interval):
+            self._file.flush()
+            self._pending = 0
+            self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def _read_records(lines: Iterable[str]) -> Iterator[dict]:
+    """Parse JSON lines, skipping blanks and the torn last line a crash can leave behind"""
+    for line in lines:
+        try:
+            yield json.loads(line)
+        except ValueError:
+            continue
+
+
+def _by_confidence(record: dict) -> Tuple[int, List[int]]:
+    return -record["confidence_score"], record.get("order", [0, 0])
+
+
+def sort_results_jsonl(source: str, destination: str, run_records: int = SORT_RUN_RECORDS) -> int:
+    """
+    External merge sort of a results JSONL file by confidence (highest first).
+
+    Runs of `run_records` are sorted in memory and spilled to temporary files,
+    then merged. Ties are broken by the "order" key, so the result is the same
+    as sorted() over the results in input-domain order however the worker
+    threads interleaved; the key is dropped from the output. Returns the
+    number of records written.
+    """
+    runs = []
+    count = 0
+    try:
+        with open(source, encoding="utf-8") as f:
+            records = _read_records(f)
+            while True:
+                chunk = list(itertools.islice(records, run_records))
+                if not chunk:
+                    break
+                chunk.sort(key=_by_confidence)
+                run = tempfile.TemporaryFile("w+", encoding="utf-8", dir=os.path.dirname(destination) or ".")
+                run.writelines(json.dumps(record) + "\n" for record in chunk)
+                run.seek(0)
+                runs.append(run)
+        with open(destination, "w", encoding="utf-8") as out:
+            for record in heapq.merge(*(_read_records(run) for run in runs), key=_by_confidence):
+                record.pop("order", None)
+                out.write(json.dumps(record) + "\n")
+                count += 1
+    finally:
+        for run in runs:
+            run.close()
+    return count
+
+
+def print_report(records: Iterable[dict], domains_tested: int) -> Dict[str, int]:
+    """Print the discovery report from result records sorted by confidence (highest first)"""
+    print("\n" + "=" * 80)
+    print("📊 DISCOVERY REPORT")
+    print("=" * 80)
+    
+    # Listings feeds are printed as they stream past; the other groups only show their first 5
+    totals = {"results": 0, "listings": 0, "high_confidence": 0, "sitemaps": 0, "other": 0}
+    sitemaps: List[dict] = []
+    other_xml: List[dict] = []
+    
+    print(f"\n✅ CONFIRMED LISTINGS FEEDS:")
+    print("-" * 80)
+    for result in records:
+        totals["results"] += 1
+        if "Listings" in result["feed_type"]:
+            totals["listings"] += 1
+            if result["confidence_score"] >= 70:
+                totals["high_confidence"] += 1
+            print(f"\n{totals['listings']}. {result['domain']}")
+            print(f"   URL: {result['url']}")
+            print(f"   Type: {result['feed_type']}")
+            print(f"   Confidence: {result['confidence_score']}/100")
+            print(f"   Status: {result['status_code']}")
+            print(f"   Root tag: <{result['root_tag']}>")
+            print(f"   Listing nodes: {result['listing_count']}")
+            print(f"   Sample fields: {', '.join(result['sample_fields'][:5])}")
+        elif "Sitemap" in result["feed_type"]:
+            totals["sitemaps"] += 1
+            if len(sitemaps) < 5:
+                sitemaps.append(result)
+        else:
+            totals["other"] += 1
+            if len(other_xml) < 5:
+                other_xml.append(result)
+    
+    if not totals["listings"]:
+        print("   No confirmed listings feeds found.")
+    else:
+        print(f"\n   Total: {totals['listings']}")
+    
+    print(f"\n📄 SITEMAPS FOUND: {totals['sitemaps']}")
+    print("-" * 80)
+    for result in sitemaps:
+        print(f"   • {result['url']} (score: {result['confidence_score']})")
+    
+    print(f"\n❓ OTHER XML FOUND: {totals['other']}")
+    print("-" * 80)
+    for result in other_xml:
+        print(f"   • {result['url']} - {result['feed_type']} (score: {result['confidence_score']})")
+    
+    print("\n" + "=" * 80)
+    print(f"📈 SUMMARY")
+    print("=" * 80)
+    print(f"Total domains tested: {domains_tested}")
+    print(f"Total XML endpoints found: {totals['results']}")
+    print(f"Confirmed listings feeds: {totals['listings']}")
+    print(f"High-confidence feeds (≥70): {totals['high_confidence']}")
+    print("=" * 80)
+    return totals
+
+
+def write_results_json(records: Iterable[dict], count: int, domains_tested: int,
+                       filename: str = RESULTS_JSON) -> None:
+    """Write the JSON report one record at a time (same layout as json.dump(..., indent=2))"""
+    header = {
+        "discovery_timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "domains_tested": domains_tested,
+        "total_feeds_found": count,
+    }
+    with open(filename, "w") as f:
+        f.write("{\n")
+        for key, value in header.items():
+            f.write(f"  {json.dumps(key)}: {json.dumps(value)},\n")
+        f.write('  "results": [')
+        written = 0
+        for record in records:
+            f.write(",\n" if written else "\n")
+            f.write(textwrap.indent(json.dumps(record, indent=2), "    "))
+            written += 1
+        f.write("\n  ]\n}" if written else "]\n}")
+    
+    print(f"\n💾 Results exported to: {filename}")
+
+
+# ---------------------------------------------------------------------------
+# Instrumentation (enabled with --metrics-jsonl / --metrics-prom)
+# ---------------------------------------------------------------------------
+
+_connect_clock = threading.local()  # seconds spent in connect() (DNS + TCP + TLS) on this thread
+
+
+class _TimedConnectMixin:
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _connect_clock.seconds = getattr(_connect_clock, "seconds", 0.0) + time.perf_counter() - started
+
+
+class _TimedHTTPConnection(_TimedConnectMixin, urllib3.connection.HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectMixin, urllib3.connection.HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(urllib3.connectionpool.HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(urllib3.connectionpool.HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(requests.adapters.HTTPAdapter):
+    """HTTPAdapter whose connections report how long connect() took"""
+
+    _pool_classes = {"http": _TimedHTTPConnectionPool, "https": _TimedHTTPSConnectionPool}
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = dict(self._pool_classes)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        manager.pool_classes_by_scheme = dict(self._pool_classes)
+        return manager
+
+
+@dataclass
+class FetchTiming:
+    """Network timings of the last fetch_url call on a thread"""
+    started: float
+    rate_wait: float = 0.0
+    connect: float = 0.0
+    ttfb: float = 0.0  # request sent -> response headers, including connect and redirects
+    download: float = 0.0  # response headers -> body read, when requests read it (stream=False)
+    from_cache: bool = False
+
+
+@dataclass
+class RequestRecord:
+    """One instrumented request"""
+    url: str
+    domain: str
+    phase: str  # "preflight", "soft_404", "pattern", "sitemap", "pivot"
+    status: Optional[int]
+    error: Optional[str]
+    bytes: int
+    rate_wait: float
+    connect: float
+    ttfb: float
+    download: float
+    total: float  # request start -> body consumed and classified
+    parse: float
+    classify: float
+    from_cache: bool
+
+
+class DiscoveryMetrics:
+    """
+    Collects per-request records plus per-domain and per-phase aggregates.
+
+    Records are streamed to a JSON lines file as they arrive (if a path is
+    given); only the aggregates are kept in memory. Nothing in FeedDiscovery
+    touches this class when metrics are disabled.
+    """
+
+    DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    SUMMED = ("bytes", "rate_wait", "connect", "ttfb", "download", "total", "parse", "classify")
+
+    def __init__(self, jsonl_path: Optional[str] = None):
+        self._lock = threading.Lock()
+        self._jsonl = open(jsonl_path, "w") if jsonl_path else None
+        self.by_domain: Dict[str, dict] = {}
+        self.by_phase: Dict[str, dict] = {}
+        self.domain_seconds: Dict[str, float] = {}
+
+    def _new_aggregate(self) -> dict:
+        aggregate = {"requests": 0, "errors": 0, "cache_hits": 0, "buckets": [0] * len(self.DURATION_BUCKETS)}
+        aggregate.update({key: 0 if key == "bytes" else 0.0 for key in self.SUMMED})
+        return aggregate
+
+    def _add(self, aggregate: dict, record: RequestRecord) -> None:
+        aggregate["requests"] += 1
+        aggregate["errors"] += 1 if record.error else 0
+        aggregate["cache_hits"] += 1 if record.from_cache else 0
+        for key in self.SUMMED:
+            aggregate[key] += getattr(record, key)
+        for i, bound in enumerate(self.DURATION_BUCKETS):
+            if record.total <= bound:
+                aggregate["buckets"][i] += 1
+
+    def record(self, record: RequestRecord) -> None:
+        with self._lock:
+            self._add(self.by_domain.setdefault(record.domain, self._new_aggregate()), record)
+            self._add(self.by_phase.setdefault(record.phase, self._new_aggregate()), record)
+            if self._jsonl:
+                self._jsonl.write(json.dumps({"type": "request", **asdict(record)}) + "\n")
+
+    def domain_finished(self, domain: str, seconds: float) -> None:
+        with self._lock:
+            self.domain_seconds[domain] = seconds
+
+    def close(self) -> None:
+        """Append the aggregates to the JSON lines file and close it"""
+        with self._lock:
+            if not self._jsonl:
+                return
+            for domain, aggregate in sorted(self.by_domain.items()):
+                self._jsonl.write(json.dumps({
+                    "type": "domain", "domain": domain,
+                    "wall_seconds": self.domain_seconds.get(domain), **aggregate,
+                }) + "\n")
+            for phase, aggregate in sorted(self.by_phase.items()):
+                self._jsonl.write(json.dumps({"type": "phase", "phase": phase, **aggregate}) + "\n")
+            self._jsonl.close()
+            self._jsonl = None
+
+    @staticmethod
+    def _label(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    def write_prometheus(self, path: str) -> None:
+        """Write the aggregates in Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, scope, groups in (("phase", "phase", self.by_phase), ("domain", "domain", self.by_domain)):
+                prefix = f"estio_feed_discovery_{name}"
+                lines.append(f"# TYPE {prefix}_requests_total counter")
+                for key, agg in sorted(groups.items()):
+                    lines.append(f'{prefix}_requests_total{{{scope}="{self._label(key)}"}} {agg["requests"]}')
+                lines.append(f"# TYPE {prefix}_errors_total counter")
+                for key, agg in sorted(groups.items()):
+                    lines.append(f'{prefix}_errors_total{{{scope}="{self._label(key)}"}} {agg["errors"]}')
+                lines.append(f"# TYPE {prefix}_bytes_total counter")
+                for key, agg in sorted(groups.items()):
+                    lines.append(f'{prefix}_bytes_total{{{scope}="{self._label(key)}"}} {int(agg["bytes"])}')
+                lines.append(f"# TYPE {prefix}_seconds_total counter")
+                for key, agg in sorted(groups.items()):
+                    for stage in ("rate_wait", "connect", "ttfb", "download", "total", "parse", "classify"):
+                        lines.append(
+                            f'{prefix}_seconds_total{{{scope}="{self._label(key)}",stage="{stage}"}} {agg[stage]:.6f}'
+                        )
+
+            lines.append("# TYPE estio_feed_discovery_request_duration_seconds histogram")
+            for phase, agg in sorted(self.by_phase.items()):
+                label = self._label(phase)
+                for bound, count in zip(self.DURATION_BUCKETS, agg["buckets"]):
+                    lines.append(f'estio_feed_discovery_request_duration_seconds_bucket{{phase="{label}",le="{bound}"}} {count}')
+                lines.append(f'estio_feed_discovery_request_duration_seconds_bucket{{phase="{label}",le="+Inf"}} {agg["requests"]}')
+                lines.append(f'estio_feed_discovery_request_duration_seconds_sum{{phase="{label}"}} {agg["total"]:.6f}')
+                lines.append(f'estio_feed_discovery_request_duration_seconds_count{{phase="{label}"}} {agg["requests"]}')
+
+            lines.append("# TYPE estio_feed_discovery_domain_wall_seconds gauge")
+            for domain, seconds in sorted(self.domain_seconds.items()):
+                lines.append(f'estio_feed_discovery_domain_wall_seconds{{domain="{self._label(domain)}"}} {seconds:.6f}')
+
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def print_summary(self) -> None:
+        print(f"\n📐 PHASE TIMINGS")
+        print("-" * 80)
+        for phase, agg in sorted(self.by_phase.items()):
+            requests_count = agg["requests"] or 1
+            print(f"   {phase:<10} {agg['requests']:>5} req  {agg['errors']:>4} err  "
+                  f"{agg['bytes'] / 1024:>9.0f} KB  avg total {agg['total'] / requests_count * 1000:>7.0f} ms  "
+                  f"(connect {agg['connect'] / requests_count * 1000:.0f}, ttfb {agg['ttfb'] / requests_count * 1000:.0f}, "
+                  f"download {agg['download'] / requests_count * 1000:.0f}, "
+                  f"parse {agg['parse'] / requests_count * 1000:.0f} ms)")
+        slowest = sorted(self.domain_seconds.items(), key=lambda item: item[1], reverse=True)[:5]
+        if slowest:
+            print("   Slowest domains: " + ", ".join(f"{domain} ({seconds:.1f}s)" for domain, seconds in slowest))
+
+
+def classify_analysis(analysis: XMLAnalysis, url: str) -> Tuple[str, int]:
+    """
+    Classify a feed from its XMLAnalysis and assign a confidence score
+    Returns: (feed_type, confidence_score)
+    """
+    root_tag = analysis.root_tag.lower()
+    listing_count = analysis.listing_count
+    sample_fields = analysis.sample_fields()
+    
+    # Check for sitemap
+    if root_tag in ['urlset', 'sitemapindex'] or 'sitemap' in url.lower():
+        # Check if sitemap contains property data (rare but possible)
+        if len(sample_fields) >= 2 and listing_count > 0:
+            return "Sitemap with property data", 60
+        return "Sitemap", 20
+    
+    # Check for RSS/blog feed
+    if root_tag in ['rss', 'feed'] and 'blog' in url.lower():
+        return "Blog RSS", 10
+    
+    # Check for property listings feed
+    if listing_count >= 3 and len(sample_fields) >= 2:
+        # High confidence - has listing nodes and property fields
+        confidence = min(100, 70 + (listing_count * 2) + (len(sample_fields) * 3))
+        return "Listings XML feed", confidence
+    elif listing_count >= 1 and len(sample_fields) >= 1:
+        # Medium confidence
+        return "Possible listings feed", 50
+    elif len(sample_fields) >= 3:
+        # Has property fields but no clear listing structure
+        return "Property data XML", 40
+    
+    return "Unknown XML", 20
+
+
+def analyze_feed_body(body: bytes, url: str) -> Dict[str, object]:
+    """
+    Parse and classify a fetched body (runs in a parse worker process).
+
+    Only the small FeedCandidate summary fields are returned, never the tree.
+    """
+    started = time.perf_counter()
+    try:
+        root = ET.fromstring(body)
+    except ET.ParseError:
+        return {"error": "Invalid XML", "timings": {"parse": time.perf_counter() - started}}
+    analysis = XMLAnalyzer().feed_tree(root)
+    del root
+    classified = time.perf_counter()
+    feed_type, confidence_score = classify_analysis(analysis, url)
+    return {
+        "is_valid_xml": True,
+        "root_tag": analysis.root_tag,
+        "listing_count": analysis.listing_count,
+        "sample_fields": analysis.sample_fields(),
+        "feed_type": feed_type,
+        "confidence_score": confidence_score,
+        "timings": {"parse": classified - started, "classify": time.perf_counter() - classified},
+    }
 
 
 class FeedDiscovery:
     """Main feed discovery engine"""
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({"User-Agent": USER_AGENT})
+    def __init__(self, max_workers: int = MAX_WORKERS, streaming: bool = False,
+                 max_probe_bytes: int = MAX_PROBE_BYTES, cache: Optional[ResponseCache] = None,
+                 negative_cache: Optional[NegativeCache] = None, force_rescan: bool = False,
+                 sitemap_max_depth: int = SITEMAP_MAX_DEPTH, sitemap_max_files: int = SITEMAP_MAX_FILES,
+                 soft_404_check: bool = True, rate_limit_delay: float = RATE_LIMIT_DELAY,
+                 base_url_template: str = BASE_URL_TEMPLATE, metrics: Optional[DiscoveryMetrics] = None,
+                 parse_processes: int = 0, results_writer: Optional[JsonlResultWriter] = None,
+                 pattern_stats: Optional[PatternStats] = None, domain_budget: int = 0,
+                 preflight: Optional[HostPreflight] = None, adaptive_timeouts: bool = True,
+                 max_retries: int = FETCH_RETRIES, retry_budget: int = DOMAIN_RETRY_BUDGET, hedge: bool = False):
+        self.max_workers = max_workers
+        self.streaming = streaming
+        self.max_probe_bytes = max_probe_bytes
+        self.cache = cache
+        self.negative_cache = negative_cache
+        self.force_rescan = force_rescan
+        self.sitemap_max_depth = sitemap_max_depth
+        self.sitemap_max_files = sitemap_max_files
+        self.soft_404_check = soft_404_check
+        self.soft_404: Dict[str, SoftNotFoundFingerprint] = {}  # domain -> catch-all page fingerprint
+        self._seen_urls: Set[str] = set()
+        self._seen_lock = threading.Lock()
+        self.rate_limiter = HostRateLimiter(rate=1.0 / rate_limit_delay if rate_limit_delay > 0 else 0)
+        self.base_url_template = base_url_template
+        self.metrics = metrics
+        self.parse_processes = parse_processes
+        self.parse_pool: Optional[ProcessPoolExecutor] = None  # live during run_discovery
+        self._local = threading.local()
+        self.results_writer = results_writer  # when set, results are streamed out instead of kept
+        self.pattern_stats = pattern_stats  # when set, FEED_PATTERNS are tried in learned order
+        self.domain_budget = domain_budget  # max requests per domain, 0 for no limit
+        self.preflight = preflight  # when set, dead domains are dropped before probing
+        if preflight is not None:
+            # Its homepage GET is a request to the site like any other
+            preflight.rate_limiter = self.rate_limiter
+            preflight.metrics = metrics
+        self.dead_domains: List[PreflightResult] = []
+        self.latency = HostLatency() if adaptive_timeouts or hedge else None
+        self.adaptive_timeouts = adaptive_timeouts
+        self.max_retries = max_retries
+        self.retry_budget = retry_budget
+        self.hedge = hedge
+        # Hedged requests and their primaries run here so the caller can wait on both
+        self._hedge_pool: Optional[ThreadPoolExecutor] = None  # live during run_discovery
+        self.platforms: Dict[str, str] = {}  # domain -> platform seen on its first responses
+        self.requests_to_feed: List[int] = []  # per domain: requests made until its first listings feed
+        self._requests_lock = threading.Lock()
         self.results: List[FeedCandidate] = []
+        self.domains_tested = 0
+
+    @property
+    def session(self) -> requests.Session:
+        """requests.Session is not thread-safe, so each worker thread gets its own"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._build_session()
+            self._local.session = session
+        return session
+
+    def _build_session(self) -> requests.Session:
+        """Create a configured HTTP session for one worker thread"""
+        session = requests.Session()
+        session.headers.update({"User-Agent": USER_AGENT})
+        if self.metrics:
+            adapter = TimedHTTPAdapter()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        return session
+        
+    def fetch_url(self, url: str, stream: bool = False) -> Tuple[Optional[requests.Response], Optional[str]]:
+        """
+        Fetch a URL and return response or error (with stream=True the caller must close it).
+
+        The timeout follows the host's recent latency, transient failures are
+        retried with jittered backoff while the domain's retry budget lasts, and
+        with hedging on a slow request gets a duplicate. Counters for the call
+        are left in self._local.fetch_stats.
+        """
+        cached = self.cache.get(url) if self.cache else None
+        headers = self.cache.conditional_headers(cached) if cached else None
+        host = urlparse(url).netloc.lower()
+        stats = self._local.fetch_stats = {"attempts": 0, "retries": 0, "hedged": 0}
+        
+        timing = None
+        if self.metrics:
+            timing = self._local.fetch_timing = FetchTiming(started=time.perf_counter())
+            _connect_clock.seconds = 0.0
+        attempt = 0
+        while True:
+            self._local.requests = getattr(self._local, "requests", 0) + 1
+            rate_wait = self.rate_limiter.acquire(host)
+            timeout = self.latency.timeout(host, attempt) if self.adaptive_timeouts else REQUEST_TIMEOUT
+            stats["attempts"] += 1
+            stats["timeout"] = round(timeout, 2)
+            if timing:
+                timing.rate_wait += rate_wait
+                sent = time.perf_counter()
+                if attempt == 0:
+                    timing.started = sent
+            response, error = None, None
+            try:
+                response = self._get(url, host, timeout, stream=stream, headers=headers)
+            except requests.exceptions.RequestException as e:
+                error = e
+            if self.latency is not None:
+                if response is not None:
+                    self.latency.record(host, response.elapsed.total_seconds())
+                elif isinstance(error, requests.exceptions.Timeout):
+                    self.latency.record(host, timeout)  # a lower bound, but it pulls the p95 up
+            
+            transient = is_transient_error(error) if error is not None else response.status_code in RETRYABLE_STATUS
+            if not transient or attempt >= self.max_retries or not self._take_retry():
+                break
+            if response is not None:
+                response.close()
+            attempt += 1
+            stats["retries"] += 1
+            time.sleep(random.uniform(0, RETRY_BACKOFF * 2 ** (attempt - 1)))
+        
+        if timing:
+            returned = time.perf_counter() - sent
+            if response is not None:
+                # requests stamps elapsed once the headers are parsed; with stream=False the
+                # body has been downloaded by the time get() returns, so that is not the TTFB
+                timing.ttfb = min(returned, sum(r.elapsed.total_seconds() for r in response.history + [response]))
+                timing.download = returned - timing.ttfb
+            else:
+                timing.ttfb = returned
+            timing.connect = _connect_clock.seconds
+        if error is not None:
+            return None, str(error)
+        
+        if cached and response.status_code == 304:
+            response.close()
+            self.cache.touch(url)
+            if timing:
+                timing.from_cache = True
+            return self.cache.to_response(cached, url), None
+        
+        # Streamed bodies are stored by validate_stream once fully read
+        if self.cache and not stream and self.cache.is_cacheable(response):
+            self.cache.store(url, response, response.content)
+        return response, None
+    
+    def _take_retry(self) -> bool:
+        """Spend one unit of this domain's retry budget (retries and hedges share it)"""
+        left = getattr(self._local, "retries_left", self.retry_budget)
+        if left <= 0:
+            return False
+        self._local.retries_left = left - 1
+        return True
+    
+    def _get(self, url: str, host: str, timeout: float, **kwargs) -> requests.Response:
+        """One attempt; hedged with a second identical request if it outlives the host's p90"""
+        delay = self.latency.hedge_delay(host) if self._hedge_pool is not None else None
+        if delay is None:
+            return self.session.get(url, timeout=timeout, allow_redirects=True, **kwargs)
+        
+        def send() -> Tuple[requests.Response, float]:
+            # self.session is per thread, so each request of the pair gets its own connection;
+            # connect() time is clocked on the pool thread and handed back with the response
+            _connect_clock.seconds = 0.0
+            response = self.session.get(url, timeout=timeout, allow_redirects=True, **kwargs)
+            return response, _connect_clock.seconds
         
-    def fetch_url(self, url: str) -> Tuple[Optional[requests.Response], Optional[str]]:
-        """Fetch a URL and return response or error"""
+        first = self._hedge_pool.submit(send)
         try:
-            response = self.session.get(url, timeout=REQUEST_TIMEOUT, allow_redirects=True)
-            time.sleep(RATE_LIMIT_DELAY)
-            return response, None
-        except requests.exceptions.RequestException as e:
-            return None, str(e)
+            return self._take_hedge_result(first, timeout=delay)
+        except FutureTimeout:
+            pass
+        if not self._take_retry():
+            return self._take_hedge_result(first)
+        # The duplicate is a request like any other: it waits for a rate token and counts
+        # towards the domain's request budget
+        self._local.requests = getattr(self._local, "requests", 0) + 1
+        rate_wait = self.rate_limiter.acquire(host)
+        timing: Optional[FetchTiming] = getattr(self._local, "fetch_timing", None) if self.metrics else None
+        if timing:
+            timing.rate_wait += rate_wait
+        stats = self._local.fetch_stats
+        stats["hedged"] += 1
+        second = self._hedge_pool.submit(send)
+        racing = [first, second]
+        while True:
+            done, _ = wait(racing, return_when=FIRST_COMPLETED)
+            for future in done:
+                racing.remove(future)
+                if future.exception() is None or not racing:
+                    for loser in racing:
+                        loser.add_done_callback(_close_response)
+                    if future is second:
+                        stats["hedge_won"] = 1
+                    return self._take_hedge_result(future)
     
-    def parse_xml(self, content: str) -> Optional[ET.Element]:
+    def _take_hedge_result(self, future, timeout: Optional[float] = None) -> requests.Response:
+        """Response of a request run on the hedge pool, crediting its connect time to this thread"""
+        response, connect = future.result(timeout=timeout)
+        _connect_clock.seconds = getattr(_connect_clock, "seconds", 0.0) + connect
+        return response
+    
+    def parse_xml(self, content: bytes) -> Optional[ET.Element]:
         """Parse XML content and return root element"""
         try:
             return ET.fromstring(content)
@@ -159,40 +1782,20 @@ class FeedDiscovery:
         property_tags = [tag for tag in all_tags if any(field in tag for field in PROPERTY_FIELDS)]
         return sorted(list(set(property_tags)))[:limit]
     
+    def analyze_xml(self, root: ET.Element) -> XMLAnalysis:
+        """Collect tags, listing count and property fields in one walk over the tree"""
+        return XMLAnalyzer().feed_tree(root)
+    
     def classify_feed(self, root: ET.Element, url: str) -> Tuple[str, int]:
         """
         Classify the XML feed type and assign confidence score
         Returns: (feed_type, confidence_score)
         """
-        root_tag = root.tag.split('}')[-1].lower() if '}' in root.tag else root.tag.lower()
-        all_tags = self.extract_all_tags(root)
-        listing_count = self.count_listing_nodes(root)
-        sample_fields = self.extract_sample_fields(root)
-        
-        # Check for sitemap
-        if root_tag in ['urlset', 'sitemapindex'] or 'sitemap' in url.lower():
-            # Check if sitemap contains property data (rare but possible)
-            if len(sample_fields) >= 2 and listing_count > 0:
-                return "Sitemap with property data", 60
-            return "Sitemap", 20
-        
-        # Check for RSS/blog feed
-        if root_tag in ['rss', 'feed'] and 'blog' in url.lower():
-            return "Blog RSS", 10
-        
-        # Check for property listings feed
-        if listing_count >= 3 and len(sample_fields) >= 2:
-            # High confidence - has listing nodes and property fields
-            confidence = min(100, 70 + (listing_count * 2) + (len(sample_fields) * 3))
-            return "Listings XML feed", confidence
-        elif listing_count >= 1 and len(sample_fields) >= 1:
-            # Medium confidence
-            return "Possible listings feed", 50
-        elif len(sample_fields) >= 3:
-            # Has property fields but no clear listing structure
-            return "Property data XML", 40
-        
-        return "Unknown XML", 20
+        return self.classify_analysis(self.analyze_xml(root), url)
+    
+    def classify_analysis(self, analysis: XMLAnalysis, url: str) -> Tuple[str, int]:
+        """Classify from a precomputed XMLAnalysis (see classify_feed)"""
+        return classify_analysis(analysis, url)
     
     def validate_candidate(self, candidate: FeedCandidate, response: requests.Response) -> None:
         """Validate and classify a feed candidate"""
@@ -205,208 +1808,758 @@ class FeedDiscovery:
             return
         
         # Parse XML
-        root = self.parse_xml(response.text)
+        candidate.bytes_read = len(response.content)
+        self.note_platform(candidate.domain, response, response.content[:PLATFORM_SNIFF_BYTES])
+        if self.parse_pool is not None and candidate.bytes_read >= PARSE_POOL_MIN_BYTES:
+            try:
+                summary = self.parse_pool.submit(analyze_feed_body, response.content, candidate.url).result()
+            except BrokenProcessPool:
+                summary = None  # a worker died (e.g. out of memory); parse in this thread instead
+            if summary is not None:
+                candidate.timings.update(summary.pop("timings"))
+                for key, value in summary.items():
+                    setattr(candidate, key, value)
+                return
+        started = time.perf_counter()
+        # The raw bytes, as in the parse workers: the parser honours the XML declaration's
+        # encoding instead of the charset requests guessed from the headers
+        root = self.parse_xml(response.content)
         if root is None:
+            candidate.timings["parse"] = time.perf_counter() - started
             candidate.error = "Invalid XML"
             return
         
+        analysis = self.analyze_xml(root)
+        classified = time.perf_counter()
+        candidate.timings["parse"] = classified - started
         candidate.is_valid_xml = True
-        candidate.root_tag = root.tag.split('}')[-1] if '}' in root.tag else root.tag
-        candidate.listing_count = self.count_listing_nodes(root)
-        candidate.sample_fields = self.extract_sample_fields(root)
-        candidate.feed_type, candidate.confidence_score = self.classify_feed(root, candidate.url)
-    
-    def discover_from_sitemap(self, sitemap_url: str, domain: str) -> List[str]:
-        """Extract potential feed URLs from sitemap"""
-        response, error = self.fetch_url(sitemap_url)
-        if error or not response or response.status_code != 200:
-            return []
-        
-        root = self.parse_xml(response.text)
-        if root is None:
-            return []
-        
-        feed_urls = []
-        # Look for <loc> tags containing feed-like patterns
-        for loc in root.findall('.//{*}loc'):
-            url = loc.text
-            if url and any(pattern in url.lower() for pattern in ['feed', 'export', 'api', 'xml', 'properties', 'listings']):
-                if url.endswith('.xml') or '/feed' in url or '/api' in url:
+        candidate.root_tag = analysis.root_tag
+        candidate.listing_count = analysis.listing_count
+        candidate.sample_fields = analysis.sample_fields()
+        candidate.feed_type, candidate.confidence_score = self.classify_analysis(analysis, candidate.url)
+        candidate.timings["classify"] = time.perf_counter() - classified
+    
+    def classification_decided(self, analysis: XMLAnalysis, url: str) -> bool:
+        """True once more of the document can no longer change the classification"""
+        feed_type, score = self.classify_analysis(analysis, url)
+        if feed_type == "Blog RSS":
+            return True
+        if feed_type.startswith("Sitemap"):
+            return score >= 60
+        # All other scores only grow with more listing nodes / fields
+        return score >= 100
+    
+    def validate_stream(self, candidate: FeedCandidate, response: requests.Response,
+                        max_bytes: Optional[int] = None,
+                        on_end: Optional[Callable[[str, ET.Element, str], None]] = None) -> None:
+        """
+        Streaming variant of validate_candidate.
+
+        Rejects non-XML bodies after SNIFF_BYTES, parses incrementally with
+        iterparse, stops as soon as the classification is settled and never
+        reads more than max_bytes (default max_probe_bytes). Counts are lower
+        bounds when the parse stops early.
+
+        If on_end is given it is called as on_end(local_tag, element, parent_tag)
+        for every finished element and the whole document is parsed.
+        """
+        candidate.status_code = response.status_code
+        candidate.content_type = response.headers.get('Content-Type', '')
+        reader = None
+        
+        try:
+            if response.status_code != 200:
+                candidate.error = f"HTTP {response.status_code}"
+                return
+            
+            capture = bool(self.cache) and not getattr(response, "from_cache", False) and \
+                self.cache.is_cacheable(response)
+            reader = BoundedBodyReader(gunzip_if_needed(response.iter_content(STREAM_CHUNK_SIZE)),
+                                       max_bytes or self.max_probe_bytes, capture)
+            try:
+                prefix = reader.peek(SNIFF_BYTES)
+            except requests.exceptions.RequestException as e:
+                candidate.error = str(e)
+                return
+            self.note_platform(candidate.domain, response, prefix)
+            if self.is_soft_404(candidate, response, prefix):
+                candidate.error = "Soft 404"
+                return
+            if not looks_like_xml(prefix):
+                candidate.error = "Invalid XML"
+                return
+            
+            analyzer = XMLAnalyzer()
+            root = None
+            depth = -1
+            parsed = 0
+            path: List[str] = []  # local tag names of open elements, only kept for on_end
+            started = time.perf_counter()
+            try:
+                for event, element in ET.iterparse(reader, events=("start", "end")):
+                    if event == "start":
+                        depth += 1
+                        if root is None:
+                            root = element
+                        analyzer.add(element.tag, depth)
+                        if on_end is not None:
+                            path.append(element.tag.split('}')[-1].lower())
+                            continue
+                        parsed += 1
+                        if parsed % DECISION_CHECK_INTERVAL == 0 and \
+                                self.classification_decided(analyzer.result, candidate.url):
+                            break
+                    else:
+                        if on_end is not None:
+                            local = path.pop()
+                            on_end(local, element, path[-1] if path else "")
+                        # Drop finished subtrees so memory stays flat on large feeds
+                        if depth == 1:
+                            root.clear()
+                        else:
+                            element.clear()
+                        depth -= 1
+            except ET.ParseError:
+                # A document cut off by the byte cap is still usable
+                if root is None or not reader.truncated:
+                    candidate.error = "Invalid XML"
+                    return
+            except requests.exceptions.RequestException as e:
+                candidate.error = str(e)
+                return
+            
+            finally:
+                # Time spent waiting for chunks is network, not parsing
+                candidate.timings["parse"] = time.perf_counter() - started - reader.wait_time
+            
+            if root is None:
+                candidate.error = "Invalid XML"
+                return
+            
+            if capture and reader.complete:
+                self.cache.store(candidate.url, response, b"".join(reader.captured))
+        finally:
+            if reader is not None:
+                candidate.bytes_read = reader.bytes_read
+            response.close()
+        
+        classified = time.perf_counter()
+        analysis = analyzer.result
+        candidate.is_valid_xml = True
+        candidate.root_tag = analysis.root_tag
+        candidate.listing_count = analysis.listing_count
+        candidate.sample_fields = analysis.sample_fields()
+        candidate.feed_type, candidate.confidence_score = self.classify_analysis(analysis, candidate.url)
+        candidate.timings["classify"] = time.perf_counter() - classified
+    
+    def fingerprint_soft_404(self, domain: str, base_url: str) -> Optional[SoftNotFoundFingerprint]:
+        """
+        Request a path that cannot exist. If the site answers 200 anyway, remember
+        what that catch-all page looks like so later probes can be rejected from
+        their first chunk.
+        """
+        url = urljoin(base_url, f"/estio-{uuid.uuid4().hex[:16]}.xml")
+        probe = FeedCandidate(url=url, domain=domain)
+        response, error = self.fetch_url(url, stream=True)
+        try:
+            if error or response is None:
+                probe.error = error
+                return None
+            probe.status_code = response.status_code
+            if response.status_code != 200 and not self.pattern_stats:
+                return None
+            # The first response of a domain also tells us which platform serves it
+            sniff = PLATFORM_SNIFF_BYTES if self.pattern_stats else SNIFF_BYTES
+            reader = BoundedBodyReader(response.iter_content(STREAM_CHUNK_SIZE), sniff)
+            prefix = reader.peek(sniff)
+            probe.bytes_read = reader.bytes_read
+            self.note_platform(domain, response, prefix)
+            if response.status_code != 200:
+                return None
+            fingerprint = SoftNotFoundFingerprint.from_response(response, prefix[:SNIFF_BYTES], url)
+        except requests.exceptions.RequestException as e:
+            probe.error = str(e)
+            return None
+        finally:
+            if response is not None:
+                response.close()
+            if self.metrics:
+                self._record_request(probe, "soft_404")
+        
+        self.soft_404[domain] = fingerprint
+        print(f"  🪤 {domain} answers unknown paths with HTTP 200 ({fingerprint.content_type or 'no content type'}), fingerprinted")
+        return fingerprint
+    
+    def note_platform(self, domain: str, response: requests.Response, prefix: bytes) -> None:
+        """
+        Detect the domain's platform from a response unless it is already known.
+        Called for the soft-404 probe and every probe response (headers only
+        when it is not a 200), so the platform is still learned when the
+        soft-404 probe is disabled.
+        """
+        if not self.pattern_stats or self.platforms.get(domain, UNKNOWN_PLATFORM) != UNKNOWN_PLATFORM:
+            return
+        self.platforms[domain] = detect_platform(response, prefix)
+        if self.platforms[domain] != UNKNOWN_PLATFORM:
+            print(f"  🧭 {domain} runs on {self.platforms[domain]}")
+    
+    def is_soft_404(self, candidate: FeedCandidate, response: requests.Response, prefix: bytes) -> bool:
+        """Does this 200 response match the domain's catch-all page?"""
+        fingerprint = self.soft_404.get(candidate.domain)
+        return fingerprint is not None and fingerprint.matches(response, prefix, candidate.url)
+    
+    def _read_unless_soft_404(self, candidate: FeedCandidate, response: requests.Response) -> bool:
+        """
+        For a response fetched with stream=True: look at the first chunk and reject
+        it as a soft 404, or read the rest so validate_candidate can use it.
+        """
+        if response.status_code != 200:
+            # validate_candidate only needs the status; release the connection now
+            # instead of leaving an unread stream to the garbage collector
+            response.close()
+            return True
+        try:
+            reader = BoundedBodyReader(response.iter_content(STREAM_CHUNK_SIZE), max_bytes=sys.maxsize)
+            prefix = reader.peek(SNIFF_BYTES)
+            if self.is_soft_404(candidate, response, prefix):
+                candidate.status_code = response.status_code
+                candidate.content_type = response.headers.get('Content-Type', '')
+                candidate.bytes_read = reader.bytes_read
+                candidate.error = "Soft 404"
+                response.close()
+                return False
+            response._content = reader.read()
+            response._content_consumed = True
+        except requests.exceptions.RequestException as e:
+            candidate.error = str(e)
+            response.close()
+            return False
+        
+        if self.cache and not getattr(response, "from_cache", False) and self.cache.is_cacheable(response):
+            self.cache.store(candidate.url, response, response._content)
+        return True
+    
+    def probe_candidate(self, candidate: FeedCandidate, max_bytes: Optional[int] = None,
+                        on_end: Optional[Callable[[str, ET.Element, str], None]] = None) -> bool:
+        """
+        Fetch and validate one candidate URL, recording failures on the candidate.
+        Returns False if the URL was skipped because of a fresh negative result.
+        Passing on_end forces the streaming validator (see validate_stream).
+        """
+        if self.negative_cache and not self.force_rescan:
+            known_error = self.negative_cache.lookup(candidate.domain, candidate.url)
+            if known_error:
+                candidate.error = f"Skipped (known dead: {known_error})"
+                return False
+        
+        streaming = self.streaming or on_end is not None
+        # On catch-all domains even full validation streams the first chunk to check it
+        check_soft_404 = not streaming and candidate.domain in self.soft_404
+        response, error = self.fetch_url(candidate.url, stream=streaming or check_soft_404)
+        stats = self._local.fetch_stats
+        if stats["attempts"] > 1 or stats["hedged"]:
+            candidate.fetch = dict(stats)
+        if response is not None and response.status_code != 200:
+            self.note_platform(candidate.domain, response, b"")  # headers only; the body is not read
+        if error:
+            candidate.error = error if stats["attempts"] == 1 else f"{error} (after {stats['attempts']} attempts)"
+        elif streaming:
+            self.validate_stream(candidate, response, max_bytes=max_bytes, on_end=on_end)
+        elif not check_soft_404 or self._read_unless_soft_404(candidate, response):
+            self.validate_candidate(candidate, response)
+        
+        if self.negative_cache:
+            self.negative_cache.record(candidate.domain, candidate.url, candidate.error)
+        if self.metrics:
+            self._record_request(candidate, getattr(self._local, "phase", "pattern"))
+        return True
+    
+    def _record_request(self, candidate: FeedCandidate, phase: str) -> None:
+        """Turn the thread's last FetchTiming plus the candidate's timings into a RequestRecord"""
+        timing: FetchTiming = self._local.fetch_timing
+        total = time.perf_counter() - timing.started
+        candidate.timings.update({
+            "rate_wait": timing.rate_wait, "connect": timing.connect, "ttfb": timing.ttfb,
+            "download": timing.download, "total": total,
+        })
+        self.metrics.record(RequestRecord(
+            url=candidate.url,
+            domain=candidate.domain,
+            phase=phase,
+            status=candidate.status_code,
+            error=candidate.error,
+            bytes=candidate.bytes_read,
+            rate_wait=timing.rate_wait,
+            connect=timing.connect,
+            ttfb=timing.ttfb,
+            download=timing.download,
+            total=total,
+            parse=candidate.timings.get("parse", 0.0),
+            classify=candidate.timings.get("classify", 0.0),
+            from_cache=timing.from_cache,
+        ))
+    
+    def claim_url(self, url: str) -> bool:
+        """Per-run request memo: True the first time a URL is seen, False afterwards"""
+        with self._seen_lock:
+            if url in self._seen_urls:
+                return False
+            self._seen_urls.add(url)
+            return True
+    
+    def crawl_sitemaps(self, domain: str, sitemap_urls: List[str]) -> Tuple[List[FeedCandidate], List[str], int]:
+        """
+        Breadth-first sitemap crawl from the given roots.
+
+        Nested <sitemapindex> entries are followed up to sitemap_max_depth levels
+        and sitemap_max_files documents. <loc> entries are streamed, so large
+        sitemaps never sit in memory as a tree. Returns the sitemap candidates
+        worth reporting, the feed-like page URLs found, and the number of
+        sitemaps skipped by the negative cache.
+        """
+        sitemap_results = []
+        feed_urls: List[str] = []
+        feed_url_set: Set[str] = set()
+        skipped = 0
+        fetched = 0
+        queue = [(url, 0) for url in sitemap_urls]
+        
+        while queue and fetched < self.sitemap_max_files and not self.over_budget(domain):
+            sitemap_url, depth = queue.pop(0)
+            if not self.claim_url(sitemap_url):
+                continue
+            
+            children: List[str] = []
+            
+            def on_end(tag: str, element: ET.Element, parent: str) -> None:
+                if tag != "loc" or not element.text:
+                    return
+                url = element.text.strip()
+                if parent == "sitemap":
+                    children.append(url)
+                elif parent == "url" and len(feed_urls) < SITEMAP_MAX_FEED_URLS and \
+                        url not in feed_url_set and is_feed_like_url(url):
+                    feed_url_set.add(url)
                     feed_urls.append(url)
+            
+            candidate = FeedCandidate(url=sitemap_url, domain=domain)
+            if not self.probe_candidate(candidate, max_bytes=SITEMAP_MAX_BYTES, on_end=on_end):
+                skipped += 1
+                continue
+            fetched += 1
+            
+            if candidate.is_valid_xml and (depth == 0 or candidate.confidence_score >= 40):
+                sitemap_results.append(candidate)
+                print(f"  ✓ Found XML: {sitemap_url} ({candidate.feed_type}, score: {candidate.confidence_score})")
+            
+            if depth < self.sitemap_max_depth:
+                queue.extend((child, depth + 1) for child in children if child.startswith(("http://", "https://")))
         
-        return feed_urls
+        return sitemap_results, feed_urls, skipped
     
-    def test_domain(self, domain: str) -> List[FeedCandidate]:
-        """Test all feed patterns for a single domain"""
+    def over_budget(self, domain: str) -> bool:
+        """Has this domain used up its --domain-budget requests? (announced once)"""
+        if not self.domain_budget or getattr(self._local, "requests", 0) < self.domain_budget:
+            return False
+        if not getattr(self._local, "budget_announced", False):
+            self._local.budget_announced = True
+            print(f"  💸 {domain}: request budget of {self.domain_budget} used up")
+        return True
+    
+    def add_result(self, domain_results: List[FeedCandidate], candidate: FeedCandidate) -> None:
+        """Record a validated candidate, streaming it to the results file when one is open"""
+        if "Listings" in candidate.feed_type and not any("Listings" in r.feed_type for r in domain_results):
+            with self._requests_lock:
+                self.requests_to_feed.append(getattr(self._local, "requests", 0))
+        if self.results_writer is not None:
+            self.results_writer.write(candidate, (getattr(self._local, "domain_index", 0), len(domain_results)))
+        domain_results.append(candidate)
+    
+    def test_domain(self, domain: str, base_url: Optional[str] = None, index: int = 0,
+                    preflight_requests: int = 0) -> List[FeedCandidate]:
+        """
+        Test all feed patterns for a single domain (at base_url when pre-flight found a canonical one).
+
+        `index` is the domain's position in the input, used to order streamed results;
+        `preflight_requests` made to the site already count towards its request budget.
+        """
         domain_results = []
-        base_url = f"https://{domain}"
+        self._local.domain_index = index
+        base_url = base_url or self.base_url_template.format(domain=domain)
+        skipped = 0
+        started = time.perf_counter()
+        self._local.requests = preflight_requests
+        self._local.budget_announced = False
+        self._local.retries_left = self.retry_budget
         
         print(f"\n🔍 Testing domain: {domain}")
         
-        # Track 2: Test common feed patterns
-        for pattern in FEED_PATTERNS:
+        # Track 1b: Learn what this site serves for paths that do not exist
+        if self.soft_404_check:
+            self.fingerprint_soft_404(domain, base_url)
+        
+        # Track 2: Test common feed patterns (sitemap roots are left to the sitemap crawl,
+        # which validates them and reads their <loc> entries in the same request)
+        self._local.phase = "pattern"
+        patterns = [pattern for pattern in FEED_PATTERNS if pattern not in SITEMAP_PATTERNS]
+        platform = self.platforms.get(domain, UNKNOWN_PLATFORM)
+        if self.pattern_stats:
+            patterns = self.pattern_stats.order(platform, patterns)
+        remaining = deque(patterns)
+        while remaining:
+            pattern = remaining.popleft()
+            if self.over_budget(domain):
+                break
             url = urljoin(base_url, pattern)
+            if not self.claim_url(url):
+                continue
             candidate = FeedCandidate(url=url, domain=domain)
             
-            response, error = self.fetch_url(url)
-            if error:
-                candidate.error = error
+            if not self.probe_candidate(candidate):
+                skipped += 1
                 continue
-            
-            if response and response.status_code == 200:
-                self.validate_candidate(candidate, response)
+            learned = self.platforms.get(domain, UNKNOWN_PLATFORM)
+            if self.pattern_stats and learned != platform:
+                # Without a soft-404 probe the platform shows up on a later response
+                platform = learned
+                remaining = deque(self.pattern_stats.order(platform, list(remaining)))
+            if self.pattern_stats and candidate.status_code is not None:
+                self.pattern_stats.record(platform, pattern, "Listings" in candidate.feed_type)
+            if candidate.is_valid_xml:
+                self.add_result(domain_results, candidate)
+                print(f"  ✓ Found XML: {url} ({candidate.feed_type}, score: {candidate.confidence_score})")
                 
-                if candidate.is_valid_xml:
-                    domain_results.append(candidate)
-                    print(f"  ✓ Found XML: {url} ({candidate.feed_type}, score: {candidate.confidence_score})")
-                    
-                    # If we found a high-confidence listings feed, we can stop for this domain
-                    if candidate.confidence_score >= 70:
-                        print(f"  🎯 High-confidence feed found, stopping domain scan")
-                        break
+                # If we found a high-confidence listings feed, we can stop for this domain
+                if candidate.confidence_score >= 70:
+                    print(f"  🎯 High-confidence feed found, stopping domain scan")
+                    break
         
         # Track 3: Sitemap pivot
-        sitemap_urls = [
-            f"https://{domain}/sitemap.xml",
-            f"https://{domain}/sitemap_index.xml"
-        ]
-        
-        for sitemap_url in sitemap_urls:
-            discovered_urls = self.discover_from_sitemap(sitemap_url, domain)
-            for url in discovered_urls:
-                # Skip if we already tested this URL
-                if any(c.url == url for c in domain_results):
-                    continue
-                
-                candidate = FeedCandidate(url=url, domain=domain)
-                response, error = self.fetch_url(url)
-                
-                if response and response.status_code == 200:
-                    self.validate_candidate(candidate, response)
-                    if candidate.is_valid_xml and candidate.confidence_score >= 40:
-                        domain_results.append(candidate)
-                        print(f"  ✓ Found via sitemap: {url} ({candidate.feed_type}, score: {candidate.confidence_score})")
+        self._local.phase = "sitemap"
+        sitemap_urls = [urljoin(base_url, pattern) for pattern in SITEMAP_PATTERNS]
+        sitemap_results, discovered_urls, sitemaps_skipped = self.crawl_sitemaps(domain, sitemap_urls)
+        for candidate in sitemap_results:
+            self.add_result(domain_results, candidate)
+        skipped += sitemaps_skipped
         
+        self._local.phase = "pivot"
+        for url in discovered_urls:
+            if self.over_budget(domain):
+                break
+            # Skip if we already tested this URL in this run
+            if not self.claim_url(url):
+                continue
+            
+            candidate = FeedCandidate(url=url, domain=domain)
+            if not self.probe_candidate(candidate):
+                skipped += 1
+                continue
+            
+            if candidate.is_valid_xml and candidate.confidence_score >= 40:
+                self.add_result(domain_results, candidate)
+                print(f"  ✓ Found via sitemap: {url} ({candidate.feed_type}, score: {candidate.confidence_score})")
+        
+        if skipped:
+            print(f"  ⏭️  {domain}: skipped {skipped} known-dead URLs (use --force-rescan to re-probe)")
+        
+        if self.pattern_stats:
+            self.pattern_stats.flush()
+        if self.metrics:
+            self.metrics.domain_finished(domain, time.perf_counter() - started)
         return domain_results
     
-    def run_discovery(self, domains: List[str]) -> List[FeedCandidate]:
-        """Run discovery across all domains"""
+    def run_discovery(self, domains: Iterable[str],
+                      checkpoint: Optional[DiscoveryCheckpoint] = None) -> List[FeedCandidate]:
+        """Run discovery across all domains (a list or a stream such as iter_domains)"""
         print("=" * 80)
         print("🚀 Starting Cyprus Real Estate XML Feed Discovery")
         print("=" * 80)
-        print(f"📋 Testing {len(domains)} domains")
+        if isinstance(domains, (list, tuple)):
+            print(f"📋 Testing {len(domains)} domains")
+        else:
+            print("📋 Testing a streamed domain list")
         print(f"🔧 Testing {len(FEED_PATTERNS)} endpoint patterns per domain")
+        print(f"⚡ Scanning up to {self.max_workers} domains concurrently")
+        if checkpoint is not None and len(checkpoint):
+            print(f"♻️  Resuming: {len(checkpoint)} domains already completed in {checkpoint.path}")
         print()
         
-        all_results = []
-        
-        # Process domains sequentially to respect rate limits
-        for domain in domains:
-            try:
-                results = self.test_domain(domain)
-                all_results.extend(results)
-            except Exception as e:
-                print(f"  ❌ Error testing {domain}: {e}")
-        
-        self.results = all_results
-        return all_results
-    
-    def print_report(self):
-        """Print formatted discovery report"""
-        print("\n" + "=" * 80)
-        print("📊 DISCOVERY REPORT")
-        print("=" * 80)
+        # Domains run concurrently; politeness is enforced per host by the rate limiter.
+        # Only a bounded window of domains is queued, so the list is read as it is consumed.
+        # Finished domains are held until every earlier one is done, so the output order
+        # matches the input. With a results writer, candidates were already streamed out
+        # as they were validated and are not kept.
+        with self._seen_lock:
+            self._seen_urls.clear()
+        self.domains_tested = 0
+        self.requests_to_feed = []
+        self.dead_domains = []
+        all_results: List[FeedCandidate] = []
+        finished: Dict[int, List[FeedCandidate]] = {}
+        pending: Dict[object, Tuple[int, str]] = {}  # future -> (input index, domain)
+        next_index = 0
+        resumed = 0
         
-        # Sort by confidence score (highest first)
-        sorted_results = sorted(self.results, key=lambda x: x.confidence_score, reverse=True)
+        if self.parse_processes > 0:
+            print(f"🧮 Parsing large bodies in {self.parse_processes} worker processes")
+            # Workers start at the first submit, from a worker thread; forking a process that
+            # is running threads can copy held locks into the child, so never use "fork"
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            self.parse_pool = ProcessPoolExecutor(max_workers=self.parse_processes,
+                                                  mp_context=multiprocessing.get_context(method))
+        if self.hedge:
+            self._hedge_pool = ThreadPoolExecutor(max_workers=max(2, 2 * self.max_workers))
         
-        # Group by feed type
-        listings_feeds = [r for r in sorted_results if "Listings" in r.feed_type]
-        sitemaps = [r for r in sorted_results if "Sitemap" in r.feed_type]
-        other_xml = [r for r in sorted_results if r not in listings_feeds and r not in sitemaps]
+        def collect(done) -> None:
+            for future in done:
+                i, domain = pending.pop(future)
+                try:
+                    finished[i] = future.result()
+                except Exception as e:
+                    print(f"  ❌ Error testing {domain}: {e}")
+                    finished[i] = []
+                    continue
+                if checkpoint is not None:
+                    checkpoint.record(domain, finished[i])
+            if self.results_writer is not None:
+                self.results_writer.maybe_flush()
         
-        print(f"\n✅ CONFIRMED LISTINGS FEEDS: {len(listings_feeds)}")
-        print("-" * 80)
-        for i, result in enumerate(listings_feeds, 1):
-            print(f"\n{i}. {result.domain}")
-            print(f"   URL: {result.url}")
-            print(f"   Type: {result.feed_type}")
-            print(f"   Confidence: {result.confidence_score}/100")
-            print(f"   Status: {result.status_code}")
-            print(f"   Root tag: <{result.root_tag}>")
-            print(f"   Listing nodes: {result.listing_count}")
-            print(f"   Sample fields: {', '.join(result.sample_fields[:5])}")
-        
-        if not listings_feeds:
-            print("   No confirmed listings feeds found.")
-        
-        print(f"\n📄 SITEMAPS FOUND: {len(sitemaps)}")
-        print("-" * 80)
-        for result in sitemaps[:5]:  # Show first 5
-            print(f"   • {result.url} (score: {result.confidence_score})")
+        def drain() -> None:
+            nonlocal next_index
+            while next_index in finished:
+                results = finished.pop(next_index)
+                if self.results_writer is None:
+                    all_results.extend(results)
+                next_index += 1
         
-        print(f"\n❓ OTHER XML FOUND: {len(other_xml)}")
-        print("-" * 80)
-        for result in other_xml[:5]:  # Show first 5
-            print(f"   • {result.url} - {result.feed_type} (score: {result.confidence_score})")
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as executor:
+                window = max(1, self.max_workers) * DOMAIN_QUEUE_FACTOR
+                if self.preflight is not None:
+                    completed = (lambda d: checkpoint.results(d) is not None) if checkpoint else (lambda d: False)
+                    checked = self.preflight.run(domains, skip=completed)
+                else:
+                    checked = ((domain, None) for domain in domains)
+                for i, (domain, preflight) in enumerate(checked):
+                    self.domains_tested += 1
+                    stored = checkpoint.results(domain) if checkpoint is not None else None
+                    if stored is not None:
+                        finished[i] = stored
+                        resumed += 1
+                        if self.results_writer is not None:
+                            for seq, candidate in enumerate(stored):
+                                self.results_writer.write(candidate, (i, seq))
+                    elif preflight is not None and not preflight.live:
+                        print(f"\n💀 Skipping {domain}: {preflight.error}")
+                        self.dead_domains.append(preflight)
+                        finished[i] = []
+                    else:
+                        base_url = preflight.base_url if preflight is not None else None
+                        spent = preflight.requests if preflight is not None else 0
+                        if base_url and base_url != self.base_url_template.format(domain=domain):
+                            print(f"\n↪️  {domain} is served from {base_url}")
+                        if preflight is not None and preflight.platform != UNKNOWN_PLATFORM:
+                            self.platforms[domain] = preflight.platform
+                        pending[executor.submit(self.test_domain, domain, base_url, i, spent)] = (i, domain)
+                    while len(pending) >= window:
+                        collect(wait(pending, return_when=FIRST_COMPLETED).done)
+                    drain()
+                collect(wait(pending).done)
+                drain()
+        finally:
+            if self.parse_pool is not None:
+                self.parse_pool.shutdown()
+                self.parse_pool = None
+            if self._hedge_pool is not None:
+                # Losing requests of hedged pairs may still be draining; let them close in the background
+                self._hedge_pool.shutdown(wait=False)
+                self._hedge_pool = None
         
-        print("\n" + "=" * 80)
-        print(f"📈 SUMMARY")
-        print("=" * 80)
-        print(f"Total domains tested: {len(CYPRUS_DOMAINS)}")
-        print(f"Total XML endpoints found: {len(self.results)}")
-        print(f"Confirmed listings feeds: {len(listings_feeds)}")
-        print(f"High-confidence feeds (≥70): {len([r for r in listings_feeds if r.confidence_score >= 70])}")
-        print("=" * 80)
+        if resumed:
+            print(f"\n♻️  {resumed} domains restored from the checkpoint")
+        if self.dead_domains:
+            print(f"\n🛫 Pre-flight dropped {len(self.dead_domains)} dead domains "
+                  f"({sum(1 for r in self.dead_domains if r.error.startswith('DNS'))} without DNS)")
+        if self.requests_to_feed:
+            ordered = sorted(self.requests_to_feed)
+            print(f"\n📉 Requests to first listings feed: median {ordered[len(ordered) // 2]}, "
+                  f"max {ordered[-1]} ({len(ordered)} domains)")
+        self.results = all_results
+        return all_results
     
-    def export_json(self, filename: str = "cyprus_feeds_results.json"):
-        """Export results to JSON file"""
-        data = {
-            "discovery_timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-            "domains_tested": len(CYPRUS_DOMAINS),
-            "total_feeds_found": len(self.results),
-            "results": [
-                {
-                    "url": r.url,
-                    "domain": r.domain,
-                    "feed_type": r.feed_type,
-                    "confidence_score": r.confidence_score,
-                    "status_code": r.status_code,
-                    "root_tag": r.root_tag,
-                    "listing_count": r.listing_count,
-                    "sample_fields": r.sample_fields,
-                    "error": r.error
-                }
-                for r in sorted(self.results, key=lambda x: x.confidence_score, reverse=True)
-            ]
-        }
-        
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=2)
-        
-        print(f"\n💾 Results exported to: {filename}")
+    def sorted_records(self) -> List[dict]:
+        return [result_record(r) for r in sorted(self.results, key=lambda x: x.confidence_score, reverse=True)]
+    
+    def print_report(self) -> Dict[str, int]:
+        """Print formatted discovery report for the results held in memory"""
+        return print_report(self.sorted_records(), self.domains_tested)
+    
+    def export_json(self, filename: str = RESULTS_JSON):
+        """Export results held in memory to a JSON file"""
+        write_results_json(self.sorted_records(), len(self.results), self.domains_tested, filename)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Discover XML property feeds from Cyprus real estate sites")
+    parser.add_argument("--domains-file", metavar="PATH",
+                        help="read domains one per line from PATH ('-' for stdin) instead of the built-in list")
+    parser.add_argument("--shard", type=parse_shard, metavar="I/N",
+                        help="only test domains whose stable hash falls in shard I of N (0-based)")
+    parser.add_argument("--checkpoint", metavar="PATH",
+                        help="record completed domains in PATH and skip them when the run is restarted")
+    parser.add_argument("--restart", action="store_true",
+                        help="forget the domains recorded in --checkpoint and start from the beginning")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help=f"domains scanned concurrently (default: {MAX_WORKERS})")
+    parser.add_argument("--stream", action="store_true",
+                        help="validate candidates with a streaming, byte-capped parser")
+    parser.add_argument("--max-probe-bytes", type=int, default=MAX_PROBE_BYTES,
+                        help=f"body bytes read per candidate in --stream mode (default: {MAX_PROBE_BYTES})")
+    parser.add_argument("--parse-processes", type=int, nargs="?", const=os.cpu_count() or 1, default=0,
+                        help="parse and classify large non-streamed bodies in a process pool "
+                             "(default: off; without a value: one per CPU)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR,
+                        help=f"persistent HTTP cache directory (default: {CACHE_DIR})")
+    parser.add_argument("--no-cache", action="store_true", help="disable the persistent HTTP cache")
+    parser.add_argument("--cache-max-mb", type=int, default=CACHE_MAX_BYTES // (1024 * 1024),
+                        help="HTTP cache size budget in MB")
+    parser.add_argument("--cache-max-age-days", type=float, default=CACHE_MAX_AGE / 86400,
+                        help="drop cached responses not revalidated for this many days")
+    parser.add_argument("--negative-ttl-days", type=float, default=NEGATIVE_TTL / 86400,
+                        help="skip (domain, path) probes that failed within this many days (0 disables)")
+    parser.add_argument("--force-rescan", action="store_true",
+                        help="probe every URL, ignoring remembered failures")
+    parser.add_argument("--sitemap-depth", type=int, default=SITEMAP_MAX_DEPTH,
+                        help=f"nested sitemap index levels to follow (default: {SITEMAP_MAX_DEPTH})")
+    parser.add_argument("--sitemap-max-files", type=int, default=SITEMAP_MAX_FILES,
+                        help=f"sitemap documents fetched per domain (default: {SITEMAP_MAX_FILES})")
+    parser.add_argument("--no-soft-404-check", action="store_true",
+                        help="skip the per-domain catch-all page fingerprint request")
+    parser.add_argument("--retries", type=int, default=FETCH_RETRIES,
+                        help=f"retries per request for timeouts, dropped connections and 502/503/504 (default: {FETCH_RETRIES})")
+    parser.add_argument("--retry-budget", type=int, default=DOMAIN_RETRY_BUDGET,
+                        help=f"retries plus hedged requests allowed per domain (default: {DOMAIN_RETRY_BUDGET})")
+    parser.add_argument("--hedge", action="store_true",
+                        help="send a duplicate request when one outlives the host's p90 response time")
+    parser.add_argument("--fixed-timeout", action="store_true",
+                        help=f"use {REQUEST_TIMEOUT}s for every request instead of per-host adaptive timeouts")
+    parser.add_argument("--no-preflight", action="store_true",
+                        help="probe every domain without the DNS / connect / redirect pre-flight")
+    parser.add_argument("--preflight-workers", type=int, default=PREFLIGHT_WORKERS,
+                        help=f"domains pre-flighted concurrently (default: {PREFLIGHT_WORKERS})")
+    parser.add_argument("--fixed-order", action="store_true",
+                        help="probe FEED_PATTERNS in written order instead of by learned hit rate")
+    parser.add_argument("--domain-budget", type=int, default=0, metavar="N",
+                        help="stop probing a domain after N requests (default: no limit)")
+    parser.add_argument("--results-jsonl", default=RESULTS_JSONL, metavar="PATH",
+                        help=f"stream validated candidates to PATH as JSON lines (default: {RESULTS_JSONL})")
+    parser.add_argument("--results-json", default=RESULTS_JSON, metavar="PATH",
+                        help=f"sorted JSON report derived from the JSONL file after the run (default: {RESULTS_JSON})")
+    parser.add_argument("--flush-every", type=int, default=RESULTS_FLUSH_EVERY, metavar="N",
+                        help=f"flush the JSONL file every N records (default: {RESULTS_FLUSH_EVERY})")
+    parser.add_argument("--flush-interval", type=float, default=RESULTS_FLUSH_INTERVAL, metavar="SECONDS",
+                        help=f"flush the JSONL file at least this often (default: {RESULTS_FLUSH_INTERVAL})")
+    parser.add_argument("--metrics-jsonl", help="write per-request timing records and aggregates as JSON lines")
+    parser.add_argument("--metrics-prom", help="write per-domain/per-phase aggregates in Prometheus text format")
+    return parser.parse_args(argv)
 
 
 def main():
     """Main entry point"""
-    discovery = FeedDiscovery()
+    args = parse_args()
+    cache = None
+    if not args.no_cache:
+        cache = ResponseCache(
+            args.cache_dir,
+            max_bytes=args.cache_max_mb * 1024 * 1024,
+            max_age=args.cache_max_age_days * 86400,
+        )
+    negative_cache = None
+    if args.negative_ttl_days > 0:
+        negative_cache = NegativeCache(args.cache_dir, ttl=args.negative_ttl_days * 86400)
+    metrics = None
+    if args.metrics_jsonl or args.metrics_prom:
+        metrics = DiscoveryMetrics(args.metrics_jsonl)
+    pattern_stats = None if args.fixed_order else PatternStats(args.cache_dir)
+    dns = None if args.no_preflight else DNSCache(args.cache_dir)
+    results_writer = JsonlResultWriter(args.results_jsonl, args.flush_every, args.flush_interval)
+    discovery = FeedDiscovery(
+        max_workers=args.workers,
+        streaming=args.stream,
+        max_probe_bytes=args.max_probe_bytes,
+        cache=cache,
+        negative_cache=negative_cache,
+        force_rescan=args.force_rescan,
+        sitemap_max_depth=args.sitemap_depth,
+        sitemap_max_files=args.sitemap_max_files,
+        soft_404_check=not args.no_soft_404_check,
+        metrics=metrics,
+        parse_processes=args.parse_processes,
+        results_writer=results_writer,
+        pattern_stats=pattern_stats,
+        domain_budget=args.domain_budget,
+        preflight=HostPreflight(dns, workers=args.preflight_workers,
+                                sniff_platform=pattern_stats is not None) if dns else None,
+        adaptive_timeouts=not args.fixed_timeout,
+        max_retries=args.retries,
+        retry_budget=args.retry_budget,
+        hedge=args.hedge,
+    )
+    
+    domains: Iterable[str] = iter_domains(args.domains_file) if args.domains_file else CYPRUS_DOMAINS
+    if args.shard:
+        index, count = args.shard
+        print(f"🧩 Shard {index}/{count}")
+        domains = shard_domains(domains, index, count)
+    checkpoint = None
+    if args.checkpoint:
+        checkpoint = DiscoveryCheckpoint(args.checkpoint)
+        if args.restart:
+            checkpoint.clear()
     
-    # Run discovery
-    results = discovery.run_discovery(CYPRUS_DOMAINS)
+    # Run discovery (candidates are streamed to the JSONL file as they are validated)
+    try:
+        discovery.run_discovery(domains, checkpoint=checkpoint)
+    finally:
+        results_writer.close()
+        if checkpoint is not None:
+            checkpoint.close()
+        if pattern_stats is not None:
+            pattern_stats.close()
+        if dns is not None:
+            dns.close()
+        if negative_cache is not None:
+            negative_cache.close()
+        if cache is not None:
+            cache.close()
+    print(f"\n📝 {results_writer.count} results streamed to: {args.results_jsonl}")
     
-    # Print report
-    discovery.print_report()
+    # Sort the JSONL file on disk, then derive the report and the JSON export from it
+    sorted_path = args.results_jsonl + ".sorted"
+    try:
+        count = sort_results_jsonl(args.results_jsonl, sorted_path)
+        with open(sorted_path, encoding="utf-8") as f:
+            totals = print_report(_read_records(f), discovery.domains_tested)
+        with open(sorted_path, encoding="utf-8") as f:
+            write_results_json(_read_records(f), count, discovery.domains_tested, args.results_json)
+    finally:
+        if os.path.exists(sorted_path):
+            os.remove(sorted_path)
     
-    # Export to JSON
-    discovery.export_json()
+    if metrics:
+        metrics.print_summary()
+        metrics.close()
+        if args.metrics_prom:
+            metrics.write_prometheus(args.metrics_prom)
+        print(f"📐 Metrics written to: {', '.join(p for p in (args.metrics_jsonl, args.metrics_prom) if p)}")
     
     # Return exit code based on success
-    listings_feeds = [r for r in results if "Listings" in r.feed_type and r.confidence_score >= 70]
-    if listings_feeds:
-        print(f"\n🎉 SUCCESS: Found {len(listings_feeds)} high-confidence listings feed(s)!")
+    if totals["high_confidence"]:
+        print(f"\n🎉 SUCCESS: Found {totals['high_confidence']} high-confidence listings feed(s)!")
         return 0
     else:
-        print(f"\n⚠️  No high-confidence listings feeds found. Found {len(results)} XML endpoints total.")
+        print(f"\n⚠️  No high-confidence listings feeds found. Found {totals['results']} XML endpoints total.")
         return 1
 
 
@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""
+Streaming Listing Extractor for discovered XML property feeds
+
+Turns feeds validated by discover_cyprus_feeds.py (or any feed URL / local
+file) into flat listing records, written as NDJSON (one JSON object per line).
+
+Feeds are parsed with iterparse and every listing element is cleared and
+detached once it has been mapped, so memory stays roughly constant no matter
+how large the export is.
+
+Usage:
+    python3 extract_feed_listings.py https://example.com/feed.xml > listings.ndjson
+    python3 extract_feed_listings.py --from-results cyprus_feeds_results.json -o listings.ndjson
+    python3 extract_feed_listings.py --diff-store .feed_diff https://example.com/feed.xml > changes.ndjson
+
+Incremental mode (--diff-store DIR) keeps a content hash per listing key and
+emits only listings that were added, changed or removed since the last run
+of the same feed, each tagged with a "change" field.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+import zlib
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Set, TextIO
+
+import requests
+
+from discover_cyprus_feeds import (
+    CACHE_DIR,
+    LISTING_TAG_SET,
+    REQUEST_TIMEOUT,
+    STREAM_CHUNK_SIZE,
+    USER_AGENT,
+    BoundedBodyReader,
+    gunzip_if_needed,
+)
+
+# Configuration
+MIN_CONFIDENCE = 70  # --from-results: only feeds classified at least this confidently
+MAX_FEED_BYTES = sys.maxsize  # no cap by default; whole exports are streamed
+MAX_EXTRA_FIELDS = 30  # unmapped leaf fields kept per record
+DIFF_STORE_DIR = os.path.join(CACHE_DIR, "listings")
+DIFF_COMMIT_INTERVAL = 5000  # hash rows written per batch in --diff-store mode
+
+# Record field -> tag names (lowercase, namespace stripped) that may carry it;
+# together with IMAGE_TAGS this covers every name in PROPERTY_FIELDS
+RECORD_FIELDS = {
+    "id": ["id", "reference", "ref", "ref_no", "refno", "reference_number", "code",
+           "listing_id", "property_id", "unique_id", "guid"],
+    "title": ["title", "name", "headline"],
+    "type": ["type", "property_type", "propertytype", "category", "subtype"],
+    "price": ["price", "sale_price", "saleprice", "rent", "rent_price", "amount", "value"],
+    "currency": ["currency", "currency_code"],
+    "bedrooms": ["bedrooms", "beds", "bedroom", "num_bedrooms"],
+    "bathrooms": ["bathrooms", "baths", "bathroom", "num_bathrooms"],
+    "area": ["area", "covered_area", "size", "living_area", "built_area", "sqm"],
+    "location": ["location", "city", "town", "district", "region", "area_name"],
+    "address": ["address", "street", "full_address"],
+    "latitude": ["latitude", "lat", "geo_lat"],
+    "longitude": ["longitude", "lng", "lon", "long", "geo_lng"],
+    "coordinates": ["coordinates", "geo", "point", "latlng"],
+    "description": ["description", "desc", "details", "text"],
+    "url": ["url", "link", "permalink"],
+}
+IMAGE_TAGS = frozenset(["image", "images", "photo", "photos", "picture", "pictures", "img", "media", "gallery"])
+IMAGE_ATTRIBUTES = ("url", "src", "href")
+NUMERIC_FIELDS = {"price": float, "area": float, "bedrooms": int, "bathrooms": int,
+                  "latitude": float, "longitude": float}
+
+_TAG_TO_FIELD = {tag: name for name, tags in RECORD_FIELDS.items() for tag in tags}
+_NUMBER_RE = re.compile(r"-?\d+(?:[.,]\d+)*")
+
+
+def local_name(tag: str) -> str:
+    """Lowercase tag name without its {namespace} or prefix"""
+    return tag.rsplit('}', 1)[-1].rsplit(':', 1)[-1].lower()
+
+
+def parse_number(text: Optional[str], kind=float):
+    """Pull a number out of text like '€ 250,000', '1.250.000' or '3 beds'; None if there is none"""
+    if not text:
+        return None
+    match = _NUMBER_RE.search(text.replace('\u00a0', ' '))
+    if not match:
+        return None
+    raw = match.group(0)
+    if ',' in raw and '.' in raw:
+        raw = raw.replace(',', '') if raw.rfind('.') > raw.rfind(',') else raw.replace('.', '').replace(',', '.')
+    elif ',' in raw:
+        # '250,000' is a thousands separator, '34,5' a decimal comma
+        raw = raw.replace(',', '') if len(raw.rsplit(',', 1)[1]) == 3 else raw.replace(',', '.')
+    elif raw.count('.') > 1 and all(len(group) == 3 for group in raw.split('.')[1:]):
+        raw = raw.replace('.', '')  # '1.250.000': dots as thousands separators
+    try:
+        value = float(raw)
+    except ValueError:
+        return None
+    return int(value) if kind is int else value
+
+
+@dataclass
+class ExtractionStats:
+    """Counters for one feed"""
+    source: str
+    records: int = 0
+    bytes_read: int = 0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    truncated: bool = False  # stopped early (--limit / --max-bytes); removals are not inferred
+    added: int = 0
+    changed: int = 0
+    removed: int = 0
+
+
+@dataclass
+class ListingRecord:
+    """Flat listing mapped from one listing element"""
+    source_feed: str
+    listing_tag: str
+    id: Optional[str] = None
+    title: Optional[str] = None
+    type: Optional[str] = None
+    price: Optional[float] = None
+    currency: Optional[str] = None
+    bedrooms: Optional[int] = None
+    bathrooms: Optional[int] = None
+    area: Optional[float] = None
+    location: Optional[str] = None
+    address: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    description: Optional[str] = None
+    url: Optional[str] = None
+    images: List[str] = field(default_factory=list)
+    extra: Dict[str, str] = field(default_factory=dict)
+
+
+class ListingMapper:
+    """Maps a listing element (and its descendants) onto a ListingRecord"""
+
+    def map(self, element: ET.Element, source: str) -> ListingRecord:
+        record = ListingRecord(source_feed=source, listing_tag=local_name(element.tag))
+        values: Dict[str, str] = {}
+
+        for key in ("id", "ref", "reference"):
+            if element.get(key):
+                values["id"] = element.get(key).strip()
+                break
+
+        self._walk(element, record, values, in_images=False, is_root=True)
+
+        for name, text in values.items():
+            if name == "coordinates":
+                continue
+            kind = NUMERIC_FIELDS.get(name)
+            setattr(record, name, parse_number(text, kind) if kind else text)
+
+        if (record.latitude is None or record.longitude is None) and values.get("coordinates"):
+            numbers = _NUMBER_RE.findall(values["coordinates"])
+            if len(numbers) >= 2:
+                record.latitude, record.longitude = float(numbers[0]), float(numbers[1])
+        return record
+
+    def _walk(self, element: ET.Element, record: ListingRecord, values: Dict[str, str],
+              in_images: bool, is_root: bool = False) -> None:
+        name = local_name(element.tag)
+        in_images = in_images or name in IMAGE_TAGS
+        text = (element.text or "").strip()
+
+        if in_images:
+            for candidate in [text] + [element.get(attr, "") for attr in IMAGE_ATTRIBUTES]:
+                if candidate.startswith("http") and candidate not in record.images:
+                    record.images.append(candidate)
+        elif not is_root:
+            field_name = _TAG_TO_FIELD.get(name)
+            if field_name == "price" and element.get("currency") and "currency" not in values:
+                values["currency"] = element.get("currency").strip()
+            if field_name == "url" and not text and element.get("href"):
+                text = element.get("href").strip()
+            if text and len(element) == 0:
+                if field_name and field_name not in values:
+                    values[field_name] = text
+                elif not field_name and name not in record.extra and len(record.extra) < MAX_EXTRA_FIELDS:
+                    record.extra[name] = text
+            elif field_name == "location" and len(element) and "location" not in values:
+                parts = [(child.text or "").strip() for child in element if len(child) == 0]
+                if any(parts):
+                    values["location"] = ", ".join(p for p in parts if p)
+
+        for child in element:
+            self._walk(child, record, values, in_images)
+
+
+def open_feed(source: str, session: Optional[requests.Session] = None) -> Iterator[bytes]:
+    """Byte chunks of a feed URL or local file (gzip is decoded transparently)"""
+    if source.startswith(("http://", "https://")):
+        response = (session or requests).get(source, stream=True, timeout=REQUEST_TIMEOUT,
+                                             headers={"User-Agent": USER_AGENT})
+        response.raise_for_status()
+
+        def chunks() -> Iterator[bytes]:
+            try:
+                yield from response.iter_content(STREAM_CHUNK_SIZE)
+            finally:
+                response.close()
+        return gunzip_if_needed(chunks())
+
+    def file_chunks() -> Iterator[bytes]:
+        with open(source, "rb") as f:
+            while True:
+                chunk = f.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+    return gunzip_if_needed(file_chunks())
+
+
+def iter_listings(source: str, chunks: Iterator[bytes], stats: ExtractionStats,
+                  max_bytes: int = MAX_FEED_BYTES) -> Iterator[ListingRecord]:
+    """
+    Stream ListingRecords out of a feed.
+
+    A listing is the outermost element whose tag is one of LISTING_TAGS and
+    that has child elements; once mapped it is cleared and detached from its
+    parent so the parsed tree never grows with the feed.
+    """
+    mapper = ListingMapper()
+    reader = BoundedBodyReader(chunks, max_bytes)
+    stack: List[ET.Element] = []
+    listing_depth: Optional[int] = None
+
+    try:
+        for event, element in ET.iterparse(reader, events=("start", "end")):
+            if event == "start":
+                stack.append(element)
+                if listing_depth is None and len(stack) > 1 and local_name(element.tag) in LISTING_TAG_SET:
+                    listing_depth = len(stack)
+                continue
+
+            depth = len(stack)
+            stack.pop()
+            if depth != listing_depth:
+                if listing_depth is None and stack:
+                    # Outside any listing: nothing below here is needed again
+                    element.clear()
+                    stack[-1].remove(element)
+                continue
+
+            listing_depth = None
+            if len(element):
+                stats.records += 1
+                yield mapper.map(element, source)
+            element.clear()
+            if stack:
+                stack[-1].remove(element)
+    finally:
+        stats.bytes_read = reader.bytes_read
+        stats.truncated = stats.truncated or reader.truncated
+
+
+def record_to_dict(record: ListingRecord) -> dict:
+    data = {k: v for k, v in record.__dict__.items() if v not in (None, [], {})}
+    data.setdefault("images", [])
+    return data
+
+
+def listing_key(data: dict) -> str:
+    """Stable identity of a listing: its reference/id, else its URL, else its content"""
+    if data.get("id"):
+        return "id:" + str(data["id"])
+    if data.get("url"):
+        return "url:" + data["url"]
+    return "content:" + content_hash(data).hex()
+
+
+def content_hash(data: dict) -> bytes:
+    """8-byte digest of a record's content (the source feed is not part of it)"""
+    content = {k: v for k, v in data.items() if k != "source_feed"}
+    return hashlib.blake2b(json.dumps(content, sort_keys=True, ensure_ascii=False).encode("utf-8"),
+                           digest_size=8).digest()
+
+
+class ListingHashStore:
+    """
+    Per-feed listing hashes from the previous run (SQLite, one compact row per
+    listing: key, 8-byte hash, run marker).
+
+    A feed's changes are committed only when it was read completely, so a
+    failed or truncated run is simply repeated next time.
+    """
+
+    def __init__(self, directory: str = DIFF_STORE_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(directory, "listing_hashes.sqlite"))
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS listings (
+                feed TEXT,
+                listing_key TEXT,
+                hash BLOB,
+                run INTEGER,
+                PRIMARY KEY (feed, listing_key)
+            ) WITHOUT ROWID"""
+        )
+        self._db.commit()
+        self._pending: List[tuple] = []
+        self._seen: Set[str] = set()  # keys already checked in the current run
+
+    def begin(self, feed: str) -> int:
+        """Start a run of feed and return its run marker"""
+        self._seen = set()
+        row = self._db.execute("SELECT MAX(run) FROM listings WHERE feed = ?", (feed,)).fetchone()
+        return (row[0] or 0) + 1
+
+    def check(self, feed: str, key: str, digest: bytes, run: int) -> Optional[str]:
+        """'added', 'changed' or None (unchanged) for a listing seen in this run"""
+        # Duplicate key within this run: first occurrence wins. The first one may
+        # still be in _pending rather than the table, so the DB cannot tell us.
+        if key in self._seen:
+            return None
+        self._seen.add(key)
+        row = self._db.execute("SELECT hash FROM listings WHERE feed = ? AND listing_key = ?",
+                               (feed, key)).fetchone()
+        self._pending.append((feed, key, sqlite3.Binary(digest), run))
+        if len(self._pending) >= DIFF_COMMIT_INTERVAL:
+            self._flush()
+        if row is None:
+            return "added"
+        return "changed" if bytes(row[0]) != digest else None
+
+    def _flush(self) -> None:
+        # Written inside the feed's open transaction; nothing is committed until finish()
+        self._db.executemany("INSERT OR REPLACE INTO listings VALUES (?, ?, ?, ?)", self._pending)
+        self._pending = []
+
+    def removed(self, feed: str, run: int) -> Iterator[str]:
+        """Keys from earlier runs that this (complete) run did not see"""
+        self._flush()
+        for (key,) in self._db.execute("SELECT listing_key FROM listings WHERE feed = ? AND run < ?", (feed, run)):
+            yield key
+
+    def finish(self, feed: str, run: int, complete: bool) -> None:
+        """Commit a complete run (dropping removed listings) or discard a partial one"""
+        self._seen = set()
+        if not complete:
+            self._pending = []
+            self._db.rollback()
+            return
+        self._flush()
+        self._db.execute("DELETE FROM listings WHERE feed = ? AND run < ?", (feed, run))
+        self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def extract_feed(source: str, out: TextIO, session: Optional[requests.Session] = None,
+                 max_bytes: int = MAX_FEED_BYTES, limit: Optional[int] = None,
+                 store: Optional[ListingHashStore] = None) -> ExtractionStats:
+    """
+    Write one NDJSON line per listing in source (or, with a store, per added /
+    changed / removed listing); errors end the feed, not the run
+    """
+    stats = ExtractionStats(source=source)
+    started = time.perf_counter()
+    run = store.begin(source) if store else 0
+    try:
+        for record in iter_listings(source, open_feed(source, session), stats, max_bytes):
+            data = record_to_dict(record)
+            change = None
+            if store:
+                change = store.check(source, listing_key(data), content_hash(data), run)
+                if change == "added":
+                    stats.added += 1
+                elif change == "changed":
+                    stats.changed += 1
+                if change:
+                    data["change"] = change
+            if change or not store:
+                out.write(json.dumps(data, ensure_ascii=False) + "\n")
+            if limit and stats.records >= limit:
+                stats.truncated = True
+                break
+    except (requests.exceptions.RequestException, ET.ParseError, OSError, zlib.error) as e:
+        stats.error = str(e)
+
+    if store:
+        complete = not stats.error and not stats.truncated
+        if complete:
+            for key in store.removed(source, run):
+                kind, _, value = key.partition(":")
+                removed = {"source_feed": source, "change": "removed", "listing_key": key}
+                if kind in ("id", "url"):
+                    removed[kind] = value
+                out.write(json.dumps(removed, ensure_ascii=False) + "\n")
+                stats.removed += 1
+        store.finish(source, run, complete)
+    stats.elapsed = time.perf_counter() - started
+    out.flush()
+    return stats
+
+
+def feeds_from_results(path: str, min_confidence: int = MIN_CONFIDENCE) -> List[str]:
+    """Listings feed URLs from a cyprus_feeds_results.json export"""
+    with open(path) as f:
+        data = json.load(f)
+    return [
+        r["url"] for r in data.get("results", [])
+        if "Listings" in (r.get("feed_type") or "") and r.get("confidence_score", 0) >= min_confidence
+    ]
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Stream listings out of XML property feeds as NDJSON")
+    parser.add_argument("sources", nargs="*", help="feed URLs or local files (.xml / .xml.gz)")
+    parser.add_argument("--from-results", metavar="JSON",
+                        help="also extract every listings feed in a discover_cyprus_feeds.py export")
+    parser.add_argument("--min-confidence", type=int, default=MIN_CONFIDENCE,
+                        help=f"confidence needed for --from-results feeds (default: {MIN_CONFIDENCE})")
+    parser.add_argument("-o", "--output", help="NDJSON output file (default: stdout)")
+    parser.add_argument("--max-bytes", type=int, default=MAX_FEED_BYTES,
+                        help="stop reading a feed after this many (decoded) bytes")
+    parser.add_argument("--limit", type=int, help="stop each feed after this many records")
+    parser.add_argument("--diff", action="store_true",
+                        help=f"emit only added/changed/removed listings since the last run (store: {DIFF_STORE_DIR})")
+    parser.add_argument("--diff-store", metavar="DIR",
+                        help="like --diff, with the listing hash store kept in DIR")
+    return parser.parse_args(argv)
+
+
+def main() -> int:
+    """Main entry point"""
+    args = parse_args()
+    sources = list(args.sources)
+    if args.from_results:
+        sources.extend(u for u in feeds_from_results(args.from_results, args.min_confidence) if u not in sources)
+    if not sources:
+        print("No feeds given (pass URLs/files or --from-results)", file=sys.stderr)
+        return 2
+
+    store = ListingHashStore(args.diff_store or DIFF_STORE_DIR) if (args.diff or args.diff_store) else None
+    out = open(args.output, "w") if args.output else sys.stdout
+    session = requests.Session()
+    failures = 0
+    try:
+        for source in sources:
+            stats = extract_feed(source, out, session, args.max_bytes, args.limit, store)
+            status = f"❌ {stats.error}" if stats.error else "✅"
+            summary = f"{stats.records} listings"
+            if store:
+                summary += f" (+{stats.added} ~{stats.changed} -{stats.removed})"
+                if stats.error or stats.truncated:
+                    summary += ", partial run not recorded"
+            print(f"{status} {source}: {summary}, {stats.bytes_read / 1024 / 1024:.1f} MB "
+                  f"in {stats.elapsed:.1f}s", file=sys.stderr)
+            failures += bool(stats.error)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if store:
+            store.close()
+
+    rss = peak_rss_mb()
+    if rss is not None:
+        print(f"📈 Peak RSS: {rss:.0f} MB", file=sys.stderr)
+    return 1 if failures == len(sources) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,9 @@
-import { exec } from 'child_process';
+import { exec, spawn, ChildProcessWithoutNullStreams } from 'child_process';
+import readline from 'readline';
 import util from 'util';
 import path from 'path';
+import os from 'os';
+import { promises as fs } from 'fs';
 import { AIPropertyData } from '@/app/(main)/admin/properties/import/ai-property-extraction';
 import { GoogleGenerativeAI } from "@google/generative-ai";
 import { PROPERTY_TYPES } from '@/lib/properties/constants';
@@ -14,28 +17,195 @@ export interface CrawlResult {
     html?: string;
     metadata?: any;
     media?: any;
+    network?: any;
+    timings?: Record<string, any>;
+    from_cache?: boolean;
+    cached_at?: number;
     error?: string;
+    // Set instead of html/markdown when the crawler wrote a large payload to a file
+    html_path?: string;
+    markdown_path?: string;
 }
 
-export async function crawlPropertyWithPython(url: string, interactionSelector?: string | null): Promise<CrawlResult> {
-    const scriptPath = path.join(process.cwd(), 'lib/crm/crawler/main.py');
+const CRAWLER_SCRIPT = 'lib/crm/crawler/main.py';
+const DAEMON_JOB_TIMEOUT_MS = 180_000;
+// Fields used by scrapePropertyWithCrawl4AI; large html/markdown come back as files
+const CRAWL_FIELDS = 'markdown,html,metadata,media,network,timings';
+const CRAWL_PAYLOAD_DIR = path.join(os.tmpdir(), 'crawl4ai-payloads');
+
+/** Read back (and delete) payload files the crawler wrote instead of inlining them. */
+async function loadPayloadFiles(result: CrawlResult): Promise<CrawlResult> {
+    const payloads = [['html', 'html_path'], ['markdown', 'markdown_path']] as const;
+    for (const [field, pathField] of payloads) {
+        const filePath = result[pathField];
+        if (!filePath) continue;
+        try {
+            result[field] = await fs.readFile(filePath, 'utf-8');
+        } finally {
+            delete result[pathField];
+            fs.unlink(filePath).catch(() => { });
+        }
+    }
+    return result;
+}
+
+type PendingJob = {
+    resolve: (result: CrawlResult) => void;
+    reject: (error: Error) => void;
+    timeoutMs: number;
+    timer: NodeJS.Timeout | null; // armed once the job is at the head of the queue
+};
+
+/**
+ * Long-running `main.py --serve` process that keeps one browser alive between crawls.
+ * Jobs and responses are JSON lines matched by id; the process restarts lazily if it exits.
+ * The daemon runs jobs one at a time in the order they were written, so a job's timeout
+ * only starts once every job ahead of it has answered.
+ */
+class CrawlerDaemonClient {
+    private child: ChildProcessWithoutNullStreams | null = null;
+    private ready: Promise<void> | null = null;
+    private pending = new Map<string, PendingJob>();
+    private nextId = 0;
+
+    private start(): Promise<void> {
+        const scriptPath = path.join(process.cwd(), CRAWLER_SCRIPT);
+        const args = [scriptPath, '--serve'];
+        if (process.env.CRAWL4AI_MAX_PAGES) args.push('--max-pages', process.env.CRAWL4AI_MAX_PAGES);
+        if (process.env.CRAWL4AI_MAX_RSS_MB) args.push('--max-rss-mb', process.env.CRAWL4AI_MAX_RSS_MB);
+
+        const child = spawn('python3', args, { stdio: ['pipe', 'pipe', 'pipe'] });
+        this.child = child;
+
+        child.stderr.on('data', (chunk) => console.log("[Crawl4AI Daemon] Stderr:", chunk.toString()));
+
+        this.ready = new Promise<void>((resolve, reject) => {
+            const lines = readline.createInterface({ input: child.stdout });
+            lines.on('line', (line) => {
+                let message: any;
+                try {
+                    message = JSON.parse(line);
+                } catch {
+                    console.log("[Crawl4AI Daemon] Ignoring non-JSON output:", line.slice(0, 200));
+                    return;
+                }
+                if (message.ready) {
+                    resolve();
+                    return;
+                }
+                const job = this.pending.get(message.id);
+                if (!job) return;
+                if (job.timer) clearTimeout(job.timer);
+                this.pending.delete(message.id);
+                this.armNext();
+                const { id, ...result } = message;
+                job.resolve(result as CrawlResult);
+            });
+
+            const fail = (error: Error) => {
+                if (this.child === child) {
+                    this.child = null;
+                    this.ready = null;
+                }
+                reject(error);
+                for (const [id, job] of this.pending) {
+                    if (job.timer) clearTimeout(job.timer);
+                    job.reject(error);
+                    this.pending.delete(id);
+                }
+            };
+            child.on('error', fail);
+            child.on('exit', (code) => fail(new Error(`Crawler daemon exited with code ${code}`)));
+            // Writing to a daemon that already died fails with EPIPE, possibly before 'exit' arrives;
+            // unhandled, that stream error would take down the whole Node process
+            child.stdin.on('error', (error) => {
+                fail(new Error(`Crawler daemon stdin failed: ${error.message}`));
+                child.kill();
+            });
+        });
+        return this.ready;
+    }
+
+    /** Start the timeout of the job the daemon is working on now (the oldest pending one). */
+    private armNext(): void {
+        const next = this.pending.entries().next();
+        if (next.done) return;
+        const [id, job] = next.value;
+        if (job.timer) return;
+        job.timer = setTimeout(() => {
+            this.pending.delete(id);
+            job.reject(new Error(`Crawler daemon timed out after ${job.timeoutMs}ms`));
+            // A hung browser is not worth keeping; the next job starts a fresh daemon
+            this.child?.kill();
+        }, job.timeoutMs);
+    }
+
+    private send(payload: Record<string, any>, timeoutMs = DAEMON_JOB_TIMEOUT_MS): Promise<CrawlResult> {
+        return (this.ready && this.child ? this.ready : this.start()).then(() => new Promise<CrawlResult>((resolve, reject) => {
+            const id = String(++this.nextId);
+            this.pending.set(id, { resolve, reject, timeoutMs, timer: null });
+            this.armNext();
+            this.child!.stdin.write(JSON.stringify({ id, ...payload }) + '\n');
+        }));
+    }
+
+    crawl(url: string, interactionSelector?: string | null, refresh = false): Promise<CrawlResult> {
+        return this.send({
+            cmd: 'crawl',
+            url,
+            interaction_selector: interactionSelector || null,
+            refresh,
+            fields: CRAWL_FIELDS,
+            payload_dir: CRAWL_PAYLOAD_DIR,
+        });
+    }
+
+    health(): Promise<any> {
+        return this.send({ cmd: 'health' }, 10_000);
+    }
+}
+
+let crawlerDaemon: CrawlerDaemonClient | null = null;
+
+function getCrawlerDaemon(): CrawlerDaemonClient {
+    if (!crawlerDaemon) crawlerDaemon = new CrawlerDaemonClient();
+    return crawlerDaemon;
+}
+
+export async function crawlerDaemonHealth(): Promise<any> {
+    return getCrawlerDaemon().health();
+}
+
+/**
+ * Crawl a property page. Results are cached by the crawler (URL + selector + JS profile),
+ * so retries with different AI hints reuse the rendered page; pass refresh to force a re-crawl.
+ */
+export async function crawlPropertyWithPython(url: string, interactionSelector?: string | null, refresh = false): Promise<CrawlResult> {
+    // Prefer the persistent browser; CRAWL4AI_DAEMON=0 forces one process per URL
+    if (process.env.CRAWL4AI_DAEMON !== '0') {
+        try {
+            return await loadPayloadFiles(await getCrawlerDaemon().crawl(url, interactionSelector, refresh));
+        } catch (error: any) {
+            console.error("[Crawl4AI] Daemon crawl failed, falling back to one-shot process:", error.message);
+        }
+    }
+    return crawlPropertyOneShot(url, interactionSelector, refresh);
+}
+
+async function crawlPropertyOneShot(url: string, interactionSelector?: string | null, refresh = false): Promise<CrawlResult> {
+    const scriptPath = path.join(process.cwd(), CRAWLER_SCRIPT);
     try {
         const selectorArg = interactionSelector ? interactionSelector : "null";
-        const command = `python3 "${scriptPath}" "${url}" "${selectorArg}"`;
+        const command = `python3 "${scriptPath}" "${url}" "${selectorArg}" --fields ${CRAWL_FIELDS} --payload-dir "${CRAWL_PAYLOAD_DIR}"${refresh ? ' --refresh' : ''}`;
         const { stdout, stderr } = await execPromise(command, { maxBuffer: 1024 * 1024 * 10 });
-        if (stderr && stderr.length > 0) console.log("[Crawl4AI] Stderr:", stderr);
+        if (stderr && stderr.length > 0) console.log("[Crawl4AI] Stderr:", stderr.slice(-20000));
 
-        // Log RAW output for debugging (Increased limit to see full execution logs)
-        console.log("[Crawl4AI] Raw Python Stdout (Snippet):", stdout.substring(0, 20000) + "...");
-
-        // Extract JSON from potential stdout noise
-        const start = stdout.indexOf('{');
-        const end = stdout.lastIndexOf('}');
-        if (start === -1 || end === -1) {
-            throw new Error("No JSON object found in Python output: " + stdout.slice(0, 100));
+        // The crawler frames its result as one JSON line on stdout; logs go to stderr
+        const line = stdout.trim().split('\n').pop();
+        if (!line) {
+            throw new Error("No JSON result in Python output");
         }
-        const jsonStr = stdout.substring(start, end + 1);
-        return JSON.parse(jsonStr);
+        return await loadPayloadFiles(JSON.parse(line));
     } catch (error: any) {
         console.error("Crawl4AI Execution Error:", error);
         return { success: false, error: error.message };
@@ -58,6 +228,15 @@ export async function scrapePropertyWithCrawl4AI(
     if (!crawlResult.success || !crawlResult.markdown) {
         throw new Error('Crawl failed: ' + (crawlResult.error || "No output"));
     }
+    if (crawlResult.timings) {
+        console.log("[Crawl4AI] Timings (ms):", JSON.stringify(crawlResult.timings));
+    }
+    if (crawlResult.from_cache) {
+        console.log(`[Crawl4AI] Using cached crawl from ${new Date(crawlResult.cached_at! * 1000).toISOString()}`);
+    }
+    if (crawlResult.network) {
+        console.log(`[Crawl4AI] Network: ${crawlResult.network.requests_blocked}/${crawlResult.network.requests} requests blocked (~${Math.round(crawlResult.network.bytes_saved_estimate / 1024)} KB saved)`);
+    }
 
     // Prepare Dynamic Prompt Data
     const featureKeys = FEATURE_CATEGORIES.flatMap(c => c.items.map(i => i.key));
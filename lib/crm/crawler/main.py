@@ -1,160 +1,1281 @@
-
 import sys
+import os
 import json
+import hashlib
+import sqlite3
+import zlib
+import time
 import asyncio
+import argparse
+import contextvars
+from urllib.parse import urlparse
 from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
 
-async def main():
-    if len(sys.argv) < 2:
-        print(json.dumps({"error": "No URL provided"}))
-        return
+try:
+    import psutil  # optional, used for browser RSS checks in --serve mode
+except ImportError:
+    psutil = None
 
-    url = sys.argv[1]
-    interaction_selector = sys.argv[2] if len(sys.argv) > 2 and sys.argv[2] != "null" else None
-    
-    # Configure Browser
-    browser_config = BrowserConfig(
-        headless=False, # Visible for debugging
-        verbose=True
-    )
+# Daemon mode (--serve): recycle the browser to keep long-running memory in check
+DEFAULT_MAX_PAGES = 50
+DEFAULT_MAX_RSS_MB = 1500
+
+# Batch mode (--batch): pages crawled at once over one browser
+DEFAULT_BATCH_CONCURRENCY = 4
+DEFAULT_PAGE_TIMEOUT = 120
 
+# Result fields a caller can ask for (--fields); large text payloads can go to files
+OUTPUT_FIELDS = ("markdown", "html", "metadata", "media", "network", "timings")
+PAYLOAD_EXTENSIONS = {"markdown": "md", "html": "html"}
+DEFAULT_INLINE_MAX_BYTES = 256 * 1024
+
+# Request interception: gallery extraction needs image URLs, not image bytes
+DEFAULT_BLOCK_TYPES = ("image", "media", "font")
+BLOCKED_DOMAINS = (
+    # analytics / trackers
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "googleadservices.com", "facebook.net", "connect.facebook.net", "facebook.com", "hotjar.com",
+    "clarity.ms", "segment.io", "mixpanel.com", "criteo.com", "taboola.com", "outbrain.com", "adnxs.com",
+    "bing.com", "linkedin.com", "tiktok.com", "yandex.ru",
+    # chat widgets
+    "intercom.io", "intercomcdn.com", "tawk.to", "zopim.com", "zendesk.com", "livechatinc.com",
+    "crisp.chat", "drift.com", "hubspot.com", "hs-scripts.com", "tidio.co", "smartsupp.com",
+    # map tiles / embeds
+    "maps.googleapis.com", "maps.gstatic.com", "tile.openstreetmap.org", "api.mapbox.com",
+    "tiles.mapbox.com", "arcgisonline.com",
+    # video embeds
+    "youtube.com", "ytimg.com", "vimeo.com", "vimeocdn.com",
+)
+# Rough transfer size per blocked request, used for the bytes-saved estimate
+BLOCKED_BYTES_ESTIMATE = {"image": 150_000, "media": 1_000_000, "font": 40_000,
+                          "script": 50_000, "stylesheet": 20_000}
+DEFAULT_BLOCKED_BYTES_ESTIMATE = 10_000
+
+# Crawl result cache: re-imports and AI re-extractions reuse the rendered page
+CRAWL_CACHE_DIR = ".crawl_cache"
+CRAWL_CACHE_TTL = 24 * 3600
+CRAWL_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Event-driven waits: every interaction shares one time budget per page
+DEFAULT_INTERACTION_BUDGET_MS = 8000
+# Gallery selectors known to work per domain (subdomains match); learned ones are added at runtime
+SEED_GALLERY_SELECTORS = {
+    "altia.com.cy": [{"selector": ".control--photo-gallery-btn", "xpath": False}],
+}
+LEARNED_SELECTOR_MAX_MISSES = 3
+
+# Shared helpers prepended to every js_command. Waits resolve on DOM mutation /
+# resource activity instead of sleeping, and never outlive the page budget.
+WAIT_HELPERS_JS = """
+    if (!window.__crawlDeadline) window.__crawlDeadline = Date.now() + __BUDGET_MS__;
+    const remaining = (ms) => Math.max(0, Math.min(ms, window.__crawlDeadline - Date.now()));
+
+    const findTarget = (selector, isXpath) => {
+        let el = null;
+        if (isXpath) {
+            el = document.evaluate(selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        } else {
+            el = document.querySelector(selector);
+        }
+        return el && el.offsetParent !== null ? el : null; // Must be visible
+    };
+
+    // Resolve once the DOM and network have been quiet for quietMs (or after maxMs)
+    const waitForSettle = (quietMs, maxMs) => new Promise(resolve => {
+        const limit = remaining(maxMs);
+        let quietTimer = null;
+        let observer = null, perf = null;
+        const done = () => {
+            clearTimeout(quietTimer); clearTimeout(hardTimer);
+            if (observer) observer.disconnect();
+            if (perf) perf.disconnect();
+            resolve();
+        };
+        const activity = () => { clearTimeout(quietTimer); quietTimer = setTimeout(done, quietMs); };
+        const hardTimer = setTimeout(done, limit);
+        observer = new MutationObserver(activity);
+        observer.observe(document.documentElement, { childList: true, subtree: true, attributes: true });
+        try {
+            perf = new PerformanceObserver(activity);
+            perf.observe({ type: 'resource' });
+        } catch (e) { perf = null; }
+        activity();
+    });
+
+    // Resolve with the first visible candidate (in priority order), or null once
+    // the page has settled for settleMs without one appearing (or after timeout)
+    const waitForAny = (candidates, timeout, settleMs) => new Promise(resolve => {
+        const check = () => {
+            for (const c of candidates) {
+                const el = findTarget(c.selector, c.xpath);
+                if (el) return { el, candidate: c };
+            }
+            return null;
+        };
+        const found = check();
+        if (found || remaining(timeout) === 0) return resolve(found);
+        let quietTimer = null;
+        const finish = (value) => {
+            clearTimeout(quietTimer); clearTimeout(hardTimer);
+            observer.disconnect();
+            resolve(value);
+        };
+        const hardTimer = setTimeout(() => finish(check()), remaining(timeout));
+        const observer = new MutationObserver(() => {
+            const hit = check();
+            if (hit) return finish(hit);
+            clearTimeout(quietTimer);
+            quietTimer = setTimeout(() => finish(null), settleMs);
+        });
+        observer.observe(document.documentElement, { childList: true, subtree: true, attributes: true });
+        quietTimer = setTimeout(() => finish(null), settleMs);
+    });
+
+    // Resolve once el is detached or hidden (e.g. a dismissed cookie banner)
+    const waitUntilGone = (el, timeout) => new Promise(resolve => {
+        const gone = () => !el.isConnected || el.offsetParent === null;
+        if (gone()) return resolve(true);
+        const finish = (value) => { clearTimeout(hardTimer); observer.disconnect(); resolve(value); };
+        const hardTimer = setTimeout(() => finish(gone()), remaining(timeout));
+        const observer = new MutationObserver(() => { if (gone()) finish(true); });
+        observer.observe(document.documentElement, { childList: true, subtree: true, attributes: true });
+    });
+"""
+
+_page_trace = contextvars.ContextVar("page_trace", default=None)
+
+
+def timed_js(name, body):
+    """Wrap a js_command so its wall time lands in window.__crawlTimings (return values pass through)"""
+    return f"""
+    const __phase = {{ name: {json.dumps(name)}, start: performance.now() }};
+    try {{
+        return await (async () => {{
+{body}
+        }})();
+    }} finally {{
+        __phase.end = performance.now();
+        (window.__crawlTimings = window.__crawlTimings || []).push(__phase);
+    }}
+    """
+
+
+def build_js_commands(interaction_selector, learned_selectors=None, budget_ms=DEFAULT_INTERACTION_BUDGET_MS):
     # Build JS Commands List
     js_commands = []
+    helpers = WAIT_HELPERS_JS.replace("__BUDGET_MS__", str(int(budget_ms)))
 
     # 1. Cookie Consent (Blocker Removal)
     # Try to click "Accept", "Agree", or specific classes like .cky-btn-accept
-    cookie_js = """
+    cookie_js = helpers + """
     try {
         const consentSelectors = [
             '.cky-btn-accept', // Altia specific
             '#onetrust-accept-btn-handler',
             '.cookie-accept',
-            'button[id*="cookie"][id*="accept"]', 
+            'button[id*="cookie"][id*="accept"]',
             'button[class*="cookie"][class*="accept"]'
         ];
-        
+
         for (const sel of consentSelectors) {
             const btn = document.querySelector(sel);
             if (btn) {
                 console.log("[Auto-Gallery] Found Cookie Consent Button by selector:", sel);
                 btn.click();
-                await new Promise(r => setTimeout(r, 1000)); // Wait for banner to go away
+                await waitUntilGone(btn, 1000); // Wait for banner to go away
                 break;
             }
         }
     } catch(e) { console.log("Cookie consent check error (non-fatal)", e); }
     """
-    js_commands.append(cookie_js)
+    js_commands.append(timed_js("cookie", cookie_js))
 
     # 2. Main Interaction Logic
     if interaction_selector:
          # --- Explicit User Selector ---
-         # (Previous logic for specific selector)
-         click_js = f"""
+         click_js = helpers + f"""
          try {{
-             const selector = "{interaction_selector}";
-             let el = document.querySelector(selector);
-             if (!el) {{
-                 // Try text fallback
-                 const xpath = "//*[contains(text(), '" + selector + "')]";
-                 const result = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null);
-                 el = result.singleNodeValue;
+             const selector = {json.dumps(interaction_selector)};
+             const xpath = "//*[contains(text(), " + JSON.stringify(selector) + ")]";
+             const candidates = [{{ selector, xpath: false }}, {{ selector: xpath, xpath: true }}];
+             let found = null;
+             try {{
+                 found = await waitForAny(candidates, window.__crawlDeadline - Date.now(), 1500);
+             }} catch (e) {{
+                 // Not a valid CSS selector: text fallback only
+                 found = await waitForAny([candidates[1]], window.__crawlDeadline - Date.now(), 1500);
              }}
-             if(el) {{
-                 el.scrollIntoView({{block: "center"}});
-                 await new Promise(r => setTimeout(r, 500));
-                 el.click();
+             if (found) {{
+                 found.el.scrollIntoView({{block: "center"}});
+                 await waitForSettle(100, 500);
+                 found.el.click();
                  console.log('Clicked user selector:', selector);
+                 await waitForSettle(300, 3000);
              }}
          }} catch(e) {{ console.error(e); }}
          """
-         js_commands.append(click_js)
+         js_commands.append(timed_js("gallery", click_js))
     else:
         # --- Default "Smart Auto-Gallery" Heuristic ---
-        heuristic_js = """
+        # Learned per-domain selectors go first, then text buttons, the Altia class and image alt text
+        heuristic_js = helpers + """
         try {
-            console.log("Running Smart Auto-Gallery Heuristics (Polling Mode)...");
-            
-            // Helper: Poll for element
-            async function waitForElement(xpathOrSelector, isXpath=false, timeout=5000) {
-                const startTime = Date.now();
-                while (Date.now() - startTime < timeout) {
-                    let el = null;
-                    if (isXpath) {
-                        const result = document.evaluate(xpathOrSelector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null);
-                        el = result.singleNodeValue;
-                    } else {
-                        el = document.querySelector(xpathOrSelector);
-                    }
-                    if (el && el.offsetParent !== null) return el; // Must optionally be visible
-                    await new Promise(r => setTimeout(r, 200));
-                }
-                return null;
-            }
+            console.log("Running Smart Auto-Gallery Heuristics (Event-driven)...");
+            const learned = __LEARNED__.map(c => ({ ...c, source: 'learned' }));
 
-            let el = null;
-            
-            // Priority 1: Text Buttons (Gallery, Photos, etc.)
             const textTargets = ['View Gallery', 'View Photos', 'See all photos', 'Show all photos', 'Phots', 'Images', 'View all media'];
             const xpathText = textTargets.map(t => `//button[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '${t.toLowerCase()}')]`).join(' | ');
-            
-            el = await waitForElement(xpathText, true, 3000);
-            if (el) console.log("[Auto-Gallery] Found Text Button:", el.innerText);
-
-            // Priority 1b: Specific Class (Altia)
-            if (!el) {
-                el = await waitForElement('.control--photo-gallery-btn', false, 2000);
-                if (el) console.log("[Auto-Gallery] Found Specific Class: .control--photo-gallery-btn");
-            }
+            const altTargets = ['listing image', 'main property image', 'gallery-trigger'];
+            const xpathAlt = altTargets.map(t => `//img[contains(translate(@alt, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '${t.toLowerCase()}')]`).join(' | ');
+            const heuristics = [
+                { selector: xpathText, xpath: true, source: 'text' },
+                { selector: '.control--photo-gallery-btn', xpath: false, source: 'class' },
+                { selector: xpathAlt, xpath: true, source: 'alt' },
+            ];
 
-            // Priority 2: Alt Text
-            if (!el) {
-                const altTargets = ['listing image', 'main property image', 'gallery-trigger'];
-                const xpathAlt = altTargets.map(t => `//img[contains(translate(@alt, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '${t.toLowerCase()}')]`).join(' | ');
-                el = await waitForElement(xpathAlt, true, 2000);
-                if (el) console.log("[Auto-Gallery] Found Image Alt:", el.getAttribute('alt'));
+            const started = Date.now();
+            let found = null;
+            if (learned.length) {
+                found = await waitForAny(learned, 2000, 750);
+                if (found) console.log("[Auto-Gallery] Found Learned Selector:", found.candidate.selector);
+            }
+            if (!found) {
+                // Give up as soon as the page settles without a gallery trigger
+                found = await waitForAny(heuristics, 7000, 750);
+                if (found) console.log("[Auto-Gallery] Found " + found.candidate.source + " target:", found.candidate.selector);
             }
 
-            if (el) {
-                console.log("[Auto-Gallery] CLICKING TARGET:", el);
-                el.scrollIntoView({block: "center"});
-                await new Promise(r => setTimeout(r, 500));
-                el.click();
-                await new Promise(r => setTimeout(r, 3000)); // Wait for gallery
+            if (found) {
+                console.log("[Auto-Gallery] CLICKING TARGET:", found.el);
+                found.el.scrollIntoView({block: "center"});
+                await waitForSettle(100, 500);
+                found.el.click();
+                await waitForSettle(300, 3000); // Wait for gallery
             } else {
                 console.log("[Auto-Gallery] No target found.");
             }
+            return { gallery: found ? { selector: found.candidate.selector, xpath: found.candidate.xpath, source: found.candidate.source } : null,
+                     learned_tried: learned.length, waited_ms: Date.now() - started };
 
         } catch(e) { console.log("Heuristic Error", e); }
-        """
-        js_commands.append(heuristic_js)
+        """.replace("__LEARNED__", json.dumps(learned_selectors or []))
+        js_commands.append(timed_js("gallery", heuristic_js))
+
+    # 3. Scroll Down (and let lazy-loaded content arrive)
+    js_commands.append(timed_js("scroll", helpers + """
+    window.scrollTo(0, document.body.scrollHeight);
+    await waitForSettle(200, 1500);
+    """))
+    return js_commands
+
+
+def build_browser_config(headless=True):
+    # Configure Browser
+    return BrowserConfig(
+        headless=headless, # --headed shows the browser for debugging
+        verbose=True
+    )
+
+
+class NetworkStats:
+    """Requests seen/blocked for one page, filled in by the page listeners and route handler"""
+
+    def __init__(self):
+        self.requests = 0
+        self.responses = 0
+        self.bytes_received = 0
+        self.blocked = 0
+        self.blocked_by_type = {}
+        self.bytes_saved_estimate = 0
+        self.blocked_images = []
+
+    def record_response(self, response):
+        self.responses += 1
+        try:
+            self.bytes_received += int(response.headers.get("content-length") or 0)
+        except (TypeError, ValueError):
+            pass
+
+    def record_blocked(self, resource_type, url, by_domain=False):
+        self.blocked += 1
+        self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+        self.bytes_saved_estimate += BLOCKED_BYTES_ESTIMATE.get(resource_type, DEFAULT_BLOCKED_BYTES_ESTIMATE)
+        # Tracker beacons are "images" too; only page images blocked by type are listing photos
+        if resource_type == "image" and not by_domain and url.startswith("http"):
+            self.blocked_images.append(url)
+
+    def to_dict(self):
+        return {
+            "requests": self.requests,
+            "responses": self.responses,
+            "bytes_received": self.bytes_received,
+            "requests_blocked": self.blocked,
+            "blocked_by_type": self.blocked_by_type,
+            "bytes_saved_estimate": self.bytes_saved_estimate,
+        }
+
+
+class PageTrace:
+    """
+    Per-page network stats and phase timestamps, recorded by the crawler hooks.
+
+    Phases (ms): navigation (goto), interaction (page ready + js_commands),
+    html_retrieval, processing (crawl4ai markdown/media extraction) and
+    output (result shaping); js holds each js_command's own wall time.
+    """
+
+    def __init__(self):
+        self.network = NetworkStats()
+        self.marks = {"start": time.perf_counter()}
+        self.js = {}
+
+    def mark(self, name):
+        self.marks[name] = time.perf_counter()
+
+    def span(self, start, end):
+        if start in self.marks and end in self.marks:
+            return round((self.marks[end] - self.marks[start]) * 1000, 1)
+        return None
 
-    # 3. Scroll Down
-    js_commands.append("window.scrollTo(0, document.body.scrollHeight);")
+    def record_js(self, phases):
+        for phase in phases or []:
+            if isinstance(phase, dict) and "end" in phase:
+                name = phase.get("name", "js")
+                self.js[name] = round(self.js.get(name, 0) + phase["end"] - phase["start"], 1)
 
+    def timings(self):
+        timings = {
+            "navigation": self.span("before_goto", "after_goto"),
+            "interaction": self.span("after_goto", "before_retrieve_html"),
+            "html_retrieval": self.span("before_retrieve_html", "before_return_html"),
+            "processing": self.span("before_return_html", "crawled"),
+            "js": self.js,
+            "total": self.span("start", "crawled"),
+        }
+        timings = {k: v for k, v in timings.items() if v is not None}
+        timings["requests"] = self.network.requests
+        timings["requests_blocked"] = self.network.blocked
+        timings["bytes_received"] = self.network.bytes_received
+        return timings
+
+
+def add_timing(output, name, ms):
+    """Add a phase measured outside crawl_page (e.g. browser launch) to an output dict"""
+    timings = output.get("timings")
+    if isinstance(timings, dict):
+        timings[name] = round(ms, 1)
+        if "total" in timings:
+            timings["total"] = round(timings["total"] + ms, 1)
+
+
+def is_blocked_domain(host, block_domains):
+    host = (host or "").lower()
+    return any(host == d or host.endswith("." + d) for d in block_domains)
+
+
+def selector_domain(url):
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class LearnedSelectors:
+    """
+    Per-domain gallery selectors that found a target before (SQLite), tried
+    ahead of the generic heuristics. Seeds from SEED_GALLERY_SELECTORS always
+    apply; learned selectors are dropped after repeated misses.
+    """
+
+    def __init__(self, directory=CRAWL_CACHE_DIR, max_misses=LEARNED_SELECTOR_MAX_MISSES):
+        os.makedirs(directory, exist_ok=True)
+        self.max_misses = max_misses
+        self._db = sqlite3.connect(os.path.join(directory, "selectors.sqlite"))
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS gallery_selectors (
+                domain TEXT,
+                selector TEXT,
+                xpath INTEGER,
+                hits INTEGER,
+                misses INTEGER,
+                updated_at REAL,
+                PRIMARY KEY (domain, selector)
+            )"""
+        )
+        self._db.commit()
+
+    def for_url(self, url):
+        """Candidates for this page's domain, best first"""
+        domain = selector_domain(url)
+        candidates = []
+        for seed_domain, seeds in SEED_GALLERY_SELECTORS.items():
+            if domain == seed_domain or domain.endswith("." + seed_domain):
+                candidates.extend(seeds)
+        rows = self._db.execute(
+            "SELECT selector, xpath FROM gallery_selectors WHERE domain = ? AND misses < ? ORDER BY hits DESC",
+            (domain, self.max_misses),
+        ).fetchall()
+        known = {c["selector"] for c in candidates}
+        candidates.extend({"selector": sel, "xpath": bool(xp)} for sel, xp in rows if sel not in known)
+        return candidates
+
+    def record(self, url, outcome):
+        """Learn from the heuristic script's return value ({gallery, learned_tried})"""
+        if not isinstance(outcome, dict):
+            return
+        domain = selector_domain(url)
+        gallery = outcome.get("gallery")
+        now = time.time()
+        if outcome.get("learned_tried") and not (gallery and gallery.get("source") == "learned"):
+            self._db.execute("UPDATE gallery_selectors SET misses = misses + 1, updated_at = ? WHERE domain = ?",
+                             (now, domain))
+        if gallery and gallery.get("selector"):
+            self._db.execute(
+                """INSERT INTO gallery_selectors VALUES (?, ?, ?, 1, 0, ?)
+                   ON CONFLICT (domain, selector) DO UPDATE SET hits = hits + 1, misses = 0, updated_at = excluded.updated_at""",
+                (domain, gallery["selector"], int(bool(gallery.get("xpath"))), now),
+            )
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+
+class CrawlProfile:
+    """
+    Browser settings, page interactions and request interception shared by
+    every crawl mode.
+
+    Requests are aborted by resource type and by domain blocklist; the per-page
+    NetworkStats come from a context variable set by crawl_page, so concurrent
+    pages on one crawler keep separate counts.
+    """
+
+    def __init__(self, headless=True, block_types=DEFAULT_BLOCK_TYPES, block_domains=BLOCKED_DOMAINS,
+                 interaction_budget_ms=DEFAULT_INTERACTION_BUDGET_MS, selectors=None):
+        self.headless = headless
+        self.block_types = set(block_types or ())
+        self.block_domains = tuple(block_domains or ())
+        self.interaction_budget_ms = interaction_budget_ms
+        self.selectors = selectors
+
+    def js_commands(self, url, interaction_selector, learned=True):
+        """JS for this page; learned gallery selectors only apply to the auto-gallery heuristic"""
+        candidates = None
+        if learned and not interaction_selector:
+            if self.selectors is not None:
+                candidates = self.selectors.for_url(url)
+            else:
+                domain = selector_domain(url)
+                candidates = [c for d, seeds in SEED_GALLERY_SELECTORS.items()
+                              if domain == d or domain.endswith("." + d) for c in seeds]
+        return build_js_commands(interaction_selector, candidates, self.interaction_budget_ms)
+
+    def learn(self, url, interaction_selector, result):
+        """Feed the auto-gallery outcome back into the learned selectors"""
+        if self.selectors is None or interaction_selector:
+            return
+        execution = getattr(result, "js_execution_result", None) or {}
+        outcomes = execution.get("results") or []
+        if len(outcomes) > 1:
+            self.selectors.record(url, outcomes[1])
+
+    def signature(self):
+        """Settings that change the crawl result (cache key component)"""
+        return json.dumps([sorted(self.block_types), list(self.block_domains)])
+
+    @property
+    def blocking(self):
+        return bool(self.block_types or self.block_domains)
+
+    def new_crawler(self):
+        crawler = AsyncWebCrawler(config=build_browser_config(self.headless))
+        strategy = crawler.crawler_strategy
+        strategy.set_hook("on_page_context_created", self.on_page_context_created)
+        for hook in ("before_goto", "after_goto", "before_return_html"):
+            strategy.set_hook(hook, self.mark_hook(hook))
+        strategy.set_hook("before_retrieve_html", self.before_retrieve_html)
+        return crawler
+
+    @staticmethod
+    def mark_hook(name):
+        async def hook(page, **kwargs):
+            trace = _page_trace.get()
+            if trace is not None:
+                trace.mark(name)
+            return page
+        return hook
+
+    async def before_retrieve_html(self, page, **kwargs):
+        trace = _page_trace.get()
+        if trace is not None:
+            trace.mark("before_retrieve_html")
+            try:
+                trace.record_js(await page.evaluate("window.__crawlTimings || []"))
+            except Exception:
+                pass  # timings are best effort; never fail the crawl over them
+        return page
+
+    async def on_page_context_created(self, page, context=None, **kwargs):
+        trace = _page_trace.get() or PageTrace()
+        stats = trace.network
+
+        def count_request(request):
+            stats.requests += 1
+
+        page.on("request", count_request)
+        page.on("response", stats.record_response)
+        if not self.blocking:
+            return page
+
+        async def route_request(route):
+            request = route.request
+            resource_type = request.resource_type
+            if is_blocked_domain(urlparse(request.url).hostname, self.block_domains):
+                stats.record_blocked(resource_type, request.url, by_domain=True)
+                await route.abort()
+            elif resource_type in self.block_types:
+                stats.record_blocked(resource_type, request.url)
+                await route.abort()
+            else:
+                await route.continue_()
+
+        await page.route("**/*", route_request)
+        return page
+
+
+def merge_blocked_images(media, blocked_images):
+    """Add image URLs that were blocked (never downloaded) to media["images"]"""
+    media = dict(media or {})
+    images = list(media.get("images") or [])
+    known = {img.get("src") if isinstance(img, dict) else img for img in images}
+    for src in blocked_images:
+        if src not in known:
+            known.add(src)
+            images.append({"src": src, "alt": "", "type": "image", "source": "blocked_request"})
+    media["images"] = images
+    return media
+
+
+def build_run_config(js_commands):
     # Configure Run
-    run_config = CrawlerRunConfig(
+    return CrawlerRunConfig(
         cache_mode=CacheMode.BYPASS,
         word_count_threshold=10,
         js_code=js_commands,
-        magic=True 
+        magic=True
     )
 
-    async with AsyncWebCrawler(config=browser_config) as crawler:
+
+class OutputOptions:
+    """
+    Which result fields to return, and where to put large text payloads.
+
+    With a payload_dir, markdown/html larger than inline_max_bytes are written
+    to files and replaced by "<field>_path" (plus "<field>_bytes") in the result.
+    """
+
+    def __init__(self, fields=None, payload_dir=None, inline_max_bytes=DEFAULT_INLINE_MAX_BYTES):
+        fields = list(fields) if fields else list(OUTPUT_FIELDS)
+        unknown = [f for f in fields if f not in OUTPUT_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown output fields: {', '.join(unknown)} (choose from {', '.join(OUTPUT_FIELDS)})")
+        self.fields = fields
+        self.payload_dir = payload_dir
+        self.inline_max_bytes = inline_max_bytes
+
+    def for_job(self, job):
+        """Per-job overrides ("fields", "payload_dir") on top of these defaults"""
+        if "fields" not in job and "payload_dir" not in job:
+            return self
+        fields = job.get("fields", self.fields)
+        if isinstance(fields, str):
+            fields = parse_fields(fields)
+        return OutputOptions(fields, job.get("payload_dir", self.payload_dir), self.inline_max_bytes)
+
+    def shape(self, url, values):
+        # Cache entries written before "success" was recorded were all successful
+        output = {"success": values.get("success", True)}
+        if not output["success"]:
+            output["error"] = values.get("error") or "Crawl failed"
+        for field in self.fields:
+            value = values.get(field)
+            if field in PAYLOAD_EXTENSIONS and self.payload_dir and value is not None:
+                data = str(value).encode("utf-8")
+                if len(data) > self.inline_max_bytes:
+                    output[f"{field}_path"] = self.write_payload(url, field, data)
+                    output[f"{field}_bytes"] = len(data)
+                    continue
+            output[field] = value
+        return output
+
+    def write_payload(self, url, field, data):
+        os.makedirs(self.payload_dir, exist_ok=True)
+        name = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+        path = os.path.join(self.payload_dir, f"{name}-{os.getpid()}-{int(time.time() * 1000)}.{PAYLOAD_EXTENSIONS[field]}")
+        with open(path, "wb") as f:
+            f.write(data)
+        return os.path.abspath(path)
+
+
+def parse_fields(value):
+    return [f.strip() for f in value.split(",") if f.strip()]
+
+
+class CrawlCache:
+    """
+    Content-addressed crawl results (SQLite), keyed on URL + interaction
+    selector + JS/browser profile.
+
+    The full, unshaped result is stored zlib-compressed, so any --fields
+    selection can be served from it. Entries older than `ttl` are ignored
+    and dropped; least recently used entries are evicted to stay under
+    `max_bytes`.
+    """
+
+    def __init__(self, directory=CRAWL_CACHE_DIR, ttl=CRAWL_CACHE_TTL, max_bytes=CRAWL_CACHE_MAX_BYTES):
+        os.makedirs(directory, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._db = sqlite3.connect(os.path.join(directory, "crawls.sqlite"))
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS crawls (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                body BLOB,
+                size INTEGER,
+                crawled_at REAL,
+                accessed_at REAL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS crawls_accessed ON crawls (accessed_at)")
+        self.expire()
+
+    @staticmethod
+    def key(url, interaction_selector, profile):
+        """Hash of everything that changes what a crawl returns"""
+        # Learned selectors only change how fast the gallery is found, not what is returned
+        js = profile.js_commands(url, interaction_selector, learned=False)
+        js_profile = hashlib.sha256("\n".join(js).encode("utf-8")).hexdigest()
+        parts = [url, interaction_selector or "", js_profile, profile.signature()]
+        return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the stored result values for key, or None"""
+        row = self._db.execute("SELECT body, crawled_at FROM crawls WHERE key = ?", (key,)).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        self._db.execute("UPDATE crawls SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        self._db.commit()
+        values = json.loads(zlib.decompress(row[0]))
+        values["cached_at"] = row[1]
+        return values
+
+    def store(self, key, url, values):
+        body = zlib.compress(json.dumps(values).encode("utf-8"))
+        if len(body) > self.max_bytes:
+            return
+        now = time.time()
+        self._db.execute("INSERT OR REPLACE INTO crawls VALUES (?, ?, ?, ?, ?, ?)",
+                         (key, url, sqlite3.Binary(body), len(body), now, now))
+        self._db.commit()
+        self.evict()
+
+    def expire(self):
+        """Drop entries older than the TTL"""
+        self._db.execute("DELETE FROM crawls WHERE crawled_at < ?", (time.time() - self.ttl,))
+        self._db.commit()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM crawls").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM crawls ORDER BY accessed_at").fetchall():
+            self._db.execute("DELETE FROM crawls WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+
+def cached_page(cache, url, interaction_selector, profile, output=None):
+    """Shaped output for a fresh cached crawl of this page, or None"""
+    if cache is None:
+        return None
+    started = time.perf_counter()
+    values = cache.get(CrawlCache.key(url, interaction_selector, profile))
+    if values is None:
+        return None
+    elapsed = round((time.perf_counter() - started) * 1000, 1)
+    values["timings"] = {"cache_lookup": elapsed, "total": elapsed}
+    shaped = (output or OutputOptions()).shape(url, values)
+    shaped["from_cache"] = True
+    shaped["cached_at"] = values["cached_at"]
+    return shaped
+
+
+async def crawl_page(crawler, url, interaction_selector=None, output=None, cache=None, profile=None):
+    """
+    Crawl one property page with an already running crawler and return the
+    output dict; successful crawls are stored in `cache` when given.
+
+    crawl4ai reports failures (HTTP errors, blocked or timed out pages) as
+    result.success=False rather than raising; those are passed through to
+    the output and never cached.
+    """
+    profile = profile or CrawlProfile()
+    run_config = build_run_config(profile.js_commands(url, interaction_selector))
+    trace = PageTrace()
+    token = _page_trace.set(trace)
+    try:
         result = await crawler.arun(url=url, config=run_config)
-        
-        output = {
-            "success": True,
-            "markdown": result.markdown,
-            "html": result.html, 
-            "metadata": result.metadata,
-            "media": result.media if hasattr(result, 'media') else {}
+    finally:
+        _page_trace.reset(token)
+    trace.mark("crawled")
+    profile.learn(url, interaction_selector, result)
+
+    media = result.media if hasattr(result, 'media') else {}
+    values = {
+        "success": bool(result.success),
+        "error": None if result.success else result.error_message,
+        "markdown": result.markdown,
+        "html": result.html,
+        "metadata": result.metadata,
+        "media": merge_blocked_images(media, trace.network.blocked_images),
+        "network": trace.network.to_dict(),
+    }
+    if cache is not None and result.success:
+        cache.store(CrawlCache.key(url, interaction_selector, profile), url, values)
+
+    # Timings describe this run only, so they are added after caching
+    values["timings"] = timings = trace.timings()
+    shaped = (output or OutputOptions()).shape(url, values)
+    trace.mark("shaped")
+    timings["output"] = trace.span("crawled", "shaped")
+    timings["total"] = trace.span("start", "shaped")
+    return shaped
+
+
+async def run_once(url, interaction_selector, output=None, profile=None, cache=None, refresh=False):
+    open_protocol_stdout()
+    profile = profile or CrawlProfile()
+    hit = None if refresh else cached_page(cache, url, interaction_selector, profile, output)
+    if hit is not None:
+        log_timings(url, hit)
+        emit(hit)
+        return
+    launch_started = time.perf_counter()
+    crawler = profile.new_crawler()
+    await crawler.start()
+    launch_ms = (time.perf_counter() - launch_started) * 1000
+    try:
+        result = await crawl_page(crawler, url, interaction_selector, output, cache, profile)
+    finally:
+        await crawler.close()
+    add_timing(result, "launch", launch_ms)
+    log_timings(url, result)
+    emit(result)
+
+
+def process_tree_rss_mb():
+    """RSS of this process plus all children (the browser), or None if it cannot be measured"""
+    if psutil is not None:
+        try:
+            me = psutil.Process()
+            processes = [me] + me.children(recursive=True)
+            total = 0
+            for proc in processes:
+                try:
+                    total += proc.memory_info().rss
+                except psutil.Error:
+                    pass
+            return total / (1024 * 1024)
+        except psutil.Error:
+            return None
+
+    # Linux fallback without psutil: walk /proc for descendants
+    if not os.path.isdir("/proc"):
+        return None
+    parents = {}
+    rss_pages = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            parents[int(entry)] = int(fields[1])
+            rss_pages[int(entry)] = int(fields[21])
+        except (OSError, IndexError, ValueError):
+            continue
+    tree = {os.getpid()}
+    changed = True
+    while changed:
+        changed = False
+        for pid, ppid in parents.items():
+            if ppid in tree and pid not in tree:
+                tree.add(pid)
+                changed = True
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    return sum(rss_pages.get(pid, 0) for pid in tree) * page_size / (1024 * 1024)
+
+
+class CrawlerDaemon:
+    """
+    Keeps one AsyncWebCrawler (and its browser) alive across crawl jobs.
+
+    The browser is recycled after `max_pages` crawls or when the process tree
+    grows past `max_rss_mb`, which keeps long-running memory bounded.
+    """
+
+    def __init__(self, max_pages=DEFAULT_MAX_PAGES, max_rss_mb=DEFAULT_MAX_RSS_MB, output=None, profile=None,
+                 cache=None):
+        self.output = output or OutputOptions()
+        self.profile = profile or CrawlProfile()
+        self.cache = cache
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.crawler = None
+        self.generation = 0
+        self.pages_since_launch = 0
+        self.pages_total = 0
+        self.started_at = time.time()
+        self.lock = asyncio.Lock()
+
+    async def ensure_crawler(self):
+        if self.crawler is None:
+            self.crawler = self.profile.new_crawler()
+            await self.crawler.start()
+            self.generation += 1
+            self.pages_since_launch = 0
+        return self.crawler
+
+    async def recycle(self, reason):
+        if self.crawler is not None:
+            print(f"[Crawler Daemon] Recycling browser ({reason})", file=sys.stderr)
+            try:
+                await self.crawler.close()
+            except Exception as e:
+                print(f"[Crawler Daemon] Error closing browser: {e}", file=sys.stderr)
+            self.crawler = None
+
+    async def maybe_recycle(self):
+        if self.max_pages and self.pages_since_launch >= self.max_pages:
+            await self.recycle(f"{self.pages_since_launch} pages")
+            return
+        rss = process_tree_rss_mb()
+        if self.max_rss_mb and rss is not None and rss > self.max_rss_mb:
+            await self.recycle(f"RSS {rss:.0f} MB > {self.max_rss_mb} MB")
+
+    def health(self):
+        rss = process_tree_rss_mb()
+        return {
+            "ok": True,
+            "browser_running": self.crawler is not None,
+            "browser_generation": self.generation,
+            "pages_since_launch": self.pages_since_launch,
+            "pages_total": self.pages_total,
+            "rss_mb": round(rss, 1) if rss is not None else None,
+            "uptime_seconds": round(time.time() - self.started_at, 1),
         }
-        
-        print(json.dumps(output))
+
+    async def handle(self, job):
+        """Run one job dict and return the response dict (always carries the job id)"""
+        job_id = job.get("id")
+        command = job.get("cmd", "crawl")
+
+        if command == "health":
+            return {"id": job_id, **self.health()}
+        if command == "recycle":
+            async with self.lock:
+                await self.recycle("requested")
+            return {"id": job_id, **self.health()}
+        if command != "crawl":
+            return {"id": job_id, "success": False, "error": f"Unknown command: {command}"}
+
+        url = job.get("url")
+        if not url:
+            return {"id": job_id, "success": False, "error": "No URL provided"}
+
+        try:
+            options = self.output.for_job(job)
+        except ValueError as e:
+            return {"id": job_id, "success": False, "error": str(e)}
+
+        selector = job.get("interaction_selector")
+        if not job.get("refresh"):
+            hit = cached_page(self.cache, url, selector, self.profile, options)
+            if hit is not None:
+                log_timings(url, hit)
+                return {"id": job_id, **hit}
+
+        async with self.lock:
+            try:
+                launch_started = time.perf_counter()
+                launched = self.crawler is None
+                crawler = await self.ensure_crawler()
+                launch_ms = (time.perf_counter() - launch_started) * 1000
+                output = await crawl_page(crawler, url, selector, options, self.cache, self.profile)
+                if launched:
+                    add_timing(output, "launch", launch_ms)
+            except Exception as e:
+                # A broken browser should not poison the next job
+                await self.recycle(f"error: {e}")
+                output = {"success": False, "error": str(e)}
+            else:
+                self.pages_since_launch += 1
+                self.pages_total += 1
+                log_timings(url, output)
+                await self.maybe_recycle()
+        return {"id": job_id, **output}
+
+    async def close(self):
+        await self.recycle("shutdown")
+        if self.cache is not None:
+            self.cache.close()
+        if self.profile.selectors is not None:
+            self.profile.selectors.close()
+
+
+_protocol = None
+_timings_log = None
+
+
+class TimingsLog:
+    """Append-only JSONL of per-page timings across runs (--timings-log), summarized by --timings-report"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def record(self, url, message):
+        timings = message.get("timings")
+        if not isinstance(timings, dict) or not url:
+            return
+        entry = {"ts": round(time.time(), 3), "url": url, "domain": selector_domain(url),
+                 "success": message.get("success"), "from_cache": bool(message.get("from_cache")),
+                 "timings": timings}
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+def log_timings(url, output):
+    if _timings_log is not None:
+        _timings_log.record(url, output)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0
+
+
+def print_timings_report(path, top=10):
+    """p50/p95 per phase and the slowest domains from a --timings-log file"""
+    phases, domains = {}, {}
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get("from_cache"):
+                continue
+            timings = entry.get("timings", {})
+            for name, value in timings.items():
+                if name == "js" and isinstance(value, dict):
+                    for js_name, ms in value.items():
+                        phases.setdefault(f"js.{js_name}", []).append(ms)
+                elif name not in ("requests", "requests_blocked", "bytes_received") and isinstance(value, (int, float)):
+                    phases.setdefault(name, []).append(value)
+            if "total" in timings:
+                domains.setdefault(entry.get("domain", "?"), []).append(timings["total"])
+
+    print(f"{'phase':<20} {'count':>6} {'p50 ms':>10} {'p95 ms':>10}")
+    for name, values in sorted(phases.items(), key=lambda item: -percentile(item[1], 0.5)):
+        print(f"{name:<20} {len(values):>6} {percentile(values, 0.5):>10.0f} {percentile(values, 0.95):>10.0f}")
+    print(f"\nSlowest domains (median total ms):")
+    slowest = sorted(domains.items(), key=lambda item: -percentile(item[1], 0.5))[:top]
+    for domain, values in slowest:
+        print(f"  {domain:<40} {percentile(values, 0.5):>10.0f}  ({len(values)} pages)")
+
+
+def open_protocol_stdout():
+    """
+    Reserve the real stdout for JSON responses and point fd 1 at stderr, so
+    crawl4ai/browser log output can never interleave with protocol lines.
+    """
+    global _protocol
+    if _protocol is None:
+        sys.stdout.flush()
+        _protocol = os.fdopen(os.dup(sys.stdout.fileno()), "w", buffering=1)
+        os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    return _protocol
+
+
+def emit(message):
+    """Write one JSON line to the protocol stream (the real stdout)"""
+    print(json.dumps(message), file=_protocol or sys.stdout, flush=True)
+
+
+def parse_job(line):
+    try:
+        job = json.loads(line)
+        if not isinstance(job, dict):
+            raise ValueError("job must be a JSON object")
+        return job, None
+    except ValueError as e:
+        return None, {"success": False, "error": f"Invalid job: {e}"}
+
+
+async def serve_stdio(daemon):
+    """JSON lines protocol: one job per stdin line, one response per stdout line"""
+    open_protocol_stdout()
+    loop = asyncio.get_running_loop()
+    emit({"ready": True, **daemon.health()})
+    while True:
+        line = await loop.run_in_executor(None, sys.stdin.readline)
+        if not line:
+            break
+        if not line.strip():
+            continue
+        job, error = parse_job(line)
+        if job is not None and job.get("cmd") == "shutdown":
+            emit({"id": job.get("id"), "ok": True})
+            break
+        response = error if job is None else await daemon.handle(job)
+        emit(response)
+    await daemon.close()
+
+
+async def serve_socket(daemon, socket_path):
+    """Same JSON lines protocol over a Unix domain socket (one connection per client)"""
+    open_protocol_stdout()  # keep stdout quiet for whoever launched us
+    stop = asyncio.Event()
+
+    async def handle_client(reader, writer):
+        try:
+            while not reader.at_eof():
+                line = await reader.readline()
+                if not line.strip():
+                    continue
+                job, error = parse_job(line)
+                if job is not None and job.get("cmd") == "shutdown":
+                    writer.write((json.dumps({"id": job.get("id"), "ok": True}) + "\n").encode())
+                    await writer.drain()
+                    stop.set()
+                    break
+                response = error if job is None else await daemon.handle(job)
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = await asyncio.start_unix_server(handle_client, path=socket_path)
+    print(f"[Crawler Daemon] Listening on {socket_path}", file=sys.stderr)
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        await daemon.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def read_batch_jobs(source):
+    """
+    Parse batch input: one job per line, either a JSON object
+    {"id", "url", "interaction_selector"} or "<url> [selector]".
+    Blank lines and lines starting with # are skipped.
+    """
+    jobs = []
+    for index, raw in enumerate(source):
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            job, error = parse_job(line)
+            if job is None:
+                jobs.append({"id": index, "url": None, "error": error["error"]})
+                continue
+            job.setdefault("id", index)
+        else:
+            parts = line.split(None, 1)
+            job = {"id": index, "url": parts[0],
+                   "interaction_selector": parts[1] if len(parts) > 1 else None}
+        if job.get("interaction_selector") == "null":
+            job["interaction_selector"] = None
+        jobs.append(job)
+    return jobs
+
+
+async def run_batch(jobs, concurrency=DEFAULT_BATCH_CONCURRENCY, page_timeout=DEFAULT_PAGE_TIMEOUT, output=None,
+                    profile=None, cache=None, refresh=False):
+    """
+    Crawl all jobs over one browser with at most `concurrency` pages open and
+    stream one NDJSON line per page as soon as it finishes (completion order).
+    A failing or slow page only produces an error line for that page.
+    """
+    open_protocol_stdout()
+    output_options = output or OutputOptions()
+    profile = profile or CrawlProfile()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    started = time.time()
+    succeeded = 0
+
+    async def crawl_job(crawler, job):
+        if not job.get("url"):
+            return {"id": job.get("id"), "url": None, "success": False,
+                    "error": job.get("error", "No URL provided")}
+        page_started = time.time()
+        if not (refresh or job.get("refresh")):
+            try:
+                hit = cached_page(cache, job["url"], job.get("interaction_selector"), profile,
+                                  output_options.for_job(job))
+            except ValueError as e:
+                hit = {"success": False, "error": str(e)}
+            if hit is not None:
+                hit["elapsed_seconds"] = round(time.time() - page_started, 2)
+                return {"id": job.get("id"), "url": job["url"], **hit}
+        async with semaphore:
+            page_started = time.time()
+            try:
+                output = await asyncio.wait_for(
+                    crawl_page(crawler, job["url"], job.get("interaction_selector"),
+                               output_options.for_job(job), cache, profile),
+                    timeout=page_timeout or None,
+                )
+            except asyncio.TimeoutError:
+                output = {"success": False, "error": f"Timed out after {page_timeout}s"}
+            except Exception as e:
+                output = {"success": False, "error": str(e)}
+            output["elapsed_seconds"] = round(time.time() - page_started, 2)
+            return {"id": job.get("id"), "url": job["url"], **output}
+
+    crawler = profile.new_crawler()
+    await crawler.start()
+    launch_seconds = time.time() - started
+    try:
+        tasks = [asyncio.ensure_future(crawl_job(crawler, job)) for job in jobs]
+        for finished in asyncio.as_completed(tasks):
+            output = await finished
+            if output.get("success"):
+                succeeded += 1
+            log_timings(output.get("url"), output)
+            emit(output)
+    finally:
+        await crawler.close()
+
+    elapsed = time.time() - started
+    per_minute = len(jobs) / elapsed * 60 if elapsed > 0 else 0
+    print(f"[Crawler Batch] {succeeded}/{len(jobs)} pages OK in {elapsed:.1f}s "
+          f"({per_minute:.1f} listings/min, concurrency {concurrency}, browser launch {launch_seconds:.1f}s)",
+          file=sys.stderr)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Crawl property pages with crawl4ai")
+    parser.add_argument("url", nargs="?", help="property page URL (one-shot mode)")
+    parser.add_argument("interaction_selector", nargs="?", help='CSS selector / text to click, or "null"')
+    parser.add_argument("--serve", action="store_true",
+                        help="keep the browser alive and read JSON crawl jobs from stdin (or --socket)")
+    parser.add_argument("--socket", help="serve jobs on this Unix domain socket instead of stdin/stdout")
+    parser.add_argument("--max-pages", type=int, default=DEFAULT_MAX_PAGES,
+                        help=f"recycle the browser after this many pages (default: {DEFAULT_MAX_PAGES}, 0 = never)")
+    parser.add_argument("--max-rss-mb", type=int, default=DEFAULT_MAX_RSS_MB,
+                        help=f"recycle the browser above this RSS (default: {DEFAULT_MAX_RSS_MB}, 0 = never)")
+    parser.add_argument("--fields", type=parse_fields, default=list(OUTPUT_FIELDS),
+                        help=f"comma-separated result fields to return (default: {','.join(OUTPUT_FIELDS)})")
+    parser.add_argument("--payload-dir",
+                        help="write markdown/html larger than --inline-max-bytes to files here and return their paths")
+    parser.add_argument("--inline-max-bytes", type=int, default=DEFAULT_INLINE_MAX_BYTES,
+                        help=f"largest payload kept inline when --payload-dir is set (default: {DEFAULT_INLINE_MAX_BYTES})")
+    parser.add_argument("--headed", action="store_true",
+                        help="show the browser window (default: headless)")
+    parser.add_argument("--block-types", type=parse_fields, default=list(DEFAULT_BLOCK_TYPES),
+                        help=f"resource types to abort (default: {','.join(DEFAULT_BLOCK_TYPES)}; image URLs are still reported in media)")
+    parser.add_argument("--no-block", action="store_true",
+                        help="load every resource (disables type and domain blocking)")
+    parser.add_argument("--cache-dir", default=CRAWL_CACHE_DIR,
+                        help=f"crawl result cache directory (default: {CRAWL_CACHE_DIR})")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write the crawl result cache")
+    parser.add_argument("--refresh", action="store_true",
+                        help="ignore cached results and re-crawl (the fresh result is still cached)")
+    parser.add_argument("--cache-ttl-hours", type=float, default=CRAWL_CACHE_TTL / 3600,
+                        help=f"reuse cached crawls younger than this (default: {CRAWL_CACHE_TTL // 3600})")
+    parser.add_argument("--cache-max-mb", type=int, default=CRAWL_CACHE_MAX_BYTES // (1024 * 1024),
+                        help=f"evict least recently used crawls above this size (default: {CRAWL_CACHE_MAX_BYTES // (1024 * 1024)})")
+    parser.add_argument("--interaction-budget-ms", type=int, default=DEFAULT_INTERACTION_BUDGET_MS,
+                        help=f"time budget for cookie/gallery/scroll waits per page (default: {DEFAULT_INTERACTION_BUDGET_MS})")
+    parser.add_argument("--no-learn", action="store_true",
+                        help="do not remember per-domain gallery selectors (seed selectors still apply)")
+    parser.add_argument("--timings-log", metavar="PATH",
+                        help="append per-page timings to this JSONL file (aggregated across runs)")
+    parser.add_argument("--timings-report", metavar="PATH",
+                        help="print p50/p95 per phase and the slowest domains from a --timings-log file, then exit")
+    parser.add_argument("--batch", metavar="FILE",
+                        help='crawl every URL in FILE ("-" for stdin) and stream NDJSON results')
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_BATCH_CONCURRENCY,
+                        help=f"pages crawled at once in --batch mode (default: {DEFAULT_BATCH_CONCURRENCY})")
+    parser.add_argument("--page-timeout", type=int, default=DEFAULT_PAGE_TIMEOUT,
+                        help=f"seconds before a batch page is abandoned (default: {DEFAULT_PAGE_TIMEOUT}, 0 = none)")
+    return parser.parse_args(argv)
+
+
+async def main():
+    global _timings_log
+    args = parse_args()
+    if args.timings_report:
+        print_timings_report(args.timings_report)
+        return
+    if args.timings_log:
+        _timings_log = TimingsLog(args.timings_log)
+    output = OutputOptions(args.fields, args.payload_dir, args.inline_max_bytes)
+    selectors = None if args.no_learn else LearnedSelectors(args.cache_dir)
+    profile = CrawlProfile(headless=not args.headed, block_types=args.block_types,
+                           interaction_budget_ms=args.interaction_budget_ms, selectors=selectors)
+    if args.no_block:
+        profile.block_types, profile.block_domains = set(), ()
+    cache = None
+    if not args.no_cache:
+        cache = CrawlCache(args.cache_dir, ttl=args.cache_ttl_hours * 3600,
+                           max_bytes=args.cache_max_mb * 1024 * 1024)
+
+    if args.serve or args.socket:
+        daemon = CrawlerDaemon(max_pages=args.max_pages, max_rss_mb=args.max_rss_mb, output=output, profile=profile,
+                               cache=cache)
+        if args.socket:
+            await serve_socket(daemon, args.socket)
+        else:
+            await serve_stdio(daemon)
+        return
+
+    if args.batch:
+        if args.batch == "-":
+            jobs = read_batch_jobs(sys.stdin)
+        else:
+            with open(args.batch) as f:
+                jobs = read_batch_jobs(f)
+        await run_batch(jobs, concurrency=args.concurrency, page_timeout=args.page_timeout, output=output,
+                        profile=profile, cache=cache, refresh=args.refresh)
+        return
+
+    if not args.url:
+        emit({"error": "No URL provided"})
+        return
+
+    url = args.url
+    interaction_selector = args.interaction_selector if args.interaction_selector and args.interaction_selector != "null" else None
+    await run_once(url, interaction_selector, output, profile, cache, args.refresh)
 
 if __name__ == "__main__":
     try:
         asyncio.run(main())
     except Exception as e:
-        print(json.dumps({"success": False, "error": str(e)}))
+        emit({"success": False, "error": str(e)})
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+Feed discovery benchmark against a simulated multi-domain feed server.
+
+Starts a local HTTP server (in its own process) that pretends to be N agency
+sites: configurable latency, error rate, soft-404 catch-all pages, www
+redirects, sitemap indexes and listing feeds from a few KB to hundreds of MB.
+FeedDiscovery is pointed at it through an HTTP proxy setting, so the real
+fetch_url / validate_candidate / run_discovery code paths are measured.
+
+Reports wall time, requests/sec, peak RSS of the discovery process and bytes
+served per domain. Use --json-out to append a result line for comparing runs.
+
+Usage:
+    python3 scripts/bench-feed-discovery.py --domains 50 --feed-sizes 4K,1M,200M --stream
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from contextlib import redirect_stdout
+from dataclasses import dataclass, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from discover_cyprus_feeds import (  # noqa: E402
+    FEED_PATTERNS, FETCH_RETRIES, SITEMAP_PATTERNS, FeedDiscovery, PatternStats,
+)
+
+CONTROL_HOST = "bench.control"
+DOMAIN_SUFFIX = "bench.test"
+CHUNK_SIZE = 64 * 1024
+SITEMAP_PAGES = 200  # page URLs per simulated sitemap
+TAIL_FACTOR = 20  # slowdown of a tail-latency response
+
+
+@dataclass
+class SiteProfile:
+    """How one simulated domain behaves"""
+    domain: str
+    latency: float  # seconds added before every response
+    error_rate: float  # share of requests answered with 503 or a dropped connection
+    tail_rate: float  # share of requests answered TAIL_FACTOR times slower than usual
+    soft_404: bool  # unknown paths return 200 + the same HTML shell
+    redirect_www: bool  # bare host 301-redirects to www.<domain>
+    sitemap_index: bool  # /sitemap_index.xml with nested child sitemaps
+    feed_path: Optional[str]  # where the listings feed lives, if any
+    feed_in_sitemap: bool  # feed is only discoverable through a sitemap <loc>
+    feed_size: int  # bytes
+    platform: str  # "wordpress" sites advertise wp-json in a Link header
+
+
+def parse_size(value: str) -> int:
+    """'512', '4K', '10M', '1G' -> bytes"""
+    value = value.strip().upper()
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+
+def build_profiles(args: argparse.Namespace) -> List[SiteProfile]:
+    """Deterministic site profiles for a given seed"""
+    sizes = [parse_size(size) for size in args.feed_sizes.split(",")]
+    direct_patterns = [p for p in FEED_PATTERNS if p not in SITEMAP_PATTERNS and "?" not in p]
+    profiles = []
+    for i in range(args.domains):
+        rng = random.Random(f"{args.seed}:{i}")
+        has_feed = rng.random() < args.feed_rate
+        in_sitemap = has_feed and rng.random() < args.sitemap_feed_rate
+        # Own RNG stream, so profiles for a given seed match runs made before platforms existed
+        platform = "wordpress" if random.Random(f"{args.seed}:{i}:platform").random() < args.wordpress_rate else "unknown"
+        feed_path = None
+        if has_feed and in_sitemap:
+            feed_path = "/export/portal-listings.xml"
+        elif has_feed and args.pattern_skew > 0:
+            # Zipf-like popularity over a per-platform ranking of the patterns
+            ranked = sorted(direct_patterns, key=lambda p: random.Random(f"{platform}:{p}").random())
+            weights = [1.0 / (rank + 1) ** args.pattern_skew for rank in range(len(ranked))]
+            feed_path = rng.choices(ranked, weights)[0]
+        elif has_feed:
+            feed_path = rng.choice(direct_patterns)
+        profiles.append(SiteProfile(
+            domain=f"site-{i:04d}.{DOMAIN_SUFFIX}",
+            latency=args.latency_ms / 1000.0 * rng.uniform(0.5, 1.5),
+            error_rate=args.error_rate,
+            tail_rate=args.tail_rate,
+            soft_404=rng.random() < args.soft_404_rate,
+            redirect_www=rng.random() < args.redirect_rate,
+            sitemap_index=rng.random() < args.sitemap_index_rate,
+            feed_path=feed_path,
+            feed_in_sitemap=in_sitemap,
+            feed_size=sizes[i % len(sizes)],
+            platform=platform,
+        ))
+    return profiles
+
+
+# ---------------------------------------------------------------------------
+# Simulated server
+# ---------------------------------------------------------------------------
+
+def listing_feed(domain: str, size: int) -> Tuple[int, Iterator[bytes]]:
+    """A listings feed of (almost exactly) `size` bytes, generated on the fly"""
+    header = b'<?xml version="1.0" encoding="UTF-8"?>\n<properties>\n'
+    footer = b"</properties>\n"
+    record = (
+        "<property><id>{0:08d}</id><reference>REF-{0:08d}</reference><price>{1:07d}</price>"
+        "<currency>EUR</currency><bedrooms>{2}</bedrooms><bathrooms>2</bathrooms>"
+        "<latitude>34.6{0:06d}</latitude><longitude>33.0{0:06d}</longitude>"
+        "<title>Villa {0:08d}</title><images><image>http://" + domain + "/img/{0:08d}.jpg</image></images>"
+        "</property>\n"
+    )
+    record_len = len(record.format(0, 0, 0).encode())
+    count = max(1, (size - len(header) - len(footer)) // record_len)
+
+    def chunks() -> Iterator[bytes]:
+        yield header
+        batch = []
+        batch_bytes = 0
+        for n in range(count):
+            encoded = record.format(n, 100000 + n % 900000, 1 + n % 5).encode()
+            batch.append(encoded)
+            batch_bytes += len(encoded)
+            if batch_bytes >= CHUNK_SIZE:
+                yield b"".join(batch)
+                batch, batch_bytes = [], 0
+        if batch:
+            yield b"".join(batch)
+        yield footer
+
+    return len(header) + count * record_len + len(footer), chunks()
+
+
+def urlset(urls: List[str]) -> bytes:
+    entries = "".join(f"<url><loc>{url}</loc></url>" for url in urls)
+    return f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>'.encode()
+
+
+def site_documents(site: SiteProfile) -> Dict[str, Tuple[str, bytes]]:
+    """Small static documents (sitemaps) per site: path -> (content type, body)"""
+    base = f"http://{'www.' if site.redirect_www else ''}{site.domain}"
+    pages = [f"{base}/property/{n}" for n in range(SITEMAP_PAGES)]
+    feed_locs = [base + site.feed_path] if site.feed_path and site.feed_in_sitemap else []
+    documents = {"/sitemap.xml": ("application/xml", urlset(pages[:SITEMAP_PAGES // 2] + feed_locs))}
+    if site.sitemap_index:
+        children = [f"{base}/sitemap-pages-{n}.xml" for n in (1, 2)]
+        entries = "".join(f"<sitemap><loc>{child}</loc></sitemap>" for child in children)
+        documents["/sitemap_index.xml"] = (
+            "application/xml",
+            f'<?xml version="1.0"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</sitemapindex>'.encode(),
+        )
+        documents["/sitemap-pages-1.xml"] = ("application/xml", urlset(pages[SITEMAP_PAGES // 2:]))
+        documents["/sitemap-pages-2.xml"] = ("application/xml", urlset(pages[:10] + feed_locs))
+    return documents
+
+
+class BenchServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, profiles: List[SiteProfile]):
+        super().__init__(address, BenchHandler)
+        self.sites = {site.domain: site for site in profiles}
+        self.documents = {site.domain: site_documents(site) for site in profiles}
+        self.stats_lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        with self.stats_lock:
+            self.stats = {"requests": 0, "bytes": 0, "domains": {}}
+
+    def record(self, domain: str, sent: int) -> None:
+        with self.stats_lock:
+            self.stats["requests"] += 1
+            self.stats["bytes"] += sent
+            entry = self.stats["domains"].setdefault(domain, {"requests": 0, "bytes": 0})
+            entry["requests"] += 1
+            entry["bytes"] += sent
+
+
+class BenchHandler(BaseHTTPRequestHandler):
+    """Answers proxied requests (absolute URLs) for every simulated domain"""
+    protocol_version = "HTTP/1.1"
+    server: BenchServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.handle_request(send_body=False)
+
+    def do_GET(self):
+        self.handle_request(send_body=True)
+
+    def handle_request(self, send_body: bool) -> None:
+        parsed = urlparse(self.path)
+        host = (parsed.hostname or self.headers.get("Host", "").split(":")[0]).lower()
+        path = (parsed.path or "/") + (f"?{parsed.query}" if parsed.query else "")
+
+        if host == CONTROL_HOST:
+            if parsed.path == "/__reset":
+                self.server.reset_stats()
+            with self.server.stats_lock:
+                body = json.dumps(self.server.stats).encode()
+            self.respond(200, "application/json", len(body), iter([body]), send_body, None)
+            return
+
+        domain = host[4:] if host.startswith("www.") else host
+        site = self.server.sites.get(domain)
+        if site is None:
+            self.respond(502, "text/plain", 12, iter([b"unknown host"]), send_body, None)
+            return
+
+        rng = random.Random()
+        time.sleep(site.latency * (TAIL_FACTOR if rng.random() < site.tail_rate else 1))
+        if rng.random() < site.error_rate:
+            if rng.random() < 0.5:
+                self.server.record(domain, 0)
+                self.close_connection = True
+                self.connection.shutdown(2)
+                return
+            self.respond(503, "text/plain", 11, iter([b"unavailable"]), send_body, domain)
+            return
+
+        if site.redirect_www and not host.startswith("www."):
+            self.send_response(301)
+            self.send_header("Location", f"http://www.{domain}{path}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            self.server.record(domain, 0)
+            return
+
+        documents = self.server.documents[domain]
+        if path in documents:
+            content_type, body = documents[path]
+            self.respond(200, content_type, len(body), iter([body]), send_body, domain)
+        elif path == site.feed_path:
+            length, chunks = listing_feed(domain, site.feed_size)
+            self.respond(200, "application/xml", length, chunks, send_body, domain)
+        elif site.soft_404:
+            body = (
+                "<!DOCTYPE html><html><head><title>Page not found</title></head><body>"
+                f"<h1>Sorry, {path} could not be found</h1>" + "<p>Browse our properties.</p>" * 200 +
+                "</body></html>"
+            ).encode()
+            self.respond(200, "text/html; charset=utf-8", len(body), iter([body]), send_body, domain)
+        else:
+            self.respond(404, "text/html", 9, iter([b"not found"]), send_body, domain)
+
+    def respond(self, status: int, content_type: str, length: int, chunks: Iterator[bytes],
+                send_body: bool, domain: Optional[str]) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(length))
+        if domain and self.server.sites[domain].platform == "wordpress":
+            self.send_header("Link", f'<http://{domain}/wp-json/>; rel="https://api.w.org/"')
+        self.end_headers()
+        sent = 0
+        if send_body:
+            try:
+                for chunk in chunks:
+                    self.wfile.write(chunk)
+                    sent += len(chunk)
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True  # client stopped reading (streaming validation)
+        if domain:
+            self.server.record(domain, sent)
+
+
+def serve(profiles: List[SiteProfile], port_queue: multiprocessing.Queue) -> None:
+    server = BenchServer(("127.0.0.1", 0), profiles)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+# ---------------------------------------------------------------------------
+# Benchmark client
+# ---------------------------------------------------------------------------
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def percentile(values: List[int], pct: float) -> int:
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def run_benchmark(args: argparse.Namespace) -> dict:
+    profiles = build_profiles(args)
+    port_queue: multiprocessing.Queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(profiles, port_queue), daemon=True)
+    server.start()
+    port = port_queue.get(timeout=10)
+
+    # Every request goes through the simulated server, no real DNS involved
+    proxy = f"http://127.0.0.1:{port}"
+    os.environ["HTTP_PROXY"] = os.environ["http_proxy"] = proxy
+    os.environ.pop("NO_PROXY", None)
+    os.environ.pop("no_proxy", None)
+    control = requests.Session()
+    control.get(f"http://{CONTROL_HOST}/__reset", timeout=5)
+
+    discovery = FeedDiscovery(
+        max_workers=args.workers,
+        streaming=args.stream,
+        max_probe_bytes=parse_size(args.max_probe_bytes),
+        soft_404_check=not args.no_soft_404_check,
+        rate_limit_delay=args.rate_limit_delay,
+        base_url_template="http://{domain}",
+        parse_processes=args.parse_processes,
+        pattern_stats=PatternStats(args.pattern_stats) if args.pattern_stats else None,
+        domain_budget=args.domain_budget,
+        max_retries=args.retries,
+        hedge=args.hedge,
+    )
+    domains = [site.domain for site in profiles]
+
+    started = time.perf_counter()
+    if args.verbose:
+        results = discovery.run_discovery(domains)
+    else:
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            results = discovery.run_discovery(domains)
+    wall = time.perf_counter() - started
+    fetches = [r.fetch for r in results if r.fetch]
+    if discovery.pattern_stats:
+        discovery.pattern_stats.close()
+
+    stats = control.get(f"http://{CONTROL_HOST}/__stats", timeout=5).json()
+    server.terminate()
+
+    planted = {site.domain for site in profiles if site.feed_path}
+    found = {r.domain for r in results if "Listings" in r.feed_type}
+    per_domain_bytes = [stats["domains"].get(d, {}).get("bytes", 0) for d in domains]
+    per_domain_requests = [stats["domains"].get(d, {}).get("requests", 0) for d in domains]
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "config": {k: v for k, v in vars(args).items() if k not in ("json_out", "verbose")},
+        "wall_seconds": round(wall, 3),
+        "requests": stats["requests"],
+        "requests_per_second": round(stats["requests"] / wall, 1) if wall else 0,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "bytes_total": stats["bytes"],
+        "bytes_per_domain": {
+            "mean": int(sum(per_domain_bytes) / len(per_domain_bytes)) if per_domain_bytes else 0,
+            "p50": percentile(per_domain_bytes, 50),
+            "max": max(per_domain_bytes, default=0),
+        },
+        "requests_per_domain": {
+            "mean": round(sum(per_domain_requests) / len(per_domain_requests), 1) if per_domain_requests else 0,
+            "max": max(per_domain_requests, default=0),
+        },
+        "requests_to_feed": {
+            "p50": percentile(discovery.requests_to_feed, 50),
+            "p90": percentile(discovery.requests_to_feed, 90),
+        },
+        "retries": sum(f["retries"] for f in fetches),
+        "hedged": sum(f["hedged"] for f in fetches),
+        "feeds_planted": len(planted),
+        "feeds_found": len(found & planted),
+        "profiles": [asdict(site) for site in profiles] if args.verbose else None,
+    }
+
+
+def print_report(report: dict) -> None:
+    print("=" * 80)
+    print("⏱️  FEED DISCOVERY BENCHMARK")
+    print("=" * 80)
+    config = report["config"]
+    print(f"Domains: {config['domains']}  workers: {config['workers']}  stream: {config['stream']}  "
+          f"latency: {config['latency_ms']}ms  errors: {config['error_rate']:.0%}  feeds: {config['feed_sizes']}")
+    print("-" * 80)
+    print(f"Wall time:          {report['wall_seconds']:.2f} s")
+    print(f"Requests:           {report['requests']} ({report['requests_per_second']}/s)")
+    print(f"Peak RSS:           {report['peak_rss_mb']} MB")
+    print(f"Bytes served:       {report['bytes_total'] / 1024 / 1024:.1f} MB")
+    per_domain = report["bytes_per_domain"]
+    print(f"Bytes per domain:   mean {per_domain['mean'] / 1024:.0f} KB, p50 {per_domain['p50'] / 1024:.0f} KB, "
+          f"max {per_domain['max'] / 1024:.0f} KB")
+    print(f"Requests per domain: mean {report['requests_per_domain']['mean']}, max {report['requests_per_domain']['max']}")
+    print(f"Requests to feed:   p50 {report['requests_to_feed']['p50']}, p90 {report['requests_to_feed']['p90']}")
+    print(f"Retries / hedges:   {report['retries']} / {report['hedged']} (on reported results)")
+    print(f"Feeds found:        {report['feeds_found']}/{report['feeds_planted']}")
+    print("=" * 80)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark FeedDiscovery against a simulated feed server")
+    parser.add_argument("--domains", type=int, default=20, help="simulated domains (default: 20)")
+    parser.add_argument("--seed", default="estio", help="seed for the site profiles")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="mean per-request latency")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="share of requests that fail")
+    parser.add_argument("--tail-rate", type=float, default=0.0,
+                        help=f"share of responses delayed {TAIL_FACTOR}x (tail latency)")
+    parser.add_argument("--soft-404-rate", type=float, default=0.4, help="share of catch-all domains")
+    parser.add_argument("--redirect-rate", type=float, default=0.3, help="share of domains redirecting to www.")
+    parser.add_argument("--sitemap-index-rate", type=float, default=0.5, help="share of domains with a sitemap index")
+    parser.add_argument("--feed-rate", type=float, default=0.5, help="share of domains that have a listings feed")
+    parser.add_argument("--sitemap-feed-rate", type=float, default=0.3,
+                        help="share of feeds only reachable through a sitemap")
+    parser.add_argument("--feed-sizes", default="4K,256K,4M", help="feed sizes cycled over domains, e.g. 4K,1M,200M")
+    parser.add_argument("--workers", type=int, default=5, help="FeedDiscovery max_workers")
+    parser.add_argument("--stream", action="store_true", help="use streaming validation")
+    parser.add_argument("--max-probe-bytes", default="2M", help="byte cap per candidate in --stream mode")
+    parser.add_argument("--no-soft-404-check", action="store_true", help="disable soft-404 fingerprinting")
+    parser.add_argument("--rate-limit-delay", type=float, default=0.0,
+                        help="per-host politeness delay (default 0 for local runs)")
+    parser.add_argument("--parse-processes", type=int, default=0,
+                        help="parse large bodies in this many worker processes (0 = in-thread)")
+    parser.add_argument("--pattern-skew", type=float, default=0.0,
+                        help="Zipf exponent for which pattern a site's feed lives at (default: 0, uniform)")
+    parser.add_argument("--wordpress-rate", type=float, default=0.0, help="share of sites detected as WordPress")
+    parser.add_argument("--pattern-stats", metavar="DIR",
+                        help="order patterns by hit stats persisted in DIR (run twice to see them learned)")
+    parser.add_argument("--domain-budget", type=int, default=0, help="FeedDiscovery per-domain request budget")
+    parser.add_argument("--retries", type=int, default=FETCH_RETRIES, help="FeedDiscovery retries per request")
+    parser.add_argument("--hedge", action="store_true", help="hedge requests slower than the host's p90")
+    parser.add_argument("--json-out", help="append the result as a JSON line to this file")
+    parser.add_argument("--verbose", action="store_true", help="show discovery output and site profiles")
+    return parser.parse_args(argv)
+
+
+def main() -> int:
+    args = parse_args()
+    report = run_benchmark(args)
+    print_report(report)
+    if args.json_out:
+        report.pop("profiles", None)
+        with open(args.json_out, "a") as f:
+            f.write(json.dumps(report) + "\n")
+        print(f"💾 Result appended to: {args.json_out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Regression checks for the check_feeds.py HEAD / ranged-GET prober, against a
+local HTTP server. No network access needed.
+
+Usage: python3 scripts/test-check-feeds.py
+"""
+
+import http.server
+import os
+import sys
+import threading
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from check_feeds import FeedProber  # noqa: E402
+
+XML_FEED = b'<?xml version="1.0" encoding="UTF-8"?><properties><property><id>1</id></property></properties>'
+HTML_PAGE = b"<!DOCTYPE html><html><head><title>Properties</title></head><body></body></html>"
+
+# path -> (status, Content-Type, body)
+ROUTES = {
+    "/feed.xml": (200, "application/xml", XML_FEED),
+    "/feed.php": (200, "text/html; charset=UTF-8", XML_FEED),  # PHP export with the default header
+    "/properties": (200, "text/html; charset=UTF-8", HTML_PAGE),
+    "/missing.xml": (404, "text/html", HTML_PAGE),
+}
+
+
+class FeedHandler(http.server.BaseHTTPRequestHandler):
+    """Serves ROUTES, answering HEAD with the headers a GET would get"""
+
+    def _respond(self, send_body: bool):
+        status, content_type, body = ROUTES.get(self.path, (404, "text/html", b""))
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def log_message(self, *args):
+        pass
+
+
+def check_html_content_type_is_sniffed() -> List[str]:
+    failures = []
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FeedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        results = FeedProber(concurrency=2).probe_all([base + path for path in ROUTES])
+    finally:
+        server.shutdown()
+        server.server_close()
+    # path -> (is_xml, request that decided it)
+    expected = {
+        "/feed.xml": (True, "GET"),
+        "/feed.php": (True, "GET"),
+        "/properties": (False, "GET"),
+        "/missing.xml": (False, "HEAD"),
+    }
+    for path, result in zip(ROUTES, results):
+        got = (result.is_xml, result.method)
+        if result.error or got != expected[path]:
+            failures.append(f"{path}: is_xml={result.is_xml} decided by {result.method} "
+                            f"(error={result.error}), expected is_xml={expected[path][0]} by {expected[path][1]}")
+    return failures
+
+
+CHECKS: List[Tuple[str, Callable[[], List[str]]]] = [
+    ("HEAD with an HTML Content-Type still sniffs the body", check_html_content_type_is_sniffed),
+]
+
+
+def main() -> int:
+    failures = 0
+    for i, (label, check) in enumerate(CHECKS, 1):
+        print(f"--- {i}. {label} ---")
+        problems = check()
+        for problem in problems:
+            print(f"❌ {problem}")
+        if not problems:
+            print("✅ ok")
+        failures += len(problems)
+
+    if failures:
+        print(f"\n❌ FAILED: {failures} problems")
+        return 1
+    print("\n🎉 ALL TESTS PASSED")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
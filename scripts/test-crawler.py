@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Regression checks for the crawl4ai crawler (lib/crm/crawler/main.py):
+failed crawls and the crawl cache, and request interception. Uses stub
+crawlers and pages, so no browser is started; crawl4ai itself still has to be
+importable (as for main.py).
+
+Usage: python3 scripts/test-crawler.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from typing import Awaitable, Callable, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib", "crm", "crawler"))
+
+import main as crawler_main  # noqa: E402
+from main import CrawlCache, CrawlProfile, PageTrace, cached_page, crawl_page, merge_blocked_images  # noqa: E402
+
+URL = "https://example.com/property/1"
+
+
+class StubResult:
+    def __init__(self, success, html="", error_message=None):
+        self.success = success
+        self.html = html
+        self.markdown = html
+        self.metadata = {}
+        self.media = {}
+        self.error_message = error_message
+        self.js_execution_result = None
+
+
+class StubCrawler:
+    """Stands in for a running AsyncWebCrawler: returns a canned result"""
+
+    def __init__(self, result):
+        self.result = result
+
+    async def arun(self, url, config):
+        return self.result
+
+
+class StubRequest:
+    def __init__(self, url, resource_type):
+        self.url = url
+        self.resource_type = resource_type
+
+
+class StubRoute:
+    def __init__(self, url, resource_type):
+        self.request = StubRequest(url, resource_type)
+        self.outcome = None
+
+    async def abort(self):
+        self.outcome = "abort"
+
+    async def continue_(self):
+        self.outcome = "continue"
+
+
+class StubPage:
+    """Just enough of a Playwright page for CrawlProfile.on_page_context_created"""
+
+    def __init__(self):
+        self.handler = None
+
+    def on(self, event, callback):
+        pass
+
+    async def route(self, pattern, handler):
+        self.handler = handler
+
+
+async def check_failed_crawls_not_cached() -> List[str]:
+    failures = []
+    profile = CrawlProfile()
+    with tempfile.TemporaryDirectory() as directory:
+        cache = CrawlCache(directory)
+
+        failed = StubResult(False, error_message="net::ERR_HTTP_RESPONSE_CODE_FAILURE 403")
+        output = await crawl_page(StubCrawler(failed), URL, cache=cache, profile=profile)
+        if output.get("success") is not False:
+            failures.append("failed crawl is not reported with success=False")
+        if "403" not in (output.get("error") or ""):
+            failures.append(f"failed crawl lost crawl4ai's error message: {output.get('error')!r}")
+        if cached_page(cache, URL, None, profile) is not None:
+            failures.append("failed crawl was cached")
+
+        ok = StubResult(True, html="<h1>Villa</h1>")
+        output = await crawl_page(StubCrawler(ok), URL, cache=cache, profile=profile)
+        if output.get("success") is not True:
+            failures.append("successful crawl is not reported with success=True")
+        hit = cached_page(cache, URL, None, profile)
+        if hit is None or hit.get("html") != "<h1>Villa</h1>":
+            failures.append("successful crawl was not cached")
+        elif hit.get("success") is not True:
+            failures.append("cache hit is not reported with success=True")
+        cache.close()
+    return failures
+
+
+async def check_tracker_pixels_not_images() -> List[str]:
+    failures = []
+    requests = [
+        ("https://cdn.agency.cy/photos/villa-1.jpg", "image", "abort", True),
+        ("https://www.google-analytics.com/collect?v=1&t=pageview", "image", "abort", False),
+        ("https://stats.g.doubleclick.net/r/collect?v=1", "image", "abort", False),
+        ("https://www.facebook.com/tr?id=123&ev=PageView", "image", "abort", False),
+        ("https://bat.bing.com/action/0?ti=1", "image", "abort", False),
+        ("https://www.googletagmanager.com/gtm.js?id=GTM-1", "script", "abort", False),
+        ("https://agency.cy/app.js", "script", "continue", False),
+    ]
+    trace = PageTrace()
+    token = crawler_main._page_trace.set(trace)
+    try:
+        page = StubPage()
+        await CrawlProfile().on_page_context_created(page)
+        for url, resource_type, expected, _ in requests:
+            route = StubRoute(url, resource_type)
+            await page.handler(route)
+            if route.outcome != expected:
+                failures.append(f"{url}: expected {expected}, got {route.outcome}")
+    finally:
+        crawler_main._page_trace.reset(token)
+
+    images = [img["src"] for img in merge_blocked_images({}, trace.network.blocked_images)["images"]]
+    expected_images = [url for url, _, _, is_photo in requests if is_photo]
+    if images != expected_images:
+        failures.append(f"media.images should only hold blocked page images, got {images}")
+    return failures
+
+
+CHECKS: List[Tuple[str, Callable[[], Awaitable[List[str]]]]] = [
+    ("Failed crawls are reported and not cached", check_failed_crawls_not_cached),
+    ("Blocked tracker pixels stay out of media.images", check_tracker_pixels_not_images),
+]
+
+
+def main() -> int:
+    failures = 0
+    for i, (label, check) in enumerate(CHECKS, 1):
+        print(f"--- {i}. {label} ---")
+        problems = asyncio.run(check())
+        for problem in problems:
+            print(f"❌ {problem}")
+        if not problems:
+            print("✅ ok")
+        failures += len(problems)
+
+    if failures:
+        print(f"\n❌ FAILED: {failures} problems")
+        return 1
+    print("\n🎉 ALL TESTS PASSED")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
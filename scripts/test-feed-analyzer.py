@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Regression check: the single-pass XMLAnalyzer must agree with the original
+extract_all_tags / count_listing_nodes / extract_sample_fields / classify_feed.
+
+Usage: python3 scripts/test-feed-analyzer.py
+"""
+
+import os
+import random
+import sys
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from discover_cyprus_feeds import FeedDiscovery, LISTING_TAGS, PROPERTY_FIELDS  # noqa: E402
+
+
+SAMPLES = {
+    "plain listings": """
+        <listings>
+            <listing><id>1</id><price>100</price><bedrooms>2</bedrooms></listing>
+            <listing><id>2</id><price>200</price><images><image>a.jpg</image></images></listing>
+            <property><Reference>P3</Reference><Latitude>34.7</Latitude></property>
+        </listings>
+    """,
+    "namespaced listings": """
+        <root xmlns="http://example.com/feed" xmlns:g="http://base.google.com/ns/1.0">
+            <property><g:price>1</g:price><g:id>a</g:id></property>
+            <property><g:price>2</g:price><g:id>b</g:id></property>
+            <g:item><g:title>x</g:title></g:item>
+            <item><description>y</description></item>
+        </root>
+    """,
+    "sitemap": """
+        <urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+            <url><loc>https://example.com/a</loc></url>
+            <url><loc>https://example.com/b</loc></url>
+        </urlset>
+    """,
+    "sitemap index": """
+        <sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+            <sitemap><loc>https://example.com/sitemap-1.xml</loc></sitemap>
+        </sitemapindex>
+    """,
+    "blog rss": """
+        <rss version="2.0"><channel><title>Blog</title>
+            <item><title>Post</title><link>https://example.com/blog/1</link></item>
+        </channel></rss>
+    """,
+    "deep tree": """
+        <a><b><c><d><e><f><g><price>1</price><listing/></g></f></e></d></c></b></a>
+    """,
+    "listing root": """
+        <property><property><ad/></property><Offer/><OFFER/></property>
+    """,
+}
+
+URLS = [
+    "https://example.com/feed.xml",
+    "https://example.com/sitemap.xml",
+    "https://example.com/blog/feed",
+]
+
+
+def random_tree(rng: random.Random, depth: int = 0) -> ET.Element:
+    """Build a random document mixing listing tags, field tags and namespaces"""
+    vocabulary = LISTING_TAGS + PROPERTY_FIELDS + ["wrapper", "Node", "PriceEUR", "urlset", "rss"]
+    name = rng.choice(vocabulary)
+    if rng.random() < 0.3:
+        name = name.upper() if rng.random() < 0.5 else name.title()
+    if rng.random() < 0.3:
+        name = "{http://example.com/ns%d}%s" % (rng.randint(0, 2), name)
+    element = ET.Element(name)
+    if depth < 8:
+        for _ in range(rng.randint(0, 4 if depth < 3 else 2)):
+            element.append(random_tree(rng, depth + 1))
+    return element
+
+
+def check(label: str, root: ET.Element, url: str, discovery: FeedDiscovery) -> bool:
+    analysis = discovery.analyze_xml(root)
+    legacy_root_tag = root.tag.split('}')[-1] if '}' in root.tag else root.tag
+
+    expected = {
+        "root_tag": legacy_root_tag,
+        "tags": discovery.extract_all_tags(root),
+        "listing_count": discovery.count_listing_nodes(root),
+        "sample_fields": discovery.extract_sample_fields(root),
+    }
+    actual = {
+        "root_tag": analysis.root_tag,
+        "tags": analysis.tags,
+        "listing_count": analysis.listing_count,
+        "sample_fields": analysis.sample_fields(),
+    }
+
+    # Reference classification computed the original way, from the legacy helpers
+    legacy_classification = legacy_classify(discovery, root, url)
+    actual_classification = discovery.classify_analysis(analysis, url)
+
+    ok = expected == actual and legacy_classification == actual_classification
+    if not ok:
+        print(f"❌ {label} ({url})")
+        for key in expected:
+            if expected[key] != actual[key]:
+                print(f"   {key}: expected {expected[key]!r}, got {actual[key]!r}")
+        if legacy_classification != actual_classification:
+            print(f"   classification: expected {legacy_classification}, got {actual_classification}")
+    return ok
+
+
+def legacy_classify(discovery: FeedDiscovery, root: ET.Element, url: str):
+    """classify_feed as it was before the analyzer, driven by the legacy helpers"""
+    root_tag = root.tag.split('}')[-1].lower() if '}' in root.tag else root.tag.lower()
+    listing_count = discovery.count_listing_nodes(root)
+    sample_fields = discovery.extract_sample_fields(root)
+
+    if root_tag in ['urlset', 'sitemapindex'] or 'sitemap' in url.lower():
+        if len(sample_fields) >= 2 and listing_count > 0:
+            return "Sitemap with property data", 60
+        return "Sitemap", 20
+    if root_tag in ['rss', 'feed'] and 'blog' in url.lower():
+        return "Blog RSS", 10
+    if listing_count >= 3 and len(sample_fields) >= 2:
+        return "Listings XML feed", min(100, 70 + (listing_count * 2) + (len(sample_fields) * 3))
+    elif listing_count >= 1 and len(sample_fields) >= 1:
+        return "Possible listings feed", 50
+    elif len(sample_fields) >= 3:
+        return "Property data XML", 40
+    return "Unknown XML", 20
+
+
+def main() -> int:
+    discovery = FeedDiscovery()
+    failures = 0
+
+    print("--- 1. Fixed samples ---")
+    for label, xml in SAMPLES.items():
+        root = ET.fromstring(xml.strip())
+        for url in URLS:
+            if not check(label, root, url, discovery):
+                failures += 1
+    print(f"✅ {len(SAMPLES)} samples checked" if not failures else f"{failures} mismatches")
+
+    print("--- 2. Random trees ---")
+    rng = random.Random(1234)
+    trees = 500
+    for i in range(trees):
+        root = random_tree(rng)
+        if not check(f"random #{i}", root, rng.choice(URLS), discovery):
+            failures += 1
+    print(f"✅ {trees} random trees checked" if not failures else f"{failures} mismatches")
+
+    if failures:
+        print(f"\n❌ FAILED: {failures} mismatches")
+        return 1
+    print("\n🎉 ALL TESTS PASSED")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,565 @@
+#!/usr/bin/env python3
+"""
+Regression checks for the FeedDiscovery fetch / validation plumbing
+(body reader, caches, connection handling). No network access needed.
+
+Usage: python3 scripts/test-feed-discovery.py
+"""
+
+import contextlib
+import http.server
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import discover_cyprus_feeds  # noqa: E402
+from discover_cyprus_feeds import (  # noqa: E402
+    CACHE_MAX_ENTRY_BYTES, LATENCY_MIN_SAMPLES, PLATFORM_SNIFF_BYTES, SNIFF_BYTES, BoundedBodyReader,
+    DiscoveryMetrics, DNSCache, FeedCandidate, FeedDiscovery, HostPreflight, JsonlResultWriter, NegativeCache, PatternStats, ResponseCache,
+    _connect_clock, _read_records, analyze_feed_body, sort_results_jsonl,
+)
+
+
+class StubRaw:
+    """Just enough of a urllib3 response for requests.Response.iter_content / close"""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.closed = False
+
+    def stream(self, chunk_size, decode_content=True):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+    def release_conn(self):
+        pass
+
+
+def stub_response(status: int, body: bytes, url: str, content_type: str = "text/html") -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.headers["Content-Type"] = content_type
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)  # as the HTTP adapter sets it
+    response.url = url
+    response.raw = StubRaw(body)
+    return response
+
+
+def check_bounded_reader() -> List[str]:
+    failures = []
+    for label, chunks, cap, truncated in [
+        ("body of exactly max_bytes", [b"a" * 6, b"b" * 4], 10, False),
+        ("body under max_bytes", [b"a" * 6], 10, False),
+        ("body over max_bytes", [b"a" * 6, b"b" * 5], 10, True),
+        ("chunk arriving after the cap", [b"a" * 10, b"b"], 10, True),
+    ]:
+        reader = BoundedBodyReader(iter(chunks), max_bytes=cap)
+        data = b""
+        while True:
+            block = reader.read(4)
+            if not block:
+                break
+            data += block
+        expected = b"".join(chunks)[:cap]
+        if data != expected or reader.truncated != truncated or reader.complete == truncated:
+            failures.append(f"{label}: read {len(data)} bytes, truncated={reader.truncated}, "
+                            f"complete={reader.complete}")
+    return failures
+
+
+def check_negative_cache() -> List[str]:
+    failures = []
+    errors = {
+        "HTTP 404": True,
+        "Soft 404": True,
+        "Invalid XML": True,
+        "HTTPSConnectionPool(host='a.cy', port=443): Max retries exceeded with url: /feed.xml "
+        "(Caused by NameResolutionError(\"Failed to resolve 'a.cy'\"))": True,
+        "HTTP 503": False,
+        "HTTP 429": False,
+        "HTTPSConnectionPool(host='a.cy', port=443): Read timed out. (read timeout=3.0)": False,
+        "HTTPSConnectionPool(host='a.cy', port=443): Max retries exceeded with url: /feed.xml "
+        "(Caused by ConnectTimeoutError(..., 'Connection to a.cy timed out. (connect timeout=3.0)'))": False,
+        "('Connection aborted.', ConnectionResetError(104, 'Connection reset by peer'))": False,
+        "('Connection broken: IncompleteRead(512 bytes read, 1024 more expected)', ...)": False,
+        "('Connection aborted.', RemoteDisconnected('Remote end closed connection')) (after 3 attempts)": False,
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        cache = NegativeCache(directory)
+        for i, (error, remembered) in enumerate(errors.items()):
+            url = f"https://a.cy/path-{i}.xml"
+            cache.record("a.cy", url, error)
+            if (cache.lookup("a.cy", url) is not None) != remembered:
+                failures.append(f"{error[:60]!r} should {'' if remembered else 'not '}be remembered as dead")
+        cache.close()
+    return failures
+
+
+def check_response_cache_entry_cap() -> List[str]:
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResponseCache(directory)
+        for label, size, kept in [
+            ("small feed", 1024, True),
+            ("feed at the per-entry cap", CACHE_MAX_ENTRY_BYTES, True),
+            ("feed over the per-entry cap", CACHE_MAX_ENTRY_BYTES + 1, False),
+        ]:
+            url = f"https://a.cy/{size}.xml"
+            response = stub_response(200, b"", url, "application/xml")
+            response.headers["ETag"] = '"v1"'
+            cache.store(url, response, b"x" * size)
+            if (cache.get(url) is not None) != kept:
+                failures.append(f"{label} ({size} bytes) should {'' if kept else 'not '}be cached")
+        if cache.get("https://a.cy/1024.xml") is None:
+            failures.append("an oversized body evicted the small entry")
+        cache.close()
+    return failures
+
+
+def check_soft_404_stream_closed() -> List[str]:
+    failures = []
+    discovery = FeedDiscovery()
+    url = "https://a.cy/feed.xml"
+    response = stub_response(404, b"<html>not found</html>" * 100, url)
+    candidate = FeedCandidate(url=url, domain="a.cy")
+    if not discovery._read_unless_soft_404(candidate, response):
+        failures.append("non-200 response should still be handed to validate_candidate")
+    if not response.raw.closed:
+        failures.append("non-200 streamed response was left open")
+    discovery.validate_candidate(candidate, response)
+    if candidate.error != "HTTP 404":
+        failures.append(f"expected error 'HTTP 404', got {candidate.error!r}")
+    return failures
+
+
+def wordpress_response(url: str) -> requests.Response:
+    """A catch-all HTML page that advertises WordPress in its Link header"""
+    response = stub_response(200, b"<html><body>" + b"x" * 40000 + b"</body></html>", url)
+    response.headers["Link"] = '<https://a.cy/wp-json/>; rel="https://api.w.org/"'
+    return response
+
+
+def check_soft_404_probe_bytes() -> List[str]:
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        for stats in (None, PatternStats(directory)):
+            discovery = FeedDiscovery(rate_limit_delay=0, metrics=DiscoveryMetrics(), pattern_stats=stats)
+            discovery._get = lambda url, host, timeout, **kwargs: wordpress_response(url)
+            with contextlib.redirect_stdout(io.StringIO()):
+                discovery.fingerprint_soft_404("a.cy", "https://a.cy")
+            read = discovery.metrics.by_phase["soft_404"]["bytes"]
+            expected = PLATFORM_SNIFF_BYTES if stats else SNIFF_BYTES
+            if read != expected:
+                failures.append(f"soft-404 probe {'with' if stats else 'without'} platform sniffing "
+                                f"recorded {read} bytes read, expected {expected}")
+            if stats is not None:
+                stats.close()
+    return failures
+
+
+def check_platform_without_soft_404_probe() -> List[str]:
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        stats = PatternStats(directory)
+        # Over all platforms /properties.xml is the best bet; on WordPress it is /api/feed
+        for _ in range(200):
+            stats.record("drupal", "/properties.xml", True)
+        for _ in range(100):
+            stats.record("drupal", "/api/feed", False)
+        for _ in range(20):
+            stats.record("wordpress", "/api/feed", True)
+            stats.record("wordpress", "/properties.xml", False)
+
+        requested = []
+
+        def get(url, host, timeout, **kwargs):
+            requested.append(url)
+            return wordpress_response(url)
+
+        discovery = FeedDiscovery(rate_limit_delay=0, soft_404_check=False, pattern_stats=stats)
+        discovery._get = get
+        with contextlib.redirect_stdout(io.StringIO()):
+            discovery.test_domain("a.cy", "https://a.cy")
+        stats.close()
+
+    if discovery.platforms.get("a.cy") != "wordpress":
+        failures.append(f"platform not detected without the soft-404 probe: {discovery.platforms.get('a.cy')!r}")
+    if requested[:2] != ["https://a.cy/properties.xml", "https://a.cy/api/feed"]:
+        failures.append(f"patterns not reordered once the platform was known: {requested[:2]}")
+    return failures
+
+
+NEWS_PATHS = ("/feed.xml", "/feeds.xml")  # the same low-scoring XML on every host, so these results all tie
+LISTINGS_PATH = "/export.xml"  # a listings feed, which ends the pattern scan of its host
+NEWS_FEED = b'<?xml version="1.0"?><rss><channel><item><title>News</title></item></channel></rss>'
+
+
+def report_order(workers: int, delays: dict) -> List[str]:
+    """URLs of the sorted report for a run over `delays` (host -> seconds each request to it takes)"""
+    def get(url, host, timeout, **kwargs):
+        time.sleep(delays[host])
+        path = requests.utils.urlparse(url).path
+        if path in NEWS_PATHS:
+            return stub_response(200, NEWS_FEED, url, "application/xml")
+        if path == LISTINGS_PATH:
+            return stub_response(200, encoded_feed("UTF-8"), url, "application/xml")
+        return stub_response(404, b"not found", url)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "results.jsonl")
+        writer = JsonlResultWriter(path)
+        discovery = FeedDiscovery(max_workers=workers, rate_limit_delay=0, soft_404_check=False,
+                                  results_writer=writer)
+        discovery._get = get
+        with contextlib.redirect_stdout(io.StringIO()):
+            discovery.run_discovery(list(delays))
+        writer.close()
+        sort_results_jsonl(path, path + ".sorted", run_records=4)
+        with open(path + ".sorted", encoding="utf-8") as f:
+            return [record["url"] for record in _read_records(f)]
+
+
+def check_report_order() -> List[str]:
+    failures = []
+    hosts = [f"site{i}.cy" for i in range(8)]
+    expected = report_order(1, dict.fromkeys(hosts, 0.0))
+    if len(expected) != len(hosts) * (len(NEWS_PATHS) + 1):
+        return [f"expected {len(hosts) * (len(NEWS_PATHS) + 1)} results, got {len(expected)}"]
+    rng = random.Random(7)
+    for attempt in range(3):
+        order = report_order(4, {host: rng.uniform(0, 0.004) for host in hosts})
+        if order != expected:
+            failures.append(f"run {attempt + 1} with 4 workers reported ties in a different order "
+                            f"(first difference at {next(i for i, (a, b) in enumerate(zip(order, expected)) if a != b)})")
+    return failures
+
+
+class SlowFirstSession:
+    """Shared stand-in for the per-thread sessions: the first request stalls, later ones answer at once"""
+
+    def __init__(self, stall: float):
+        self.stall = stall
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, timeout=None, allow_redirects=True, **kwargs):
+        with self._lock:
+            self.calls += 1
+            first = self.calls == 1
+        _connect_clock.seconds = getattr(_connect_clock, "seconds", 0.0) + 0.01  # as TimedHTTPAdapter would
+        if first:
+            time.sleep(self.stall)
+        return stub_response(404, b"not found", url)
+
+
+class StubSessionDiscovery(FeedDiscovery):
+    stub_session: SlowFirstSession
+
+    @property
+    def session(self):
+        return self.stub_session
+
+
+def check_hedge_accounting() -> List[str]:
+    failures = []
+    discovery = StubSessionDiscovery(hedge=True, rate_limit_delay=0, metrics=DiscoveryMetrics())
+    discovery.stub_session = SlowFirstSession(stall=0.5)
+    for _ in range(LATENCY_MIN_SAMPLES):
+        discovery.latency.record("a.cy", 0.01)
+    acquired = []
+    acquire = discovery.rate_limiter.acquire
+    discovery.rate_limiter.acquire = lambda host: acquired.append(host) or acquire(host)
+    discovery._hedge_pool = ThreadPoolExecutor(max_workers=4)
+    discovery._local.requests = 0
+    try:
+        response, error = discovery.fetch_url("https://a.cy/feed.xml")
+    finally:
+        discovery._hedge_pool.shutdown()
+
+    stats = discovery._local.fetch_stats
+    if error or response is None or stats["hedged"] != 1 or discovery.stub_session.calls != 2:
+        return [f"expected one hedged duplicate, got error={error!r} stats={stats} "
+                f"requests sent={discovery.stub_session.calls}"]
+    if len(acquired) != 2:
+        failures.append(f"hedged pair took {len(acquired)} rate-limit tokens, expected 2")
+    if discovery._local.requests != 2:
+        failures.append(f"hedged pair counted as {discovery._local.requests} requests against the budget, expected 2")
+    if discovery._local.fetch_timing.connect <= 0:
+        failures.append("connect time of the hedged pair was not recorded")
+    return failures
+
+
+def check_hedge_pool_shut_down() -> List[str]:
+    created = []
+
+    class RecordingPool(discover_cyprus_feeds.ThreadPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            created.append(self)
+
+    discovery = StubSessionDiscovery(hedge=True, rate_limit_delay=0, soft_404_check=False)
+    discovery.stub_session = SlowFirstSession(stall=0.5)
+    for _ in range(LATENCY_MIN_SAMPLES):
+        discovery.latency.record("a.cy", 0.01)
+    used = []
+    get = discovery._get
+    discovery._get = lambda url, host, timeout, **kwargs: used.append(discovery._hedge_pool) or get(
+        url, host, timeout, **kwargs)
+
+    original = discover_cyprus_feeds.ThreadPoolExecutor
+    discover_cyprus_feeds.ThreadPoolExecutor = RecordingPool
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            discovery.run_discovery(["a.cy"])
+    finally:
+        discover_cyprus_feeds.ThreadPoolExecutor = original
+
+    if not used or used[0] is None or used[0] not in created:
+        return ["run_discovery did not send its requests through a hedge pool of its own"]
+    if discovery.stub_session.calls != len(used) + 1:
+        return [f"expected exactly one hedged duplicate, {discovery.stub_session.calls} requests sent "
+                f"for {len(used)} fetches"]
+    if not used[0]._shutdown:
+        return ["hedge pool still running after run_discovery"]
+    return []
+
+
+class SlowBodyHandler(http.server.BaseHTTPRequestHandler):
+    """Sends the headers at once, then the body in two halves BODY_DELAY seconds apart"""
+    BODY_DELAY = 0.4
+
+    def do_GET(self):
+        body = b"<?xml version='1.0'?><properties>" + b" " * 4096 + b"</properties>"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body[:100])
+        self.wfile.flush()
+        time.sleep(self.BODY_DELAY)
+        self.wfile.write(body[100:])
+
+    def log_message(self, format, *args):
+        pass
+
+
+def check_ttfb_excludes_body() -> List[str]:
+    failures = []
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), SlowBodyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        discovery = FeedDiscovery(rate_limit_delay=0, metrics=DiscoveryMetrics())
+        response, error = discovery.fetch_url(f"http://127.0.0.1:{server.server_address[1]}/feed.xml")
+    finally:
+        server.shutdown()
+        server.server_close()
+    if error or response is None:
+        return [f"fetch failed: {error}"]
+    timing = discovery._local.fetch_timing
+    if timing.ttfb >= SlowBodyHandler.BODY_DELAY / 2:
+        failures.append(f"ttfb {timing.ttfb * 1000:.0f} ms includes the body download")
+    if timing.download < SlowBodyHandler.BODY_DELAY * 0.9:
+        failures.append(f"download {timing.download * 1000:.0f} ms misses the {SlowBodyHandler.BODY_DELAY * 1000:.0f} ms body")
+    return failures
+
+
+class HomepageHandler(http.server.BaseHTTPRequestHandler):
+    """A small HTML homepage"""
+
+    def do_GET(self):
+        body = b"<!DOCTYPE html><html><body>home</body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def check_preflight_accounting() -> List[str]:
+    failures = []
+    budget = 5
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), HomepageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    template = f"http://{{domain}}:{server.server_address[1]}"
+    host = f"127.0.0.1:{server.server_address[1]}"
+    probed = []
+
+    def get(url, host, timeout, **kwargs):
+        probed.append(url)
+        return stub_response(404, b"not found", url)
+
+    with tempfile.TemporaryDirectory() as directory:
+        dns = DNSCache(directory)
+        discovery = FeedDiscovery(rate_limit_delay=0, soft_404_check=False, base_url_template=template,
+                                  metrics=DiscoveryMetrics(), domain_budget=budget,
+                                  preflight=HostPreflight(dns, base_url_template=template))
+        discovery._get = get
+        acquired = []
+        acquire = discovery.rate_limiter.acquire
+        discovery.rate_limiter.acquire = lambda host: acquired.append(host) or acquire(host)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                discovery.run_discovery(["127.0.0.1"])
+        finally:
+            server.shutdown()
+            server.server_close()
+            dns.close()
+
+    if acquired.count(host) != len(probed) + 1:
+        failures.append(f"{acquired.count(host)} rate-limit tokens for {len(probed)} probes plus the "
+                        f"preflight homepage GET, expected {len(probed) + 1}")
+    if len(probed) != budget - 1:
+        failures.append(f"{len(probed)} probes made after the preflight GET with a budget of {budget}, "
+                        f"expected {budget - 1}")
+    recorded = discovery.metrics.by_phase.get("preflight", {}).get("requests", 0)
+    if recorded != 1:
+        failures.append(f"preflight homepage GET recorded {recorded} times in the metrics, expected 1")
+    return failures
+
+
+def encoded_feed(encoding: str) -> bytes:
+    listings = "".join(f"<property><id>{i}</id><title>Βίλα {i}</title><price>{i}50000</price>"
+                       f"<bedrooms>3</bedrooms><location>Πάφος</location></property>" for i in range(5))
+    return f'<?xml version="1.0" encoding="{encoding}"?><properties>{listings}</properties>'.encode(encoding)
+
+
+def check_parse_paths_agree() -> List[str]:
+    failures = []
+    fields = ("error", "is_valid_xml", "root_tag", "listing_count", "sample_fields", "feed_type", "confidence_score")
+    discovery = FeedDiscovery()
+    for label, body, content_type in [
+        ("UTF-8", encoded_feed("UTF-8"), "application/xml"),
+        ("UTF-16 served as charset=utf-8", encoded_feed("UTF-16"), "application/xml; charset=utf-8"),
+        ("ISO-8859-7 without a charset", encoded_feed("ISO-8859-7"), "text/xml"),
+    ]:
+        url = "https://a.cy/feed.xml"
+        in_thread = FeedCandidate(url=url, domain="a.cy")
+        discovery.validate_candidate(in_thread, stub_response(200, body, url, content_type))
+        in_pool = FeedCandidate(url=url, domain="a.cy")
+        summary = analyze_feed_body(body, url)
+        summary.pop("timings")
+        for key, value in summary.items():
+            setattr(in_pool, key, value)
+        differences = [key for key in fields if getattr(in_thread, key) != getattr(in_pool, key)]
+        if differences:
+            failures.append(f"{label}: in-thread and parse-worker results differ in {differences} "
+                            f"({in_thread.error or in_thread.feed_type} vs {in_pool.error or in_pool.feed_type})")
+    return failures
+
+
+def check_parse_pool_not_forked() -> List[str]:
+    created = []
+
+    class RecordingPool(discover_cyprus_feeds.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            created.append(self)
+
+    original = discover_cyprus_feeds.ProcessPoolExecutor
+    discover_cyprus_feeds.ProcessPoolExecutor = RecordingPool
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            FeedDiscovery(parse_processes=1).run_discovery([])
+    finally:
+        discover_cyprus_feeds.ProcessPoolExecutor = original
+    if len(created) != 1:
+        return [f"expected one parse pool, {len(created)} created"]
+    method = created[0]._mp_context.get_start_method()
+    if method == "fork":
+        return ["parse pool forks its workers from a multithreaded process"]
+    return []
+
+
+def check_caches_closed_on_interrupt() -> List[str]:
+    failures = []
+    closed = []
+
+    class TrackedResponseCache(discover_cyprus_feeds.ResponseCache):
+        def close(self):
+            closed.append("ResponseCache")
+            super().close()
+
+    class TrackedNegativeCache(discover_cyprus_feeds.NegativeCache):
+        def close(self):
+            closed.append("NegativeCache")
+            super().close()
+
+    def interrupted(self, domains, checkpoint=None):
+        raise KeyboardInterrupt
+
+    originals = (discover_cyprus_feeds.ResponseCache, discover_cyprus_feeds.NegativeCache,
+                 FeedDiscovery.run_discovery, sys.argv)
+    with tempfile.TemporaryDirectory() as directory:
+        discover_cyprus_feeds.ResponseCache = TrackedResponseCache
+        discover_cyprus_feeds.NegativeCache = TrackedNegativeCache
+        FeedDiscovery.run_discovery = interrupted
+        sys.argv = ["discover_cyprus_feeds.py", "--cache-dir", directory, "--no-preflight",
+                    "--results-jsonl", os.path.join(directory, "results.jsonl")]
+        try:
+            discover_cyprus_feeds.main()
+            failures.append("KeyboardInterrupt was swallowed")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            (discover_cyprus_feeds.ResponseCache, discover_cyprus_feeds.NegativeCache,
+             FeedDiscovery.run_discovery, sys.argv) = originals
+    for name in ("ResponseCache", "NegativeCache"):
+        if name not in closed:
+            failures.append(f"{name} was left open after an interrupted run")
+    return failures
+
+
+CHECKS: List[Tuple[str, Callable[[], List[str]]]] = [
+    ("BoundedBodyReader byte cap", check_bounded_reader),
+    ("NegativeCache skips transient errors", check_negative_cache),
+    ("Non-200 streamed responses are closed", check_soft_404_stream_closed),
+    ("ResponseCache per-entry size cap", check_response_cache_entry_cap),
+    ("Caches are closed when a run is interrupted", check_caches_closed_on_interrupt),
+    ("TTFB stops at the response headers", check_ttfb_excludes_body),
+    ("Preflight homepage GET is rate limited, budgeted and recorded", check_preflight_accounting),
+    ("Parse workers and in-thread parsing agree", check_parse_paths_agree),
+    ("Parse pool does not fork", check_parse_pool_not_forked),
+    ("Soft-404 probe counts every byte it read", check_soft_404_probe_bytes),
+    ("Platform is learned without the soft-404 probe", check_platform_without_soft_404_probe),
+    ("Hedged requests are rate limited, budgeted and timed", check_hedge_accounting),
+    ("Hedge pool is shut down after a run", check_hedge_pool_shut_down),
+    ("Report order does not depend on worker timing", check_report_order),
+]
+
+
+def main() -> int:
+    failures = 0
+    for i, (label, check) in enumerate(CHECKS, 1):
+        print(f"--- {i}. {label} ---")
+        problems = check()
+        for problem in problems:
+            print(f"❌ {problem}")
+        if not problems:
+            print("✅ ok")
+        failures += len(problems)
+
+    if failures:
+        print(f"\n❌ FAILED: {failures} problems")
+        return 1
+    print("\n🎉 ALL TESTS PASSED")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Regression checks for extract_feed_listings.py: number parsing, streaming
+extraction and incremental mode (--diff-store), on local feed files. No
+network access needed.
+
+Usage: python3 scripts/test-feed-listings.py
+"""
+
+import gzip
+import io
+import json
+import os
+import sys
+import tempfile
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from extract_feed_listings import (  # noqa: E402
+    ExtractionStats, ListingHashStore, extract_feed, iter_listings, parse_number, record_to_dict,
+)
+
+LISTINGS_FEED = b"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns:g="http://base.google.com/ns/1.0">
+  <meta><generated>2024-05-01</generated></meta>
+  <listings>
+    <property ref="A1">
+      <title>Sea view villa</title>
+      <g:price currency="EUR">1.250.000</g:price>
+      <beds>4</beds>
+      <location><city>Paphos</city><district>Peyia</district></location>
+      <images><image>https://a.cy/1.jpg</image><image url="https://a.cy/2.jpg"/></images>
+      <pool>yes</pool>
+    </property>
+    <property><id>B2</id><price>250,000</price><covered_area>85,5</covered_area></property>
+  </listings>
+</feed>
+"""
+
+EXPECTED_LISTINGS = [
+    {"listing_tag": "property", "id": "A1", "title": "Sea view villa", "price": 1250000.0, "currency": "EUR",
+     "bedrooms": 4, "location": "Paphos, Peyia", "images": ["https://a.cy/1.jpg", "https://a.cy/2.jpg"],
+     "extra": {"pool": "yes"}},
+    {"listing_tag": "property", "id": "B2", "price": 250000.0, "area": 85.5, "images": []},
+]
+
+DUPLICATE_FEED = b"""<?xml version="1.0" encoding="UTF-8"?>
+<properties>
+  <property id="1"><title>Sea view villa</title><price>450000</price></property>
+  <property id="2"><title>Town flat</title><price>180000</price></property>
+  <property id="1"><title>Sea view villa (old copy)</title><price>400000</price></property>
+</properties>
+"""
+
+
+def check_parse_number() -> List[str]:
+    failures = []
+    for text, kind, expected in [
+        ("€ 250,000", float, 250000.0),
+        ("1,250,000", float, 1250000.0),
+        ("1.250.000", float, 1250000.0),
+        ("EUR 1.250.000,50", float, 1250000.5),
+        ("1,250,000.50", float, 1250000.5),
+        ("34,5 m²", float, 34.5),
+        ("85.5", float, 85.5),
+        ("3 beds", int, 3),
+        ("1.2.3", float, None),
+        ("on request", float, None),
+        (None, float, None),
+    ]:
+        value = parse_number(text, kind)
+        if value != expected or type(value) is not type(expected):
+            failures.append(f"parse_number({text!r}) = {value!r}, expected {expected!r}")
+    return failures
+
+
+def listings_from(chunks) -> List[dict]:
+    stats = ExtractionStats(source="feed.xml")
+    records = []
+    for record in iter_listings("feed.xml", iter(chunks), stats):
+        data = record_to_dict(record)
+        data.pop("source_feed")
+        records.append(data)
+    return records
+
+
+def check_streaming_extraction() -> List[str]:
+    failures = []
+    whole = listings_from([LISTINGS_FEED])
+    if whole != EXPECTED_LISTINGS:
+        failures.append(f"mapped listings differ from the expected records: {whole}")
+    tiny = listings_from([LISTINGS_FEED[i:i + 7] for i in range(0, len(LISTINGS_FEED), 7)])
+    if tiny != whole:
+        failures.append("7-byte chunks map differently from one chunk")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "feed.xml")
+        with open(path, "wb") as f:
+            f.write(LISTINGS_FEED)
+        with open(path + ".gz", "wb") as f:
+            f.write(gzip.compress(LISTINGS_FEED))
+        for source in (path, path + ".gz"):
+            out = io.StringIO()
+            stats = extract_feed(source, out)
+            lines = [json.loads(line) for line in out.getvalue().splitlines()]
+            if stats.records != 2 or stats.error or stats.truncated or [line["id"] for line in lines] != ["A1", "B2"]:
+                failures.append(f"extract_feed({os.path.basename(source)}): {stats.records} records, "
+                                f"error={stats.error!r}, {len(lines)} lines")
+
+        cut = LISTINGS_FEED.index(b"<property><id>B2")
+        out = io.StringIO()
+        stats = extract_feed(path, out, max_bytes=cut)
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        if not stats.truncated or stats.bytes_read != cut or [line["id"] for line in lines] != ["A1"]:
+            failures.append(f"max_bytes cut: truncated={stats.truncated}, bytes_read={stats.bytes_read}, "
+                            f"ids={[line.get('id') for line in lines]}")
+    return failures
+
+
+def run_diff(path: str, store: ListingHashStore):
+    out = io.StringIO()
+    stats = extract_feed(path, out, store=store)
+    return stats, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def check_duplicate_key_first_wins() -> List[str]:
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "feed.xml")
+        with open(path, "wb") as f:
+            f.write(DUPLICATE_FEED)
+        store = ListingHashStore(os.path.join(directory, "store"))
+
+        stats, lines = run_diff(path, store)
+        added = [line for line in lines if line.get("change") == "added"]
+        if stats.added != 2 or len(added) != 2:
+            failures.append(f"first run: expected 2 added listings, got {stats.added} ({len(added)} lines)")
+        titles = [line.get("title") for line in added if line.get("id") == "1"]
+        if titles != ["Sea view villa"]:
+            failures.append(f"first run: id 1 should be emitted once from its first occurrence, got {titles}")
+
+        stats, lines = run_diff(path, store)
+        if lines or stats.added or stats.changed or stats.removed:
+            failures.append(f"unchanged feed: expected no changes, got {[line.get('change') for line in lines]}")
+        store.close()
+    return failures
+
+
+CHECKS: List[Tuple[str, Callable[[], List[str]]]] = [
+    ("parse_number formats", check_parse_number),
+    ("Streaming extraction", check_streaming_extraction),
+    ("Duplicate listing keys: first occurrence wins", check_duplicate_key_first_wins),
+]
+
+
+def main() -> int:
+    failures = 0
+    for i, (label, check) in enumerate(CHECKS, 1):
+        print(f"--- {i}. {label} ---")
+        problems = check()
+        for problem in problems:
+            print(f"❌ {problem}")
+        if not problems:
+            print("✅ ok")
+        failures += len(problems)
+
+    if failures:
+        print(f"\n❌ FAILED: {failures} problems")
+        return 1
+    print("\n🎉 ALL TESTS PASSED")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())